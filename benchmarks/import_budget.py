@@ -0,0 +1,111 @@
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+# 📌 Définition des chemins
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # Dossier `benchmarks`
+MAIN_DIR = os.path.abspath(os.path.join(BASE_DIR, "../main"))  # Dossier `main`
+
+# 📌 Contrôle du temps d'import à froid (`python -X importtime`) des modules de calcul : chaque module doit
+# se charger en moins de `budget` fois le temps d'import de pandas (coût incompressible, propre à la machine)
+# et sans charger les bibliothèques réservées à l'affichage, au réseau ou au solveur SLSQP.
+
+MODULES = ("optimization_worker", "portfolio_optimizer", "frontier", "batch_runner", "price_store")
+BASELINE_MODULE = "pandas"
+FORBIDDEN_MODULES = ("matplotlib", "seaborn", "yfinance", "streamlit", "scipy.optimize")
+DEFAULT_BUDGET = 1.5
+
+
+def import_profile(module):
+    """
+    Importe un module dans un nouvel interpréteur avec `-X importtime`.
+
+    Args:
+        module (str): Module à importer (depuis le dossier `main`).
+
+    Returns:
+        tuple: (temps d'import cumulé en secondes, ensemble des modules chargés)
+    """
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=MAIN_DIR,
+                               capture_output=True, text=True, check=True)
+    cumulative, loaded = None, set()
+    for line in completed.stderr.splitlines():
+        # 📌 Format : "import time: <self us> | <cumulative us> | <indentation><module>"
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        if not cumulative_us.strip().isdigit():
+            continue  # 📌 ligne d'en-tête
+        name = name.strip()
+        loaded.add(name)
+        if name == module:
+            cumulative = int(cumulative_us) / 1e6
+    return cumulative, loaded
+
+
+def best_import_time(module, repeat):
+    """ Meilleur temps d'import sur `repeat` interpréteurs (le premier compile aussi les `.pyc`). """
+    times, loaded = [], set()
+    for _ in range(repeat):
+        cumulative, loaded = import_profile(module)
+        times.append(cumulative)
+    return min(times), loaded
+
+
+def check_imports(modules=MODULES, budget=DEFAULT_BUDGET, repeat=3):
+    """
+    Mesure le temps d'import des modules et vérifie le budget et les modules interdits.
+
+    Args:
+        modules (tuple): Modules de `main/` à contrôler.
+        budget (float): Temps maximal, en multiple du temps d'import de pandas.
+        repeat (int): Nombre de mesures par module (la meilleure est retenue).
+
+    Returns:
+        dict: Temps de référence et enregistrement par module ("seconds", "ratio", "forbidden", "status").
+    """
+    baseline, _ = best_import_time(BASELINE_MODULE, repeat)
+    records = []
+    for module in modules:
+        seconds, loaded = best_import_time(module, repeat)
+        forbidden = sorted(name for name in FORBIDDEN_MODULES if name in loaded)
+        ratio = seconds / baseline
+        records.append({
+            "module": module,
+            "seconds": seconds,
+            "ratio": ratio,
+            "forbidden": forbidden,
+            "status": "ok" if ratio <= budget and not forbidden else "failed",
+        })
+    return {"baseline_module": BASELINE_MODULE, "baseline_seconds": baseline, "budget": budget, "results": records}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Contrôle du temps d'import des modules de calcul.")
+    parser.add_argument("--modules", nargs="+", default=list(MODULES), help="Modules de `main/` à contrôler.")
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET,
+                        help=f"Temps maximal, en multiple du temps d'import de {BASELINE_MODULE}.")
+    parser.add_argument("--repeat", type=int, default=3, help="Mesures par module.")
+    parser.add_argument("--output", default=None, help="Fichier JSON des résultats.")
+    args = parser.parse_args()
+
+    report = check_imports(args.modules, args.budget, args.repeat)
+    print(f"⏳ Référence : import {BASELINE_MODULE} en {report['baseline_seconds']:.3f}s "
+          f"(budget x{args.budget:.2f})")
+    for record in report["results"]:
+        flag = "✅" if record["status"] == "ok" else "⚠️"
+        forbidden = f"  modules interdits : {', '.join(record['forbidden'])}" if record["forbidden"] else ""
+        print(f"{flag} {record['module']:<25} {record['seconds']:.3f}s (x{record['ratio']:.2f}){forbidden}")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\n📁 ✅ Résultats enregistrés dans `{args.output}`.")
+    sys.exit(0 if all(record["status"] == "ok" for record in report["results"]) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import subprocess
+import datetime as dt
+
+# 📌 Définition des chemins
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # Dossier `benchmarks`
+MAIN_DIR = os.path.join(BASE_DIR, "../main")  # Dossier `main`
+RESULTS_DIR = os.path.join(BASE_DIR, "results")  # Résultats JSON des mesures
+
+# 📌 `main/` en tête du PATH : `main/statistics.py` doit masquer le module standard
+sys.path.insert(0, MAIN_DIR)
+sys.path.append(BASE_DIR)
+
+import numpy as np
+
+from synthetic_market import generate_prices, MISSING_PATTERNS
+from data_sources import InMemorySource
+from price_store import PriceStore
+from statistics import download_data, calculate_returns, calculate_statistics
+from out_of_core import write_returns, streaming_statistics
+from portfolio_optimizer import OPTIMIZATION_METHODS, SCREENED_METHODS, PortfolioConstraints, optimize
+from frontier import efficient_frontier
+from monte_carlo import simulate_portfolios
+
+# 📌 Mesures hors-ligne (données synthétiques) : statistiques, chaque méthode d'optimisation,
+# frontière efficiente, simulation Monte Carlo et chaîne complète, pour plusieurs tailles d'univers.
+# Résultats en JSON.
+
+DEFAULT_SIZES = (5, 50, 500, 2000)
+
+# 📌 Au-delà de cette taille, les méthodes résolues par SLSQP (ratio de Sharpe) ne sont pas mesurées
+MAX_SLSQP_ASSETS = 500
+
+# 📌 Au-delà de cette taille, la méthode ré-échantillonnée (B = 1000 optimisations) n'est pas mesurée
+MAX_RESAMPLED_ASSETS = 50
+
+# 📌 Nombre de candidats de la pré-sélection de l'univers (mesurée au-delà de cette taille)
+SCREENING_CANDIDATES = 100
+
+# 📌 Portefeuilles aléatoires de la simulation Monte Carlo (float32), évalués par blocs d'environ
+# `MONTE_CARLO_BLOCK` poids
+MONTE_CARLO_SAMPLES = 200_000
+MONTE_CARLO_BLOCK = 10_000_000
+
+
+def time_call(function, repeat):
+    """
+    Chronomètre `repeat` appels d'une fonction.
+
+    Returns:
+        tuple: (durées en secondes, résultat du dernier appel)
+    """
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        durations.append(time.perf_counter() - start)
+    return durations, result
+
+
+def _record(case, n_assets, n_days, durations=None, status="ok", detail=None):
+    record = {"case": case, "n_assets": n_assets, "n_days": n_days, "status": status}
+    if durations:
+        record.update({"times": durations, "best": min(durations), "median": float(np.median(durations))})
+    if detail is not None:
+        record["detail"] = detail
+    return record
+
+
+def _constraints(n_assets):
+    # 📌 Bornes réalisables pour toutes les tailles : au plus 10 fois le poids équipondéré
+    return PortfolioConstraints(min_allocation=0.0, max_allocation=min(1.0, 10.0 / n_assets),
+                                risk_free_rate=0.02, target_return=None)
+
+
+def _method_constraints(method, constraints, target, n_assets):
+    if method == "Minimisation de la volatilité à K actifs":
+        # 📌 K = 30 lignes au plus, bornes compatibles avec K (au plus 3 fois le poids équipondéré des K lignes)
+        max_assets = min(n_assets, 30)
+        return PortfolioConstraints(0.5 / max_assets, min(1.0, 3.0 / max_assets), constraints.risk_free_rate,
+                                    target_return=target, max_assets=max_assets)
+    return PortfolioConstraints(constraints.min_allocation, constraints.max_allocation,
+                                constraints.risk_free_rate, target_return=target)
+
+
+def _solver(method):
+    if method == "Minimisation de la CVaR":
+        return "HiGHS"
+    if method == "Parité de risque hiérarchique (HRP)":
+        return "HRP"
+    if method == "Contribution égale au risque (ERC)":
+        return "Newton"
+    return "SLSQP" if method == "Maximisation du ratio de Sharpe" else "QP"
+
+
+def benchmark_size(n_assets, n_days, repeat=3, missing="none", frontier_points=20,
+                   max_slsqp_assets=MAX_SLSQP_ASSETS, seed=0):
+    """
+    Mesure toutes les étapes pour un univers de N actifs.
+
+    Args:
+        n_assets (int): Nombre N d'actifs.
+        n_days (int): Nombre T de jours de bourse.
+        repeat (int): Nombre de répétitions de chaque mesure.
+        missing (str): Motif de données manquantes des prix synthétiques.
+        frontier_points (int): Nombre de points de la frontière efficiente.
+        max_slsqp_assets (int): Taille maximale pour les méthodes résolues par SLSQP.
+        seed (int): Graine du générateur.
+
+    Returns:
+        list: Enregistrements (un par étape mesurée).
+    """
+    records = []
+    prices = generate_prices(n_assets, n_days, missing=missing, seed=seed)
+    tickers = list(prices.columns)
+    constraints = _constraints(n_assets)
+
+    # 📌 Pipeline de l'application : historiques complets (sans `dropna` sur le panel), covariance par paires
+    # puis correction semi-définie ; avec `--missing mixed`, `prices.dropna()` serait vide dès quelques centaines
+    # d'actifs. Ces statistiques servent aux étapes suivantes.
+    durations, stats = time_call(
+        lambda: calculate_statistics(calculate_returns(prices, dropna=False), covariance="pairwise"), repeat)
+    complete_rows = len(stats["returns"].dropna())
+    records.append(_record("statistics", n_assets, n_days, durations,
+                           detail={"rows": len(stats["returns"]), "complete_rows": complete_rows}))
+
+    # 📌 Mêmes statistiques hors mémoire : rendements float32 projetés, covariance accumulée par blocs
+    if complete_rows < 2:
+        records.append(_record("statistics[out_of_core]", n_assets, n_days, status="skipped",
+                               detail="moins de deux dates communes à tous les actifs"))
+    else:
+        with tempfile.TemporaryDirectory() as root:
+            store = PriceStore(root=root, provider=InMemorySource(prices))
+            path = os.path.join(root, "returns.npy")
+            write_returns(tickers, path, store=store, period="max")
+            durations, streamed = time_call(lambda: streaming_statistics(path), repeat)
+            # 📌 Référence en mémoire sur les mêmes dates communes (hors mesure)
+            reference = calculate_statistics(calculate_returns(prices.dropna()))["covariance_matrix"].to_numpy()
+            error = np.abs(streamed["covariance_matrix"].to_numpy() - reference).max() / np.abs(reference).max()
+            records.append(_record("statistics[out_of_core]", n_assets, n_days, durations,
+                                   detail={"dtype": "float32", "relative_error": float(error)}))
+            del streamed  # 📌 libère la projection avant la suppression du dossier
+
+    mu = stats["annualized_returns"]
+    target = float(mu.median())
+    for method in OPTIMIZATION_METHODS:
+        solver = _solver(method)
+        case = f"optimize[{method}]"
+        if solver == "SLSQP" and n_assets > max_slsqp_assets:
+            records.append(_record(case, n_assets, n_days, status="skipped",
+                                   detail=f"{solver} limité à {max_slsqp_assets} actifs"))
+            continue
+        if method == "Maximisation du ratio de Sharpe ré-échantillonnée" and n_assets > MAX_RESAMPLED_ASSETS:
+            records.append(_record(case, n_assets, n_days, status="skipped",
+                                   detail=f"ré-échantillonnage limité à {MAX_RESAMPLED_ASSETS} actifs"))
+            continue
+        method_constraints = _method_constraints(method, constraints, target, n_assets)
+        durations, result = time_call(
+            lambda: optimize(stats, method_constraints, method, solver=solver, verbose=False), repeat)
+        records.append(_record(case, n_assets, n_days, durations, status="ok" if result.success else "failed",
+                               detail={"solver": solver, "nit": result.nit, "message": result.message}))
+
+        # 📌 Même problème avec pré-sélection : durée et écart maximal des poids avec l'univers complet
+        if method in SCREENED_METHODS and n_assets > SCREENING_CANDIDATES:
+            screened_constraints = _method_constraints(method, constraints, target, n_assets)
+            screened_constraints.max_candidates = SCREENING_CANDIDATES
+            durations, screened = time_call(
+                lambda: optimize(stats, screened_constraints, method, solver=solver, verbose=False), repeat)
+            records.append(_record(f"{case}[screened]", n_assets, n_days, durations,
+                                   status="ok" if screened.success else "failed",
+                                   detail={"solver": solver, "nit": screened.nit, "message": screened.message,
+                                           "max_weight_difference": float(np.nanmax(np.abs(screened.weights
+                                                                                           - result.weights)))}))
+
+    durations, frontier = time_call(
+        lambda: efficient_frontier(mu, stats["covariance_matrix"], constraints.min_allocation,
+                                   constraints.max_allocation, num_points=frontier_points), repeat)
+    records.append(_record("efficient_frontier", n_assets, n_days, durations,
+                           status="ok" if frontier is not None else "failed",
+                           detail={"num_points": frontier_points,
+                                   "solved": int(frontier["success"].sum()) if frontier is not None else 0}))
+
+    durations, simulation = time_call(
+        lambda: simulate_portfolios(mu, stats["covariance_matrix"], MONTE_CARLO_SAMPLES, constraints.min_allocation,
+                                    constraints.max_allocation, constraints.risk_free_rate,
+                                    chunk_size=max(1000, MONTE_CARLO_BLOCK // n_assets), dtype=np.float32,
+                                    seed=seed), repeat)
+    records.append(_record("monte_carlo", n_assets, n_days, durations,
+                           detail={"n_samples": MONTE_CARLO_SAMPLES, "dtype": "float32",
+                                   "best_sharpe": float(simulation["top"]["sharpe_ratio"].iloc[0])}))
+
+    # 📌 Chaîne complète : stockage des prix (fichiers temporaires) -> statistiques -> volatilité minimale
+    def end_to_end():
+        with tempfile.TemporaryDirectory() as root:
+            store = PriceStore(root=root, provider=InMemorySource(prices))
+            data = download_data(tickers, period="max", store=store, dropna=False)
+            end_stats = calculate_statistics(calculate_returns(data, dropna=False), covariance="pairwise")
+            return optimize(end_stats, constraints, "Minimisation de la volatilité", verbose=False)
+
+    durations, result = time_call(end_to_end, repeat)
+    records.append(_record("end_to_end", n_assets, n_days, durations, status="ok" if result.success else "failed"))
+    return records
+
+
+def environment():
+    """ Description de la machine et de la version du code, pour comparer des mesures entre commits. """
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "date": dt.datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare(baseline_path, records, parameters=None, threshold=1.2):
+    """
+    Compare des mesures à un fichier de référence et signale les ralentissements.
+
+    Args:
+        baseline_path (str): Fichier JSON d'une exécution précédente.
+        records (list): Enregistrements de l'exécution courante.
+        parameters (dict): Paramètres de l'exécution courante (avertissement s'ils diffèrent de la référence).
+        threshold (float): Rapport de durées au-delà duquel une étape est signalée.
+
+    Returns:
+        list: Étapes ralenties (case, n_assets, rapport).
+    """
+    with open(baseline_path, encoding="utf-8") as f:
+        reference_run = json.load(f)
+    baseline = {(r["case"], r["n_assets"]): r for r in reference_run["results"] if "best" in r}
+    if parameters is not None:
+        differing = sorted(key for key in ("days", "missing", "seed", "frontier_points")
+                           if reference_run["parameters"].get(key) != parameters.get(key))
+        if differing:
+            print(f"⚠️ Paramètres différents de la référence ({', '.join(differing)}) : mesures non comparables.")
+    regressions = []
+    for record in records:
+        reference = baseline.get((record["case"], record["n_assets"]))
+        if reference is None or "best" not in record:
+            continue
+        ratio = record["best"] / reference["best"]
+        flag = "⚠️" if ratio > threshold else "  "
+        print(f"{flag} {record['case']:<55} N={record['n_assets']:<5} {reference['best']:.4f}s -> "
+              f"{record['best']:.4f}s (x{ratio:.2f})")
+        if ratio > threshold:
+            regressions.append((record["case"], record["n_assets"], ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mesures de performance hors-ligne sur données synthétiques.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="Tailles N d'univers.")
+    parser.add_argument("--days", type=int, default=1260, help="Nombre T de jours de bourse.")
+    parser.add_argument("--repeat", type=int, default=3, help="Répétitions de chaque mesure.")
+    parser.add_argument("--missing", choices=MISSING_PATTERNS, default="none", help="Motif de données manquantes.")
+    parser.add_argument("--frontier-points", type=int, default=20, help="Points de la frontière efficiente.")
+    parser.add_argument("--max-slsqp-assets", type=int, default=MAX_SLSQP_ASSETS,
+                        help="Taille maximale pour les méthodes résolues par SLSQP.")
+    parser.add_argument("--seed", type=int, default=0, help="Graine du générateur.")
+    parser.add_argument("--output", default=None, help="Fichier JSON des résultats (dans `benchmarks/results/` par défaut).")
+    parser.add_argument("--compare", default=None, help="Fichier JSON de référence à comparer.")
+    args = parser.parse_args()
+
+    records = []
+    for n_assets in args.sizes:
+        print(f"⏳ N = {n_assets}, T = {args.days}")
+        for record in benchmark_size(n_assets, args.days, args.repeat, args.missing, args.frontier_points,
+                                     args.max_slsqp_assets, args.seed):
+            timing = f"{record['best']:.4f}s" if "best" in record else record["status"]
+            print(f"   {record['case']:<55} {timing}")
+            records.append(record)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"bench-{dt.datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    parameters = {key: value for key, value in vars(args).items() if key not in ("output", "compare")}
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({"environment": environment(), "parameters": parameters, "results": records}, f,
+                  indent=2, ensure_ascii=False)
+    print(f"\n📁 ✅ Résultats enregistrés dans `{output}`.")
+
+    if args.compare:
+        print(f"\n📊 Comparaison avec `{args.compare}` :")
+        regressions = compare(args.compare, records, parameters)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+
+# 📌 Générateur déterministe de prix synthétiques (modèle à facteurs, GBM corrélé) :
+# permet de mesurer les performances sans réseau, à n'importe quelle taille d'univers.
+
+MISSING_PATTERNS = ("none", "late_listing", "delisting", "gaps", "mixed")
+
+
+def synthetic_tickers(n_assets):
+    """ Tickers fictifs `SYN0000`, `SYN0001`, ... """
+    return [f"SYN{i:04d}" for i in range(n_assets)]
+
+
+def generate_returns(n_assets, n_days, n_factors=3, seed=0):
+    """
+    Rendements journaliers log-normaux corrélés par un modèle à facteurs : r = B f + e.
+
+    Args:
+        n_assets (int): Nombre N d'actifs.
+        n_days (int): Nombre T de jours de bourse.
+        n_factors (int): Nombre de facteurs communs.
+        seed (int): Graine (même graine = mêmes données).
+
+    Returns:
+        np.ndarray: Rendements simples (T×N).
+    """
+    rng = np.random.default_rng(seed)
+    loadings = rng.normal(1.0, 0.5, (n_assets, n_factors)) / np.sqrt(n_factors)
+    factor_vol = 0.012 * rng.uniform(0.5, 1.5, n_factors)
+    specific_vol = rng.uniform(0.008, 0.025, n_assets)
+    drift = rng.normal(0.08, 0.10, n_assets) / 252  # 📌 rendements annuels autour de 8 %
+
+    factors = rng.standard_normal((n_days, n_factors)) * factor_vol
+    noise = rng.standard_normal((n_days, n_assets)) * specific_vol
+    log_returns = factors @ loadings.T + noise
+    log_returns += drift - 0.5 * log_returns.var(axis=0)  # 📌 correction d'Itô du GBM
+    return np.expm1(log_returns)
+
+
+def apply_missing(prices, pattern="none", fraction=0.1, seed=0):
+    """
+    Ajoute des valeurs manquantes réalistes à un panel de prix.
+
+    Args:
+        prices (pd.DataFrame): Prix complets.
+        pattern (str): "none", "late_listing" (introductions récentes), "delisting" (cotations arrêtées),
+            "gaps" (jours isolés manquants) ou "mixed" (les trois).
+        fraction (float): Part des actifs touchés (ou probabilité d'un trou par cellule pour "gaps", divisée par 100).
+        seed (int): Graine.
+
+    Returns:
+        pd.DataFrame: Prix avec NaN.
+    """
+    if pattern not in MISSING_PATTERNS:
+        raise ValueError(f"Motif de données manquantes inconnu : '{pattern}'")
+    rng = np.random.default_rng(seed + 1)
+    values = prices.to_numpy(copy=True)
+    n_days, n_assets = values.shape
+    affected = rng.choice(n_assets, size=max(1, int(round(fraction * n_assets))), replace=False)
+    rows = np.arange(n_days)[:, None]
+
+    if pattern in ("late_listing", "mixed"):
+        listing = rng.integers(n_days // 10, n_days // 2, len(affected))
+        values[:, affected] = np.where(rows < listing, np.nan, values[:, affected])
+    if pattern in ("delisting", "mixed"):
+        delisting = rng.integers(n_days // 2, n_days - n_days // 10, len(affected))
+        values[:, affected] = np.where(rows >= delisting, np.nan, values[:, affected])
+    if pattern in ("gaps", "mixed"):
+        values[rng.random(values.shape) < fraction / 100] = np.nan
+    return pd.DataFrame(values, index=prices.index, columns=prices.columns)
+
+
+def generate_prices(n_assets, n_days=1260, n_factors=3, missing="none", missing_fraction=0.1, seed=0,
+                    end="2024-12-31"):
+    """
+    Panel de prix synthétiques au format de `download_data` (index de dates, une colonne par ticker).
+
+    Args:
+        n_assets (int): Nombre N d'actifs.
+        n_days (int): Nombre T de jours de bourse.
+        n_factors (int): Nombre de facteurs communs.
+        missing (str): Motif de données manquantes (voir `apply_missing`).
+        missing_fraction (float): Part des actifs touchés.
+        seed (int): Graine.
+        end (str): Dernière date du panel.
+
+    Returns:
+        pd.DataFrame: Prix (T×N), base 100.
+    """
+    returns = generate_returns(n_assets, n_days - 1, n_factors, seed)
+    prices = 100 * np.vstack([np.ones(n_assets), np.cumprod(1 + returns, axis=0)])
+    index = pd.bdate_range(end=end, periods=n_days, name="Date")
+    prices = pd.DataFrame(prices, index=index, columns=synthetic_tickers(n_assets))
+    return apply_missing(prices, missing, missing_fraction, seed)
+
@@ -1,23 +1,31 @@
 import os
-import pickle
-import subprocess
 import sys
-import time
 import streamlit as st
-import matplotlib.pyplot as plt
 import pandas as pd
 import numpy as np
-import yfinance as yf
-import seaborn as sns
 
-# 📌 Définition des chemins des fichiers
-DATA_DIR = "data"
-ANSWERS_FILE = os.path.join(DATA_DIR, "answers.pkl")
-RESULTS_FILE = os.path.join("main", "optimized_portfolio.pkl")  # Résultats générés par `portfolio_optimizer.py`
-
-# 📌 Vérifier si le dossier `data/` existe, sinon le créer
-if not os.path.exists(DATA_DIR):
-    os.makedirs(DATA_DIR)
+# 📌 Importer les modules de `main/`. `main/statistics.py` porte le nom du module standard `statistics`
+# (utilisé par seaborn) : il n'est visible sous ce nom que le temps de ces imports.
+MAIN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../main")
+_stdlib_statistics = sys.modules.pop("statistics", None)
+sys.path.insert(0, MAIN_DIR)
+try:
+    from optimization_worker import OptimizationWorker
+    from portfolio_optimizer import OPTIMIZATION_METHODS, SCREENED_METHODS
+    from risk import risk_report
+    from instrumentation import RunRecord, recording
+    from result_store import ResultStore, save_preferences
+finally:
+    sys.path.remove(MAIN_DIR)
+    sys.path.append(MAIN_DIR)
+    sys.modules.pop("statistics", None)
+    if _stdlib_statistics is not None:
+        sys.modules["statistics"] = _stdlib_statistics
+
+# 📌 Travailleur d'optimisation unique, partagé par toutes les sessions (bibliothèques, prix et résultats gardés en mémoire)
+@st.cache_resource
+def get_worker():
+    return OptimizationWorker(telemetry=True, result_store=ResultStore())
 
 # 📌 Initialiser `session_state` pour détecter quand l'optimisation est terminée
 if "optimization_done" not in st.session_state:
@@ -72,10 +80,36 @@ if st.button("Add a ticker"):
 
 # 📌 Méthodes d'Optimisation
 st.header("Méthode d'Optimisation")
-optimization_method = st.selectbox("Quel type d'optimisation voulez-vous utiliser ?", ["Maximisation du ratio de Sharpe", "Minimisation de la volatilité", "Optimisation pour un rendement cible"])
+optimization_method = st.selectbox("Quel type d'optimisation voulez-vous utiliser ?", OPTIMIZATION_METHODS)
 target_return = None
+max_assets = None
+search_time = 1.0
 if optimization_method == "Optimisation pour un rendement cible":
     target_return = st.number_input("Rendement cible (%)", min_value=0.0, value=8.0, step=0.1)
+if optimization_method == "Minimisation de la volatilité à K actifs":
+    max_assets = st.number_input("Nombre maximal d'actifs détenus", min_value=1, value=20, step=1)
+    search_time = st.slider("Temps de recherche (s) : plus long = meilleure solution", 0.0, 10.0, 1.0, step=0.5)
+    if st.checkbox("Imposer un rendement cible"):
+        target_return = st.number_input("Rendement cible (%)", min_value=0.0, value=8.0, step=0.1)
+cvar_level = 95.0
+if optimization_method == "Minimisation de la CVaR":
+    cvar_level = st.slider("Niveau de confiance de la CVaR (%)", 90.0, 99.5, 95.0, step=0.5)
+    if st.checkbox("Imposer un rendement minimal"):
+        target_return = st.number_input("Rendement minimal (%)", min_value=0.0, value=8.0, step=0.1)
+max_candidates = None
+if optimization_method in SCREENED_METHODS:
+    if st.checkbox("Pré-sélectionner les actifs (grands univers)"):
+        max_candidates = st.number_input("Nombre d'actifs candidats optimisés", min_value=10, value=200, step=10)
+n_resamples = 1000
+resampling = "bootstrap"
+if optimization_method == "Maximisation du ratio de Sharpe ré-échantillonnée":
+    n_resamples = st.number_input("Nombre de tirages", min_value=10, max_value=10000, value=1000, step=100)
+    resampling = st.radio("Tirages", ["bootstrap", "parametric"],
+                          format_func=lambda kind: {"bootstrap": "Jours historiques (bootstrap)",
+                                                    "parametric": "Loi normale (paramétrique)"}[kind])
+
+# 📌 Export explicite pour les scripts en ligne de commande : `data/answers.json` est partagé par toutes les sessions
+export_preferences = st.checkbox("Enregistrer ces réponses pour les scripts en ligne de commande (`answers.json`)")
 
 # 📌 🚀 Bouton unique pour valider et lancer l'optimisation
 if st.button("🚀 Valider et Lancer l'Optimisation", key="validate_and_run"):
@@ -97,33 +131,35 @@ if st.button("🚀 Valider et Lancer l'Optimisation", key="validate_and_run"):
             "include_dividends": include_dividends,
             "risk_free_rate": risk_free_rate,
             "optimization_method": optimization_method,
-            "target_return": target_return
+            "target_return": target_return,
+            "max_assets": max_assets,
+            "search_time": search_time,
+            "cvar_level": cvar_level,
+            "n_resamples": n_resamples,
+            "resampling": resampling,
+            "max_candidates": max_candidates,
         }
-
-        # ✅ **Sauvegarde dans `data/answers.pkl`**
-        with open(ANSWERS_FILE, "wb") as f:
-            pickle.dump(answers, f)
-
-        st.success(f"✅ Réponses enregistrées dans '{ANSWERS_FILE}' !")
-
-        # 📌 Lancer `portfolio_optimizer.py` en arrière-plan
-        st.write("⏳ Optimisation en cours...")
-        subprocess.run(["python", "main/portfolio_optimizer.py"])
-
-        # 📌 Attendre la création du fichier `optimized_portfolio.pkl`
-        TIMEOUT = 20  # Maximum 20 secondes d'attente
-        elapsed_time = 0
-
-        while not os.path.exists(RESULTS_FILE) and elapsed_time < TIMEOUT:
-            time.sleep(0.5)  # Attendre 0.5 seconde avant de revérifier
-            elapsed_time += 0.5
+        if export_preferences:
+            save_preferences(answers)  # 📌 Réponses reprises par les scripts en ligne de commande
+            st.caption("Réponses enregistrées dans `data/answers.json`.")
+
+        # 📌 Lancer l'optimisation dans le travailleur partagé (résultat immédiat si ces réponses sont en cache)
+        results = None
+        with st.spinner("⏳ Optimisation en cours..."):
+            try:
+                results = get_worker().run(answers, timeout=120)
+            except Exception as e:
+                st.error(f"❌ L'optimisation a échoué : {e}")
 
         # 📌 Vérification si les résultats sont bien disponibles
-        if os.path.exists(RESULTS_FILE):
-            with open(RESULTS_FILE, "rb") as f:
-                results = pickle.load(f)
+        if results is not None:
+            # 📌 Imports différés : les bibliothèques graphiques ne sont chargées qu'à l'affichage des résultats
+            import matplotlib.pyplot as plt
+            import seaborn as sns
 
             st.header("📊 Résultats du Portefeuille Optimisé")
+            if "run_id" in results:
+                st.caption(f"Exécution enregistrée dans l'historique : `{results['run_id']}`")
             st.write("✅ **Optimisation réussie !**")
             st.write(f"📈 **Rendement attendu :** {results['expected_return']:.2f}%")
             st.write(f"📊 **Volatilité attendue :** {results['expected_volatility']:.2f}%")
@@ -135,49 +171,105 @@ if st.button("🚀 Valider et Lancer l'Optimisation", key="validate_and_run"):
             # 📌 Afficher un tableau avec `st.dataframe`
             df_results = pd.DataFrame.from_dict(results["weights"], orient="index", columns=["Pondération (%)"])
             df_results["Montant Investi (€)"] = df_results.index.map(results["investment_amounts"])
-            st.dataframe(df_results.style.format({"Pondération (%)": "{:.2f}%", "Montant Investi (€)": "{:.2f}€"}))
+            if "weights_dispersion" in results:
+                # 📌 Sensibilité au bruit d'estimation : écart-type du poids entre les tirages
+                df_results["Écart-type entre tirages (%)"] = df_results.index.map(results["weights_dispersion"])
+            st.dataframe(df_results.style.format({"Pondération (%)": "{:.2f}%", "Montant Investi (€)": "{:.2f}€",
+                                                  "Écart-type entre tirages (%)": "{:.2f}%"}))
+
+            # 📌 Durées d'affichage de la page (le calcul est mesuré par le travailleur)
+            page_record = RunRecord(page="interface")
 
             # 📌 Graphique en camembert
-            fig, ax = plt.subplots()
-            ax.pie(results["weights"].values(), labels=results["weights"].keys(), autopct="%1.1f%%", startangle=90)
-            ax.set_title("📊 Répartition du Portefeuille")
-            st.pyplot(fig)
+            with page_record.span("render/pie"):
+                fig, ax = plt.subplots()
+                held = {asset: weight for asset, weight in results["weights"].items() if weight > 1e-6}  # 📌 lignes détenues
+                ax.pie(held.values(), labels=held.keys(), autopct="%1.1f%%", startangle=90)
+                ax.set_title("📊 Répartition du Portefeuille")
+                st.pyplot(fig)
+
+            # 📌 Frontière efficiente calculée par `portfolio_optimizer.py`
+            if "frontier" in results:
+                st.subheader("📉 Frontière Efficiente")
+                with page_record.span("render/frontier"):
+                    fig, ax = plt.subplots()
+                    ax.plot(results["frontier"]["volatilities"], results["frontier"]["returns"], label="Frontière efficiente")
+                    ax.scatter(results["expected_volatility"], results["expected_return"], color="red", zorder=3, label="Portefeuille optimisé")
+                    ax.set_xlabel("Volatilité (%)")
+                    ax.set_ylabel("Rendement attendu (%)")
+                    ax.legend()
+                    st.pyplot(fig)
 
             # 📌 Évolution du portefeuille vs S&P 500
             st.subheader("📈 Évolution en % du Portefeuille vs S&P 500")
 
-            # 📌 Télécharger les données historiques
+            # 📌 Récupérer les données historiques depuis le stockage local (seules les barres manquantes sont téléchargées)
             tickers = list(results["weights"].keys())
-            stock_data = yf.download(tickers + ["SPY"], period="5y")["Close"]
-
-            # 📌 Recalculer l’évolution du portefeuille
-            weighted_prices = stock_data[tickers].mul(list(results["weights"].values()), axis=1)
-            portfolio_value = weighted_prices.sum(axis=1)
+            with page_record.span("download"):
+                stock_data = get_worker().store.get_prices(tickers + ["SPY"], period="5y").dropna()
+
+            # 📌 Backtest glissant : ré-optimisation à chaque date de rebalancement choisie, calculée par le travailleur
+            # et mise en cache (la méthode ré-échantillonnée, B optimisations par date, y est remplacée par sa
+            # version nominale ; le rebalancement journalier, ~1 250 optimisations sur 5 ans, par l'hebdomadaire)
+            backtest_method = optimization_method
+            if optimization_method == "Maximisation du ratio de Sharpe ré-échantillonnée":
+                backtest_method = "Maximisation du ratio de Sharpe"
+                st.caption("Backtest calculé avec la maximisation du ratio de Sharpe nominale (sans tirages).")
+            backtest_frequency = rebalance_frequency
+            if rebalance_frequency == "Journalier":
+                backtest_frequency = "Hebdomadaire"
+                st.caption("Backtest rebalancé chaque semaine : un rebalancement journalier ré-optimiserait "
+                           "le portefeuille à chaque séance.")
+            with page_record.span("backtest"), st.spinner("⏳ Backtest en cours..."):
+                history = get_worker().backtest(answers, stock_data[tickers], rebalance_frequency=backtest_frequency,
+                                                method=backtest_method, timeout=300)
+            portfolio_value = history["equity_curve"]
+            st.write(f"🔄 **Rotation annuelle ({backtest_frequency.lower()}) :** {history['annualized_turnover'] * 100:.1f}%")
 
             # 📌 Calcul de l'évolution en pourcentage (%)
             portfolio_returns = (portfolio_value / portfolio_value.iloc[0] - 1) * 100  # 🔥 Conversion en %
-            spy_returns = (stock_data["SPY"] / stock_data["SPY"].iloc[0] - 1) * 100  # 🔥 Conversion en %
+            spy_prices = stock_data["SPY"].loc[portfolio_value.index]
+            spy_returns = (spy_prices / spy_prices.iloc[0] - 1) * 100  # 🔥 Conversion en %
 
             # 📌 Tracer le graphique
-            fig, ax = plt.subplots()
-            ax.plot(portfolio_returns, label="Portefeuille Optimisé", linewidth=2)
-            ax.plot(spy_returns, label="S&P 500 (SPY)", linestyle="dashed")
+            with page_record.span("render/performance"):
+                fig, ax = plt.subplots()
+                ax.plot(portfolio_returns, label="Portefeuille Optimisé", linewidth=2)
+                ax.plot(spy_returns, label="S&P 500 (SPY)", linestyle="dashed")
 
-            # 📌 Ajout de titre et labels
-            ax.set_title("📈 Évolution du Portefeuille vs S&P 500 en %")
-            ax.set_ylabel("Évolution (%)")  # 🔥 Ajout de l’échelle en pourcentage
-            ax.legend()
+                # 📌 Ajout de titre et labels
+                ax.set_title("📈 Évolution du Portefeuille vs S&P 500 en %")
+                ax.set_ylabel("Évolution (%)")  # 🔥 Ajout de l’échelle en pourcentage
+                ax.legend()
 
-            # 📌 Affichage dans Streamlit
-            st.pyplot(fig)
+                # 📌 Affichage dans Streamlit
+                st.pyplot(fig)
 
             # 📌 Distribution des rendements journaliers
             st.subheader("📊 Distribution des Rendements Journaliers")
-            fig, ax = plt.subplots(figsize=(8, 6))
-            sns.histplot(portfolio_value.pct_change().dropna(), bins=50, kde=True, ax=ax)
-            ax.set_title("📈 Histogramme des Rendements du Portefeuille")
-            ax.set_xlabel("Rendement Journalier")
-            st.pyplot(fig)
-
-        else:
-            st.error("❌ L'optimisation a pris trop de temps ou a échoué. Veuillez réessayer.")
\ No newline at end of file
+            with page_record.span("render/histogram"):
+                fig, ax = plt.subplots(figsize=(8, 6))
+                sns.histplot(history["returns"], bins=50, kde=True, ax=ax)
+                ax.set_title("📈 Histogramme des Rendements du Portefeuille")
+                ax.set_xlabel("Rendement Journalier")
+                st.pyplot(fig)
+
+            # 📌 Mesures de risque (rendements historiques) : portefeuille optimisé, équipondéré et S&P 500
+            st.subheader("⚠️ Mesures de Risque")
+            panel = stock_data[tickers + ["SPY"]].pct_change().dropna()
+            portfolios = np.zeros((3, len(tickers) + 1))
+            portfolios[0, :-1] = [results["weights"][ticker] / 100 for ticker in tickers]
+            portfolios[1, :-1] = 1 / len(tickers)
+            portfolios[2, -1] = 1.0
+            with recording(page_record):
+                risk = risk_report(panel, portfolios, level=cvar_level / 100, risk_free_rate=risk_free_rate / 100,
+                                   names=["Portefeuille Optimisé", "Équipondéré", "S&P 500 (SPY)"])
+            st.caption(f"VaR et CVaR journalières au niveau {cvar_level:.1f} %, sur les rendements historiques.")
+            st.dataframe(risk.style.format({"historical_var": "{:.2%}", "historical_cvar": "{:.2%}",
+                                            "parametric_var": "{:.2%}", "parametric_cvar": "{:.2%}",
+                                            "max_drawdown": "{:.2%}", "sortino": "{:.2f}",
+                                            "annualized_volatility": "{:.2%}"}))
+
+            # 📌 Mesures d'exécution : durées par étape et télémétrie des solveurs
+            with st.expander("⏱️ Mesures d'exécution"):
+                st.json({"optimisation": results.get("telemetry"), "page": page_record.to_dict()})
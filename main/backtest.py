@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+
+from statistics import calculate_statistics
+from streaming_stats import RollingStatistics
+from portfolio_optimizer import optimize
+from risk import max_drawdown, sortino_ratio
+from instrumentation import span
+
+# 📌 Backtest glissant : ré-estimation des statistiques sur une fenêtre passée et ré-optimisation
+# à chaque date de rebalancement, puis courbe de valeur calculée de façon vectorisée (sans boucle par jour).
+
+# 📌 Fréquences de rebalancement du questionnaire -> période pandas (None = acheter et conserver)
+REBALANCE_FREQUENCIES = {
+    "Journalier": "D",
+    "Hebdomadaire": "W",
+    "Mensuel": "M",
+    "Pas de rebalancement": None,
+}
+
+
+def rebalance_positions(index, rebalance_frequency, lookback):
+    """
+    Positions (lignes) des dates de rebalancement : premier jour de bourse de chaque période.
+
+    Args:
+        index (pd.DatetimeIndex): Dates des rendements.
+        rebalance_frequency (str): Fréquence du questionnaire ("Journalier", "Hebdomadaire", ...).
+        lookback (int): Nombre de rendements nécessaires avant le premier rebalancement.
+
+    Returns:
+        np.ndarray: Positions croissantes, la première valant `lookback`.
+    """
+    if rebalance_frequency not in REBALANCE_FREQUENCIES:
+        raise ValueError(f"Fréquence de rebalancement inconnue : '{rebalance_frequency}'")
+    period = REBALANCE_FREQUENCIES[rebalance_frequency]
+    if period is None:
+        return np.array([lookback])
+
+    periods = index.to_period(period)
+    new_period = np.ones(len(index), dtype=bool)
+    new_period[1:] = periods[1:] != periods[:-1]
+    positions = np.flatnonzero(new_period)
+    positions = positions[positions > lookback]
+    return np.concatenate([[lookback], positions])
+
+
+def backtest(prices, constraints, method, rebalance_frequency="Mensuel", lookback=252, solver="QP",
+             covariance="sample"):
+    """
+    Backtest glissant d'une méthode d'optimisation.
+
+    Args:
+        prices (pd.DataFrame): Prix ajustés (colonnes = tickers).
+        constraints (PortfolioConstraints): Contraintes d'optimisation.
+        method (str): Méthode d'optimisation.
+        rebalance_frequency (str): "Journalier", "Hebdomadaire", "Mensuel" ou "Pas de rebalancement".
+        lookback (int): Taille de la fenêtre d'estimation (en jours de bourse).
+        solver (str): Solveur des méthodes de volatilité ("QP" ou "SLSQP").
+        covariance (str): Type de covariance passé à `calculate_statistics`.
+
+    Returns:
+        dict: `equity_curve`, `returns` (journaliers), `weights` (cibles à chaque rebalancement),
+        `turnover` (rotation à chaque rebalancement), les indicateurs annualisés, le drawdown maximal
+        et le ratio de Sortino.
+    """
+    returns = prices.pct_change(fill_method=None).iloc[1:].dropna()
+    if len(returns) <= lookback:
+        raise ValueError(f"Historique insuffisant : {len(returns)} rendements pour une fenêtre de {lookback}.")
+    values = returns.to_numpy(dtype=np.float64)
+    n_assets = values.shape[1]
+    positions = rebalance_positions(returns.index, rebalance_frequency, lookback)
+
+    # 📌 Covariance empirique : fenêtres avancées par sommes glissantes au lieu d'être recalculées
+    if covariance == "sample":
+        windows = RollingStatistics(returns, lookback).iter_statistics(positions)
+    else:
+        windows = ((position, calculate_statistics(returns.iloc[position - lookback:position], covariance=covariance))
+                   for position in positions)
+
+    # 📌 Ré-optimisation à chaque rebalancement, en partant des poids précédents
+    with span("rebalancing"):
+        target_weights = np.empty((len(positions), n_assets))
+        previous, state = None, None
+        for k, (position, stats) in enumerate(windows):
+            result = optimize(stats, constraints, method, solver=solver, initial_weights=previous, state=state,
+                              verbose=False)
+            if result.success:
+                previous, state = result.weights, result.state
+            elif previous is None:
+                # 📌 repli équipondéré si la première optimisation échoue
+                previous = np.full(n_assets, 1.0 / n_assets)
+            target_weights[k] = previous
+
+    # 📌 Courbe de valeur vectorisée : croissance cumulée log des actifs depuis le début de chaque segment
+    with span("equity_curve"):
+        period_returns = values[positions[0]:]
+        starts = positions - positions[0]
+        n_days = len(period_returns)
+        segment = np.searchsorted(starts, np.arange(n_days), side="right") - 1
+        cumulative = np.vstack([np.zeros(n_assets), np.cumsum(np.log1p(period_returns), axis=0)])
+        # 📌 croissance de chaque actif dans son segment
+        growth = np.exp(cumulative[1:] - cumulative[starts[segment]])
+        segment_value = np.einsum("ij,ij->i", growth, target_weights[segment])
+
+        ends = np.append(starts[1:], n_days) - 1
+        segment_final = segment_value[ends]
+        carried = np.concatenate([[1.0], np.cumprod(segment_final)[:-1]])  # 📌 valeur au début de chaque segment
+        equity = carried[segment] * segment_value
+
+        # 📌 Rotation : écart entre les poids cibles et les poids dérivés juste avant chaque rebalancement
+        drifted = target_weights[:-1] * growth[ends[:-1]] / segment_final[:-1, None]
+        turnover = np.concatenate([[0.0], 0.5 * np.abs(target_weights[1:] - drifted).sum(axis=1)])
+
+    dates = returns.index[positions[0]:]
+    equity_curve = pd.Series(equity, index=dates, name="equity")
+    daily_returns = equity_curve.pct_change()
+    daily_returns.iloc[0] = equity[0] - 1
+    years = n_days / 252
+    return {
+        "equity_curve": equity_curve,
+        "returns": daily_returns,
+        "weights": pd.DataFrame(target_weights, index=returns.index[positions], columns=returns.columns),
+        "turnover": pd.Series(turnover, index=returns.index[positions], name="turnover"),
+        "annualized_return": equity[-1] ** (1 / years) - 1,
+        "annualized_volatility": daily_returns.std() * (252 ** 0.5),
+        "annualized_turnover": turnover.sum() / years,
+        "max_drawdown": float(max_drawdown(daily_returns.to_numpy()[:, None])[0]),
+        "sortino": float(sortino_ratio(daily_returns.to_numpy()[:, None], constraints.risk_free_rate)[0]),
+    }
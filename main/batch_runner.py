@@ -0,0 +1,196 @@
+import os
+import glob
+import json
+import importlib.util
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from dataclasses import replace
+
+from statistics import download_data, calculate_returns, calculate_statistics
+from portfolio_optimizer import PortfolioConstraints, optimize
+from optimization_worker import answers_key
+from shared_arrays import share_array, attach_array, release
+from instrumentation import recording
+
+# 📌 Exécution par lots de profils de réponses (fichiers `tests/test_*.py`, JSON ou JSONL) :
+# statistiques calculées une fois par ensemble de tickers, covariances et rendements partagés en mémoire
+# avec un pool de processus, résultats écrits dans un seul fichier consolidé.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BATCH_RESULTS_PATH = os.path.join(BASE_DIR, "batch_results.jsonl")
+
+
+# 📌 Réponses indispensables à un profil (les autres ont une valeur par défaut)
+PROFILE_KEYS = ("tickers", "optimization_method", "min_allocation", "max_allocation", "risk_free_rate", "budget")
+
+
+def _is_profile(answers):
+    return isinstance(answers, dict) and bool(answers.get("tickers")) and all(key in answers for key in PROFILE_KEYS)
+
+
+def _load_python_profile(path):
+    spec = importlib.util.spec_from_file_location(os.path.splitext(os.path.basename(path))[0], path)
+    module = importlib.util.module_from_spec(spec)
+    try:
+        spec.loader.exec_module(module)
+    except Exception as e:
+        print(f"⚠️ Profil ignoré, '{os.path.basename(path)}' n'a pas pu être chargé : {e}")
+        return None
+    return getattr(module, "answers", None)
+
+
+def load_profiles(source):
+    """
+    Charge des profils de réponses depuis un dossier (`test_*.py` définissant `answers`, `*.json`, `*.jsonl`)
+    ou depuis un fichier JSONL (un profil par ligne).
+
+    Seuls les fichiers Python nommés comme les profils de `tests/` sont exécutés (pas `run_tests.py`
+    ni `__init__.py`) ; les fichiers et lignes sans les réponses de `PROFILE_KEYS` sont ignorés.
+
+    Args:
+        source (str): Dossier ou fichier.
+
+    Returns:
+        list: Couples (identifiant, réponses).
+    """
+    if os.path.isdir(source):
+        paths = sorted(glob.glob(os.path.join(source, "test_*.py")) + glob.glob(os.path.join(source, "*.json"))
+                       + glob.glob(os.path.join(source, "*.jsonl")))
+    else:
+        paths = [source]
+
+    profiles = []
+    for path in paths:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        if path.endswith(".py"):
+            answers = _load_python_profile(path)
+            if _is_profile(answers):
+                profiles.append((stem, answers))
+        elif path.endswith(".json"):
+            with open(path, encoding="utf-8") as f:
+                answers = json.load(f)
+            if _is_profile(answers):
+                profiles.append((stem, answers))
+        else:
+            with open(path, encoding="utf-8") as f:
+                for line_number, line in enumerate(f, start=1):
+                    if line.strip():
+                        answers = json.loads(line)
+                        if _is_profile(answers):
+                            profiles.append((answers.pop("id", f"{stem}-{line_number}"), answers))
+    return profiles
+
+
+# 📌 Tableaux partagés ouverts une seule fois par processus du pool
+_GROUPS = {}
+
+
+def _attach_groups(descriptors):
+    for group_id, (tickers, mu_descriptor, cov_descriptor, returns_descriptor) in descriptors.items():
+        mu_shm, mu = attach_array(mu_descriptor)
+        cov_shm, cov = attach_array(cov_descriptor)
+        returns_shm, returns = attach_array(returns_descriptor)
+        _GROUPS[group_id] = (tickers, mu, cov, returns, (mu_shm, cov_shm, returns_shm))
+
+
+def _answers_hash(answers):
+    """ Empreinte des réponses, ou None pour un profil mal formé (l'erreur est rapportée par l'optimisation). """
+    try:
+        return answers_key(answers)
+    except (TypeError, ValueError):
+        return None
+
+
+def _optimize_profile(task):
+    group_id, profile_id, answers, telemetry = task
+    tickers, mu, cov, returns, _ = _GROUPS[group_id]
+    stats = {"annualized_returns": pd.Series(mu, index=tickers), "covariance_matrix": cov, "returns": returns}
+    record = {"id": profile_id, "answers_hash": _answers_hash(answers)}
+    with recording(profile=profile_id) if telemetry else nullcontext() as run_record:
+        try:
+            # 📌 Déjà dans un processus du pool : pas de pool imbriqué pour la méthode ré-échantillonnée
+            constraints = replace(PortfolioConstraints.from_preferences(answers), processes=1)
+            result = optimize(stats, constraints, answers["optimization_method"], solver=answers.get("solver", "QP"),
+                              verbose=False)
+            record.update({"success": result.success, "message": result.message})
+            if result.success:
+                record.update({key: _to_json(value) for key, value in result.to_dict(answers["budget"]).items()})
+        except Exception as e:
+            # 📌 Un profil en échec (réponse manquante, solveur, algèbre linéaire) n'arrête pas le lot
+            message = str(e) if isinstance(e, ValueError) else f"{type(e).__name__}: {e}"
+            record.update({"success": False, "message": message})
+    if run_record is not None:
+        record["telemetry"] = run_record.to_dict()
+    return record
+
+
+def _to_json(value):
+    if isinstance(value, dict):
+        return {key: float(item) for key, item in value.items()}
+    return float(value)
+
+
+def run_batch(source, output_path=BATCH_RESULTS_PATH, processes=None, store=None, telemetry=False):
+    """
+    Optimise tous les profils d'une source en une passe.
+
+    Args:
+        source (str): Dossier ou fichier JSONL de profils.
+        output_path (str): Fichier JSONL consolidé des résultats (un enregistrement par profil).
+        processes (int): Nombre de processus du pool (nombre de cœurs par défaut).
+        store (PriceStore): Stockage des prix.
+        telemetry (bool): Ajoute à chaque résultat son enregistrement d'instrumentation (`telemetry`).
+
+    Returns:
+        list: Enregistrements de résultats, dans l'ordre des profils.
+    """
+    profiles = load_profiles(source)
+
+    # 📌 Regroupement des profils par ensemble de tickers (positions dans `profiles`)
+    groups = {}
+    for position, (_, answers) in enumerate(profiles):
+        groups.setdefault(tuple(sorted(set(answers["tickers"]))), []).append(position)
+
+    # 📌 Statistiques une seule fois par ensemble de tickers, puis partage en mémoire
+    segments, descriptors = [], {}
+    results = [None] * len(profiles)
+    try:
+        for group_id, (tickers, members) in enumerate(groups.items()):
+            data = download_data(list(tickers), store=store, dropna=False)
+            if data is None or data.empty:
+                for position in members:
+                    profile_id, answers = profiles[position]
+                    results[position] = {"id": profile_id, "answers_hash": _answers_hash(answers),
+                                         "success": False, "message": "Échec de la récupération des données."}
+                continue
+            stats = calculate_statistics(calculate_returns(data, dropna=False), covariance="pairwise")
+            mu_shm, mu_descriptor = share_array(stats["annualized_returns"].to_numpy(dtype=np.float64))
+            cov_shm, cov_descriptor = share_array(np.asarray(stats["covariance_matrix"], dtype=np.float64))
+            returns_shm, returns_descriptor = share_array(stats["returns"].to_numpy(dtype=np.float64))
+            segments += [mu_shm, cov_shm, returns_shm]
+            descriptors[group_id] = (list(stats["annualized_returns"].index), mu_descriptor, cov_descriptor,
+                                     returns_descriptor)
+
+        # 📌 Optimisation de tous les profils sur le pool de processus (tâches envoyées par paquets)
+        positions = [position for group_id, members in enumerate(groups.values()) if group_id in descriptors
+                     for position in members]
+        group_of = {position: group_id for group_id, members in enumerate(groups.values()) for position in members}
+        tasks = [(group_of[position], *profiles[position], telemetry) for position in positions]
+        processes = processes or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=processes, initializer=_attach_groups,
+                                 initargs=(descriptors,)) as executor:
+            chunksize = max(1, len(tasks) // (4 * processes))
+            for position, record in zip(positions, executor.map(_optimize_profile, tasks, chunksize=chunksize)):
+                results[position] = record
+    finally:
+        release(segments)
+
+    # 📌 Écriture atomique d'un seul fichier de résultats
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for record in results:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    os.replace(tmp_path, output_path)
+    return results
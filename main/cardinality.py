@@ -0,0 +1,142 @@
+import time
+import numpy as np
+
+from qp_solver import QPResult, min_variance_qp
+from covariance import as_covariance, covariance_block
+from instrumentation import span
+
+# 📌 Portefeuille de variance minimale à K actifs au plus, chacun entre min et max :
+# 1. filtrage : QP relâché (bornes [0, max]) sur tout l'univers, actifs classés par poids puis par coût réduit ;
+# 2. les K premiers forment le portefeuille de départ, résolu exactement par le moteur QP (K×K) ;
+# 3. recherche locale : échanges (sortie d'une ligne, entrée d'un actif de coût réduit négatif)
+#    tant qu'ils améliorent la variance et que le budget de temps n'est pas épuisé.
+
+
+def _solve_subset(cov, mu, subset, lb, ub, target_return):
+    """
+    Variance minimale restreinte à un sous-ensemble d'actifs.
+
+    Returns:
+        tuple: (sous-ensemble trié, résultat QP, variance ou inf si infaisable)
+    """
+    subset = np.sort(np.asarray(subset))
+    k = len(subset)
+    block = covariance_block(cov, subset, subset)
+    result = min_variance_qp(block, np.full(k, lb), np.full(k, ub), mean_returns=mu[subset],
+                             target_return=target_return)
+    variance = float(result.x @ block @ result.x) if result.success else np.inf
+    return subset, result, variance
+
+
+def _reduced_costs(cov, mu, subset, result):
+    """
+    Coûts réduits de tous les actifs au point optimal du sous-ensemble (négatif : l'entrée de l'actif
+    diminue la variance au premier ordre).
+    """
+    weights = np.zeros(len(mu))
+    weights[subset] = result.x
+    gradient = cov @ weights  # 📌 O(N·K) pour un modèle factoriel
+    multipliers = result.multipliers
+    reduced = gradient + multipliers[0]
+    if len(multipliers) > 1:
+        reduced = reduced + multipliers[1] * mu
+    return reduced
+
+
+def cardinality_min_variance(mean_returns, cov_matrix, max_assets, min_allocation=0.0, max_allocation=1.0,
+                             target_return=None, time_limit=1.0, candidates=5, initial_weights=None):
+    """
+    Portefeuille de variance minimale détenant au plus `max_assets` actifs, chacun entre les bornes.
+
+    Args:
+        mean_returns (np.ndarray): Rendements annualisés (N).
+        cov_matrix (np.ndarray | FactorCovariance): Covariance (N×N).
+        max_assets (int): Nombre maximal K de lignes.
+        min_allocation (float): Poids minimal d'une ligne détenue (fraction).
+        max_allocation (float): Poids maximal d'une ligne (fraction).
+        target_return (float): Rendement cible, ou None.
+        time_limit (float): Budget de temps total en secondes, filtrage compris (0 : filtrage seul) ;
+            règle le compromis entre durée et qualité.
+        candidates (int): Actifs entrants essayés à chaque tour (face à chaque ligne détenue).
+        initial_weights (np.ndarray): Solution précédente, dont les lignes servent de point de départ.
+
+    Returns:
+        QPResult: `x` (N poids, nuls hors du portefeuille), `success`, `message`, `nit` (nombre de QP
+        résolus), `holdings` (lignes détenues) et `swaps` (échanges retenus).
+    """
+    start = time.perf_counter()
+    mu = np.asarray(mean_returns, dtype=np.float64)
+    cov = as_covariance(cov_matrix)
+    n = len(mu)
+
+    # 📌 Nombre de lignes réalisable : k × min <= 1 <= k × max
+    k = min(int(max_assets), n)
+    if min_allocation > 0:
+        k = min(k, int(np.floor(1 / min_allocation + 1e-9)))
+    if k < 1 or k * max_allocation < 1 - 1e-9:
+        return QPResult(x=None, success=False, nit=0, state=None, multipliers=None, holdings=0, swaps=0,
+                        message=f"Aucun portefeuille de {int(max_assets)} actifs au plus ne respecte les bornes")
+
+    with span("screening"):
+        relaxed = min_variance_qp(cov, np.zeros(n), np.full(n, max_allocation), mean_returns=mu,
+                                  target_return=target_return)
+        if not relaxed.success:
+            return QPResult(x=None, success=False, nit=1, state=None, multipliers=None, holdings=0, swaps=0,
+                            message=f"Problème relâché infaisable : {relaxed.message}")
+        reduced = _reduced_costs(cov, mu, np.arange(n), relaxed)
+        ranking = np.lexsort((reduced, -relaxed.x))  # 📌 poids décroissants, puis coûts réduits croissants
+        if initial_weights is not None and np.all(np.isfinite(initial_weights)):
+            # 📌 Démarrage à chaud : lignes de la solution précédente en tête du classement
+            held = np.flatnonzero(np.asarray(initial_weights) > 0)
+            held = held[np.argsort(-np.asarray(initial_weights)[held])]
+            ranking = np.concatenate([held, ranking[~np.isin(ranking, held)]])
+
+    subset, result, variance = _solve_subset(cov, mu, ranking[:k], min_allocation, max_allocation, target_return)
+    solves = 2
+    # 📌 Départ infaisable (rendement cible) : remplacer les lignes les moins rentables par les plus rentables
+    by_return = np.argsort(-mu)
+    for j in by_return:
+        if result.success:
+            break
+        if j in subset:
+            continue
+        weakest = subset[np.argmin(mu[subset])]
+        subset, result, variance = _solve_subset(cov, mu, np.append(subset[subset != weakest], j),
+                                                 min_allocation, max_allocation, target_return)
+        solves += 1
+    if not result.success:
+        return QPResult(x=None, success=False, nit=solves, state=None, multipliers=None, holdings=0, swaps=0,
+                        message=f"Aucun portefeuille de {k} actifs n'atteint les contraintes : {result.message}")
+
+    # 📌 Recherche locale par échanges
+    swaps, tried = 0, set()  # 📌 paires (sortant, entrant) déjà évaluées pour le portefeuille courant
+    with span("local_search"):
+        while time.perf_counter() - start < time_limit and k < n:
+            reduced = _reduced_costs(cov, mu, subset, result)
+            reduced[subset] = np.inf
+            entering = [j for j in np.argsort(reduced)[:candidates] if reduced[j] < 0]
+            leaving = subset[np.argsort(result.x)]  # 📌 plus petits poids d'abord
+            best = None
+            for i in leaving:
+                for j in entering:
+                    if (i, j) in tried:
+                        continue
+                    tried.add((i, j))
+                    trial = _solve_subset(cov, mu, np.append(subset[subset != i], j), min_allocation,
+                                          max_allocation, target_return)
+                    solves += 1
+                    if trial[2] < variance * (1 - 1e-9) and (best is None or trial[2] < best[2]):
+                        best = trial
+                if time.perf_counter() - start >= time_limit:
+                    break
+            if best is None:
+                break
+            subset, result, variance = best
+            swaps += 1
+            tried.clear()  # 📌 échanges rejetés pour l'ancien portefeuille : à réévaluer avec le nouveau
+
+    weights = np.zeros(n)
+    weights[subset] = result.x
+    return QPResult(x=weights, success=True, nit=solves, state=None, multipliers=None,
+                    holdings=int(np.count_nonzero(weights > 0)), swaps=swaps,
+                    message=f"Optimisation terminée avec succès ({len(subset)} actifs, {swaps} échanges)")
@@ -0,0 +1,240 @@
+import numpy as np
+import pandas as pd
+
+from instrumentation import record_fallback
+
+# 📌 Représentations de la matrice de covariance pour les grands univers :
+# - modèle factoriel statistique (ACP à K facteurs + variances spécifiques) : stockage et w'Σw en O(N·K)
+# - rétrécissement de Ledoit-Wolf de la covariance dense (meilleur conditionnement pour les solveurs)
+# - covariance par paires d'observations complètes (historiques de longueurs différentes), rendue
+#   semi-définie positive
+
+
+class FactorCovariance:
+    """
+    Covariance de la forme Σ = B diag(f) B' + diag(d), sans jamais former la matrice N×N.
+
+    Supporte `Σ @ w`, `w @ Σ` et l'extraction de sous-blocs, ce qui suffit aux fonctions objectifs
+    et au moteur QP.
+    """
+
+    __array_ufunc__ = None  # 📌 `ndarray @ FactorCovariance` délègue à `__rmatmul__`
+
+    def __init__(self, loadings, factor_variances, specific_variances, index=None):
+        """
+        Args:
+            loadings (np.ndarray): Expositions B (N×K).
+            factor_variances (np.ndarray): Variances des facteurs f (K).
+            specific_variances (np.ndarray): Variances spécifiques d (N).
+            index (list): Tickers (ordre des lignes).
+        """
+        self.loadings = np.asarray(loadings, dtype=np.float64)
+        self.factor_variances = np.asarray(factor_variances, dtype=np.float64)
+        self.specific_variances = np.asarray(specific_variances, dtype=np.float64)
+        self.index = pd.Index(index) if index is not None else pd.RangeIndex(len(self.specific_variances))
+
+    @property
+    def shape(self):
+        n = len(self.specific_variances)
+        return (n, n)
+
+    @property
+    def n_factors(self):
+        return len(self.factor_variances)
+
+    def __matmul__(self, other):
+        other = np.asarray(other, dtype=np.float64)
+        factor_part = self.loadings @ (self.factor_variances.reshape(-1, *[1] * (other.ndim - 1))
+                                       * (self.loadings.T @ other))
+        return factor_part + self.specific_variances.reshape(-1, *[1] * (other.ndim - 1)) * other
+
+    def __rmatmul__(self, other):
+        other = np.asarray(other, dtype=np.float64)
+        return ((other @ self.loadings) * self.factor_variances) @ self.loadings.T + other * self.specific_variances
+
+    def __truediv__(self, scalar):
+        return FactorCovariance(self.loadings, self.factor_variances / scalar,
+                                self.specific_variances / scalar, self.index)
+
+    def diagonal(self):
+        """ Variances totales des actifs. """
+        return (self.loadings ** 2) @ self.factor_variances + self.specific_variances
+
+    def block(self, rows, cols):
+        """
+        Sous-matrice Σ[rows, cols] (indices entiers ou masques booléens).
+        """
+        rows = np.flatnonzero(rows) if np.asarray(rows).dtype == bool else np.asarray(rows)
+        cols = np.flatnonzero(cols) if np.asarray(cols).dtype == bool else np.asarray(cols)
+        block = (self.loadings[rows] * self.factor_variances) @ self.loadings[cols].T
+        block += np.equal.outer(rows, cols) * self.specific_variances[rows][:, None]
+        return block
+
+    def to_dense(self):
+        """ Matrice N×N complète (à réserver aux petits univers). """
+        return self.block(np.arange(self.shape[0]), np.arange(self.shape[0]))
+
+    def __array__(self, dtype=None, copy=None):
+        dense = self.to_dense()
+        return dense.astype(dtype) if dtype is not None else dense
+
+    def __repr__(self):
+        return f"FactorCovariance(N={self.shape[0]}, K={self.n_factors})"
+
+
+def as_covariance(cov_matrix):
+    """
+    Normalise une covariance : le modèle factoriel est conservé tel quel, le reste devient un ndarray float64.
+    """
+    if isinstance(cov_matrix, FactorCovariance):
+        return cov_matrix
+    return np.asarray(cov_matrix, dtype=np.float64)
+
+
+def covariance_diagonal(cov_matrix):
+    """ Variances des actifs, pour une covariance dense ou factorielle. """
+    if isinstance(cov_matrix, FactorCovariance):
+        return cov_matrix.diagonal()
+    return np.diag(cov_matrix)
+
+
+def covariance_block(cov_matrix, rows, cols):
+    """ Sous-bloc Σ[rows, cols], pour une covariance dense ou factorielle. """
+    if isinstance(cov_matrix, FactorCovariance):
+        return cov_matrix.block(rows, cols)
+    return cov_matrix[np.ix_(rows, cols)]
+
+
+def portfolio_variances(cov_matrix, weights):
+    """
+    Variances de plusieurs portefeuilles à la fois.
+
+    Args:
+        cov_matrix (np.ndarray | FactorCovariance): Covariance.
+        weights (np.ndarray): Poids (P×N).
+
+    Returns:
+        np.ndarray: Variance de chaque portefeuille (P).
+    """
+    weights = np.atleast_2d(weights)
+    if isinstance(cov_matrix, FactorCovariance):
+        exposures = weights @ cov_matrix.loadings
+        return (exposures ** 2) @ cov_matrix.factor_variances + (weights ** 2) @ cov_matrix.specific_variances
+    return np.einsum("ij,ij->i", weights @ cov_matrix, weights)  # 📌 produit matriciel BLAS puis somme ligne à ligne
+
+
+def factor_covariance(returns, n_factors=10):
+    """
+    Modèle factoriel statistique : K composantes principales + variances spécifiques.
+
+    Les variances spécifiques sont choisies pour que la diagonale reproduise les variances empiriques.
+
+    Args:
+        returns (pd.DataFrame): Rendements journaliers.
+        n_factors (int): Nombre K de facteurs.
+
+    Returns:
+        FactorCovariance: Covariance factorielle des rendements journaliers.
+    """
+    values = returns.to_numpy(dtype=np.float64)
+    centered = values - values.mean(axis=0)
+    n_obs = len(values)
+    n_factors = min(n_factors, min(values.shape) - 1)
+
+    _, singular_values, vt = np.linalg.svd(centered, full_matrices=False)
+    loadings = vt[:n_factors].T
+    factor_variances = singular_values[:n_factors] ** 2 / (n_obs - 1)
+
+    total_variances = (centered ** 2).sum(axis=0) / (n_obs - 1)
+    specific = total_variances - (loadings ** 2) @ factor_variances
+    specific = np.maximum(specific, 1e-8 * total_variances.mean())
+    return FactorCovariance(loadings, factor_variances, specific, index=returns.columns)
+
+
+def ledoit_wolf_covariance(returns):
+    """
+    Covariance rétrécie vers une cible diagonale m·I (Ledoit & Wolf, 2004).
+
+    Args:
+        returns (pd.DataFrame): Rendements journaliers.
+
+    Returns:
+        tuple: (pd.DataFrame de la covariance rétrécie, intensité de rétrécissement entre 0 et 1)
+    """
+    values = returns.to_numpy(dtype=np.float64)
+    n_obs, n_assets = values.shape
+    centered = values - values.mean(axis=0)
+    sample = centered.T @ centered / n_obs
+
+    target_scale = np.trace(sample) / n_assets
+    dispersion = np.sum((sample - target_scale * np.eye(n_assets)) ** 2) / n_assets
+    # 📌 Σ_t ||x_t x_t' - S||² = Σ_t ||x_t||⁴ - T ||S||², calculé sans boucle sur les dates
+    estimation_error = (np.sum(np.sum(centered ** 2, axis=1) ** 2) - n_obs * np.sum(sample ** 2)) / (n_obs ** 2 * n_assets)
+    shrinkage = min(estimation_error, dispersion) / dispersion if dispersion > 0 else 1.0
+
+    shrunk = shrinkage * target_scale * np.eye(n_assets) + (1 - shrinkage) * sample
+    return pd.DataFrame(shrunk, index=returns.columns, columns=returns.columns), shrinkage
+
+
+def nearest_psd(cov_matrix, tolerance=1e-10):
+    """
+    Projette une covariance sur les matrices semi-définies positives en conservant les variances.
+
+    Les valeurs propres négatives de la matrice de corrélation sont mises à zéro, puis la diagonale unité
+    est rétablie et les volatilités réappliquées.
+
+    Args:
+        cov_matrix (np.ndarray): Covariance symétrique (N×N).
+        tolerance (float): Valeur propre négative tolérée, relativement à la plus grande.
+
+    Returns:
+        tuple: (covariance semi-définie positive, True si une correction a été nécessaire)
+    """
+    cov = np.asarray(cov_matrix, dtype=np.float64)
+    std = np.sqrt(np.diag(cov))
+    scale = np.where(std > 0, std, 1.0)
+    correlation = cov / np.outer(scale, scale)
+    eigenvalues, eigenvectors = np.linalg.eigh(correlation)
+    if eigenvalues[0] >= -tolerance * max(eigenvalues[-1], 0.0):
+        return cov, False
+    record_fallback("psd_repair", min_eigenvalue=float(eigenvalues[0]))
+    correlation = (eigenvectors * np.maximum(eigenvalues, 0.0)) @ eigenvectors.T
+    diagonal = np.sqrt(np.diag(correlation))
+    diagonal = np.where(diagonal > 0, diagonal, 1.0)
+    correlation /= np.outer(diagonal, diagonal)
+    return correlation * np.outer(std, std), True
+
+
+def pairwise_covariance(returns, min_periods=20):
+    """
+    Covariance par paires d'observations complètes, sans `dropna` sur tout le panel.
+
+    Chaque covariance σ_ij utilise toutes les dates où i et j ont un rendement. Les comptes, sommes et
+    produits croisés de toutes les paires sont obtenus par trois produits matriciels sur les masques de
+    validité (O(T·N²) en BLAS, aucune boucle par paire). La matrice obtenue n'étant pas forcément
+    semi-définie positive, elle est ensuite corrigée par `nearest_psd`.
+
+    Args:
+        returns (pd.DataFrame): Rendements journaliers, NaN là où un actif n'a pas de cotation.
+        min_periods (int): Nombre minimal de dates communes (corrélation nulle en deçà).
+
+    Returns:
+        pd.DataFrame: Covariance des rendements journaliers.
+    """
+    values = returns.to_numpy(dtype=np.float64)
+    valid = ~np.isnan(values)
+    mask = valid.astype(np.float64)
+    centered = np.where(valid, values - np.nanmean(values, axis=0), 0.0)  # 📌 centrage : moins d'annulations
+
+    counts = mask.T @ mask  # 📌 dates communes de chaque paire
+    sums = centered.T @ mask  # 📌 sums[i, j] : somme des rendements de i aux dates où j cote aussi
+    cross = centered.T @ centered
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = (cross - sums * sums.T / counts) / (counts - 1)
+    variances = np.diag(cov).copy()
+    cov[counts < min_periods] = 0.0
+    np.fill_diagonal(cov, variances)
+
+    if not valid.all():
+        cov, _ = nearest_psd(cov)
+    return pd.DataFrame(cov, index=returns.columns, columns=returns.columns)
@@ -0,0 +1,271 @@
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+# 📌 Sources de données de marché interchangeables (yfinance, dossier local CSV/Parquet, mémoire),
+# et couche de récupération par paquets concurrents avec nouvelles tentatives par ticker :
+# un symbole en échec n'empêche pas de récupérer les autres.
+
+# 📌 Variable d'environnement : dossier local de prix à utiliser à la place de yfinance (mode hors-ligne)
+DATA_DIR_ENV = "PORTFOLIO_DATA_DIR"
+
+# 📌 `yf.download` partage un état global entre ses appels : un seul téléchargement groupé à la fois
+_YAHOO_DOWNLOAD_LOCK = threading.Lock()
+
+
+def naive_dates(frame, interval="1d"):
+    """
+    Index de dates sans fuseau horaire (et ramené à minuit pour les barres journalières ou plus longues).
+
+    `yf.Ticker.history` renvoie un index localisé, `yf.download` un index naïf : sans normalisation,
+    la concaténation des deux lève `TypeError` et tout le panel est perdu.
+
+    Args:
+        frame (pd.DataFrame): Prix indexés par date.
+        interval (str): Intervalle des barres ("1d", "1wk", "1mo", ou intrajournalier).
+
+    Returns:
+        pd.DataFrame: Même cadre, index naïf.
+    """
+    if frame.empty or not isinstance(frame.index, pd.DatetimeIndex):
+        return frame
+    index = frame.index.tz_localize(None) if frame.index.tz is not None else frame.index
+    if interval.endswith(("d", "wk", "mo")):
+        index = index.normalize()
+    return frame.set_axis(index.rename("Date"), axis=0)
+
+
+class DataSource:
+    """
+    Interface d'une source de prix : `fetch` renvoie un DataFrame (index de dates, une colonne par ticker trouvé).
+
+    Une source peut lever une exception (tout le paquet est alors retenté ticker par ticker)
+    ou omettre les tickers sans données.
+
+    `incremental` indique une mise à jour de tickers déjà stockés : une réponse vide signifie alors
+    « pas de nouvelle barre » et non un échec.
+    """
+
+    def fetch(self, tickers, start=None, interval="1d", incremental=False):
+        raise NotImplementedError
+
+
+class YahooSource(DataSource):
+    """
+    Source yfinance (importé uniquement au premier téléchargement).
+
+    Un paquet de tickers est téléchargé en une seule requête groupée `yf.download` (threads internes
+    de yfinance), sérialisée par un verrou car `yf.download` partage un état global entre appels.
+    Un ticker seul (nouvelles tentatives) passe par son propre objet `yf.Ticker`, sans cet état partagé.
+    Les deux chemins renvoient un index de dates naïf (`naive_dates`). Avec le verrou, les paquets de
+    `ConcurrentFetcher` sont téléchargés l'un après l'autre ; seules les nouvelles tentatives par ticker
+    s'exécutent en parallèle.
+    """
+
+    def fetch(self, tickers, start=None, interval="1d", incremental=False):
+        """
+        Télécharge les prix ajustés des tickers depuis `start` (tout l'historique si None).
+
+        Returns:
+            pd.DataFrame: Prix ajustés, une colonne par ticker trouvé.
+        """
+        import yfinance as yf
+
+        span = {"period": "max"} if start is None else {"start": start.strftime("%Y-%m-%d")}
+        tickers = list(tickers)
+        if len(tickers) == 1:
+            history = yf.Ticker(tickers[0]).history(interval=interval, auto_adjust=True, **span)
+            if history is None or history.empty or "Close" not in history:
+                return pd.DataFrame()
+            return naive_dates(history[["Close"]].rename(columns={"Close": tickers[0]}), interval)
+
+        with _YAHOO_DOWNLOAD_LOCK:
+            data = yf.download(tickers, interval=interval, auto_adjust=True, group_by="column", progress=False,
+                               **span)
+        if data is None or data.empty or "Close" not in data:
+            return pd.DataFrame()
+        close = data["Close"]
+        if isinstance(close, pd.Series):  # 📌 colonnes simples selon la version de yfinance
+            close = close.to_frame(tickers[0])
+        return naive_dates(close.dropna(axis=1, how="all"), interval)  # 📌 tickers en échec : colonnes vides
+
+
+class LocalDirectorySource(DataSource):
+    """
+    Source hors-ligne : lit `<dossier>/<TICKER>.parquet` ou `<dossier>/<TICKER>.csv`
+    (colonne `Date`, et `Adj Close` ou `Close`).
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def _read(self, ticker):
+        parquet_path = os.path.join(self.directory, f"{ticker}.parquet")
+        csv_path = os.path.join(self.directory, f"{ticker}.csv")
+        if os.path.exists(parquet_path):
+            frame = pd.read_parquet(parquet_path)
+        elif os.path.exists(csv_path):
+            frame = pd.read_csv(csv_path)
+        else:
+            return None
+        if "Date" in frame:
+            frame = frame.set_index("Date")
+        frame.index = pd.to_datetime(frame.index)
+        return frame["Adj Close"] if "Adj Close" in frame else frame["Close"]
+
+    def fetch(self, tickers, start=None, interval="1d", incremental=False):
+        """
+        Lit les prix des tickers disponibles localement à partir de `start`.
+
+        Returns:
+            pd.DataFrame: Prix, une colonne par ticker trouvé.
+        """
+        columns = {}
+        for ticker in tickers:
+            series = self._read(ticker)
+            if series is None:
+                continue
+            if start is not None:
+                series = series[series.index >= start]
+            columns[ticker] = series
+        return pd.DataFrame(columns)
+
+    def write(self, prices, file_format="csv"):
+        """
+        Exporte un panel de prix dans le dossier (un fichier par ticker), par exemple pour travailler hors-ligne.
+
+        Args:
+            prices (pd.DataFrame): Prix, une colonne par ticker.
+            file_format (str): "csv" ou "parquet".
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        for ticker in prices.columns:
+            frame = prices[ticker].dropna().rename("Close").rename_axis("Date").to_frame()
+            if file_format == "parquet":
+                frame.to_parquet(os.path.join(self.directory, f"{ticker}.parquet"))
+            else:
+                frame.to_csv(os.path.join(self.directory, f"{ticker}.csv"))
+
+
+class InMemorySource(DataSource):
+    """
+    Source en mémoire servant un panel de prix (données synthétiques, scénarios sans réseau).
+    """
+
+    def __init__(self, prices):
+        self.prices = prices
+
+    def fetch(self, tickers, start=None, interval="1d", incremental=False):
+        """
+        Renvoie les prix des tickers connus à partir de `start`.
+
+        Returns:
+            pd.DataFrame: Prix, une colonne par ticker trouvé.
+        """
+        prices = self.prices[[ticker for ticker in tickers if ticker in self.prices.columns]]
+        if start is not None:
+            prices = prices[prices.index >= pd.Timestamp(start)]
+        return prices
+
+
+class ConcurrentFetcher(DataSource):
+    """
+    Récupère un grand univers par paquets de tickers en parallèle (pool de threads).
+
+    Les tickers d'un paquet en erreur ou sans données sont retentés un par un, puis `retries` fois
+    avec un délai croissant ; ceux qui échouent encore sont renvoyés par `fetch_with_failures`.
+    Les échecs sont propres à chaque appel : plusieurs `fetch` peuvent partager la même instance.
+    """
+
+    def __init__(self, source, chunk_size=50, max_workers=8, retries=3, backoff=1.0):
+        """
+        Args:
+            source (DataSource): Source sous-jacente.
+            chunk_size (int): Nombre de tickers par requête.
+            max_workers (int): Nombre de requêtes simultanées.
+            retries (int): Nouvelles tentatives par ticker en échec.
+            backoff (float): Délai avant la première nouvelle tentative (doublé à chaque essai), en secondes.
+        """
+        self.source = source
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
+
+    def _fetch_ticker(self, ticker, start, interval, failures):
+        error = "aucune donnée"
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+            try:
+                data = naive_dates(self.source.fetch([ticker], start=start, interval=interval), interval)
+            except Exception as e:
+                error = str(e)
+                continue
+            if ticker in data and data[ticker].notna().any():
+                return data[[ticker]]
+        failures[ticker] = error
+        return None
+
+    def _fetch_chunk(self, chunk, start, interval, incremental, failures):
+        try:
+            data = naive_dates(self.source.fetch(chunk, start=start, interval=interval, incremental=incremental),
+                               interval)
+            # 📌 Un résultat vide est normal pour la mise à jour de tickers déjà stockés (pas de nouvelle barre),
+            # pas pour un premier téléchargement, quelle que soit la période demandée
+            failed = [] if data.empty and incremental else [
+                t for t in chunk if t not in data or data[t].isna().all()]
+        except Exception as e:
+            print(f"⚠️ Échec de la récupération d'un paquet de {len(chunk)} tickers : {e}")
+            data, failed = pd.DataFrame(), list(chunk)
+
+        # 📌 Nouvelles tentatives isolées : un symbole invalide ne vide pas le reste du paquet
+        frames = [data.drop(columns=[t for t in failed if t in data])]
+        for ticker in failed:
+            frame = self._fetch_ticker(ticker, start, interval, failures)
+            if frame is not None:
+                frames.append(frame)
+        return pd.concat(frames, axis=1)
+
+    def fetch_with_failures(self, tickers, start=None, interval="1d", incremental=False):
+        """
+        Récupère les prix de tous les tickers, paquet par paquet en parallèle.
+
+        Returns:
+            tuple: (prix, une colonne par ticker obtenu ; dict ticker -> dernière erreur des tickers en échec)
+        """
+        failures = {}
+        tickers = list(dict.fromkeys(tickers))
+        chunks = [tickers[i:i + self.chunk_size] for i in range(0, len(tickers), self.chunk_size)]
+        if not chunks:
+            return pd.DataFrame(), failures
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(chunks))) as executor:
+            frames = list(executor.map(lambda chunk: self._fetch_chunk(chunk, start, interval, incremental, failures),
+                                       chunks))
+        frames = [frame for frame in frames if not frame.empty]
+        if failures:
+            print(f"⚠️ Tickers sans données : {sorted(failures)}")
+        return (pd.concat(frames, axis=1).sort_index() if frames else pd.DataFrame()), failures
+
+    def fetch(self, tickers, start=None, interval="1d", incremental=False):
+        """
+        Récupère les prix de tous les tickers (voir `fetch_with_failures`).
+
+        Returns:
+            pd.DataFrame: Prix, une colonne par ticker obtenu.
+        """
+        return self.fetch_with_failures(tickers, start=start, interval=interval, incremental=incremental)[0]
+
+
+def default_source():
+    """
+    Source par défaut : dossier local si `PORTFOLIO_DATA_DIR` est défini (hors-ligne), sinon yfinance,
+    derrière la récupération concurrente par paquets.
+    """
+    directory = os.environ.get(DATA_DIR_ENV)
+    if directory:
+        return ConcurrentFetcher(LocalDirectorySource(directory), retries=0)  # 📌 pas d'erreur passagère en local
+    return ConcurrentFetcher(YahooSource())
@@ -0,0 +1,211 @@
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+from qp_solver import min_variance_qp
+from covariance import FactorCovariance, as_covariance, portfolio_variances
+from shared_arrays import share_array, attach_array, release
+from instrumentation import span
+
+# 📌 Tracé de la frontière efficiente : K rendements cibles entre le portefeuille de variance minimale
+# et le portefeuille de rendement maximal, résolus en chaîne avec démarrage à chaud.
+# Réparti sur un pool de processus, chaque tronçon part de l'ensemble actif du portefeuille de variance minimale
+# et la covariance dense est lue en mémoire partagée.
+
+# 📌 Covariance partagée, ouverte une seule fois par processus du pool
+_SHARED = {}
+
+
+def max_return_weights(mean_returns, lb, ub):
+    """
+    Portefeuille de rendement maximal sous contraintes de bornes (programme linéaire résolu de façon gloutonne).
+
+    Args:
+        mean_returns (np.ndarray): Rendements attendus.
+        lb, ub (np.ndarray): Bornes des poids.
+
+    Returns:
+        np.ndarray: Poids du portefeuille de rendement maximal.
+    """
+    weights = lb.astype(np.float64).copy()
+    remaining = 1.0 - weights.sum()
+    for i in np.argsort(-mean_returns):
+        added = min(ub[i] - weights[i], remaining)
+        weights[i] += added
+        remaining -= added
+        if remaining <= 0:
+            break
+    return weights
+
+
+def max_sharpe_weights(mean_returns, cov_matrix, lb, ub, risk_free_rate=0.0, tol=1e-10, max_iter=60):
+    """
+    Portefeuille de ratio de Sharpe maximal, cherché sur la frontière efficiente avec le moteur QP.
+
+    Le long de la frontière, la variance σ²(t) au rendement cible t a pour dérivée -2·y_t (multiplicateur
+    de la contrainte de rendement) : le ratio de Sharpe croît tant que g(t) = σ²(t) + (t - r_f)·y_t > 0.
+    La racine de g entre le portefeuille de variance minimale et celui de rendement maximal est cherchée par
+    sécante protégée par bissection, chaque QP démarrant à chaud depuis l'ensemble actif précédent.
+
+    Args:
+        mean_returns (np.ndarray): Rendements annualisés.
+        cov_matrix (np.ndarray | FactorCovariance): Covariance annualisée.
+        lb, ub (np.ndarray): Bornes des poids.
+        risk_free_rate (float): Taux sans risque (fraction).
+        tol (float): Tolérance relative sur g et sur l'intervalle de rendements cibles.
+        max_iter (int): Nombre maximal de QP résolus le long de la frontière.
+
+    Returns:
+        QPResult: `x`, `success`, `message`, `nit` (nombre de QP résolus) et `state`.
+    """
+    mu = np.asarray(mean_returns, dtype=np.float64)
+    cov = as_covariance(cov_matrix)
+    low = min_variance_qp(cov, lb, ub)
+    if not low.success:
+        return low
+    t_low, g_low = mu @ low.x, float(low.x @ cov @ low.x)  # 📌 y_t = 0 au minimum de variance
+    top = max_return_weights(mu, lb, ub)
+    t_high = mu @ top
+    if t_high - t_low <= tol * max(1.0, abs(t_high)):
+        return low  # 📌 frontière réduite à un point
+
+    def evaluate(target, w0=None, state=None):
+        result = min_variance_qp(cov, lb, ub, mean_returns=mu, target_return=target, w0=w0, state=state)
+        if not result.success:
+            return result, -np.inf
+        return result, float(result.x @ cov @ result.x) + (target - risk_free_rate) * result.multipliers[1]
+
+    high, g_high = evaluate(t_high, w0=top)  # 📌 seul point réalisable connu à ce rendement : pas de phase 1
+    if g_high >= 0 and high.success:
+        high["nit"] = 2
+        return high  # 📌 le ratio de Sharpe croît jusqu'au portefeuille de rendement maximal
+
+    # 📌 Sécante entre les deux derniers points (g est affine tant que l'ensemble actif ne change pas),
+    # remplacée par une bissection si elle sort de l'intervalle encadrant ou si celui-ci rétrécit mal
+    best, previous, last = low, (t_low, g_low), (t_high, g_high)
+    width, g_scale = t_high - t_low, g_low
+    for iteration in range(3, max_iter + 3):
+        target = 0.5 * (t_low + t_high)
+        if np.isfinite(last[1]) and last[1] != previous[1]:
+            secant = last[0] - last[1] * (last[0] - previous[0]) / (last[1] - previous[1])
+            if t_low < secant < t_high and t_high - t_low <= 0.5 * width:
+                target = secant
+        width = t_high - t_low
+        result, g = evaluate(target, state=best.state)
+        if result.success:
+            best = result
+        if abs(g) <= tol * g_scale or t_high - t_low <= tol * max(1.0, abs(t_high)):
+            break
+        if g > 0:
+            t_low, g_low = target, g
+        else:
+            t_high, g_high = target, g
+        previous, last = last, (target, g)
+    best["nit"] = iteration
+    return best
+
+
+def _trace_chunk(cov, mean_returns, lb, ub, targets, w0=None, state=None):
+    """
+    Résout une suite de rendements cibles, chaque point démarrant depuis la solution de son voisin.
+
+    Returns:
+        tuple: (poids K×N, succès K)
+    """
+    weights = np.full((len(targets), len(mean_returns)), np.nan)
+    success = np.zeros(len(targets), dtype=bool)
+    for k, target in enumerate(targets):
+        result = min_variance_qp(cov, lb, ub, mean_returns=mean_returns, target_return=target, w0=w0, state=state)
+        if result.success:
+            weights[k] = result.x
+            success[k] = True
+            w0, state = result.x, result.state
+    return weights, success
+
+
+def _attach_covariance(descriptor):
+    _SHARED["cov"] = attach_array(descriptor)
+
+
+def _trace_shared_chunk(task):
+    """ `_trace_chunk` dans un processus du pool (covariance dense partagée si elle n'est pas transmise). """
+    cov, mean_returns, lb, ub, targets, state = task
+    return _trace_chunk(_SHARED["cov"][1] if cov is None else cov, mean_returns, lb, ub, targets, state=state)
+
+
+def efficient_frontier(mean_returns, cov_matrix, min_allocation=0.0, max_allocation=1.0,
+                       num_points=50, processes=None):
+    """
+    Trace la frontière efficiente en un seul appel.
+
+    Args:
+        mean_returns (pd.Series | np.ndarray): Rendements annualisés.
+        cov_matrix (pd.DataFrame | np.ndarray | FactorCovariance): Matrice de covariance.
+        min_allocation (float): Allocation minimale par actif (fraction).
+        max_allocation (float): Allocation maximale par actif (fraction).
+        num_points (int): Nombre K de points de la frontière.
+        processes (int): Nombre de processus pour répartir la frontière par tronçons (séquentiel si None) ;
+            utile pour de grands univers, quand un QP coûte plus que le démarrage d'un processus.
+
+    Returns:
+        dict: `returns`, `volatilities` (K), `weights` (K×N), `success` (K) et `tickers`, ou None si infaisable.
+    """
+    tickers = list(getattr(mean_returns, "index", range(len(mean_returns))))
+    mu = np.asarray(mean_returns, dtype=np.float64)
+    cov = as_covariance(cov_matrix)
+    n = len(mu)
+    lb, ub = np.full(n, min_allocation), np.full(n, max_allocation)
+
+    with span("frontier"):
+        # 📌 Extrémités de la frontière : variance minimale et rendement maximal
+        min_var = min_variance_qp(cov, lb, ub)
+        if not min_var.success:
+            print(f"❌ Frontière efficiente impossible : {min_var.message}")
+            return None
+        targets = np.linspace(mu @ min_var.x, mu @ max_return_weights(mu, lb, ub), num_points)
+
+        if processes and processes > 1:
+            chunks = [chunk for chunk in np.array_split(targets, processes) if len(chunk)]
+            segments, descriptor, shared = [], None, cov
+            if not isinstance(cov, FactorCovariance):  # 📌 modèle factoriel : O(N·K), envoyé tel quel
+                shm, descriptor = share_array(np.asarray(cov, dtype=np.float64))
+                segments, shared = [shm], None
+            # 📌 Chaque tronçon démarre depuis l'ensemble actif de la variance minimale, plus proche de la solution
+            # que la devinette à froid
+            tasks = [(shared, mu, lb, ub, chunk, min_var.state) for chunk in chunks]
+            initializer, initargs = (_attach_covariance, (descriptor,)) if descriptor else (None, ())
+            try:
+                with ProcessPoolExecutor(max_workers=len(chunks), initializer=initializer,
+                                         initargs=initargs) as executor:
+                    parts = list(executor.map(_trace_shared_chunk, tasks))
+            finally:
+                release(segments)
+            weights = np.vstack([part[0] for part in parts])
+            success = np.concatenate([part[1] for part in parts])
+        else:
+            weights, success = _trace_chunk(cov, mu, lb, ub, targets, w0=min_var.x, state=min_var.state)
+
+        # 📌 Volatilités de tous les points via une seule factorisation de Cholesky de la covariance
+        # (directement en O(N·K) pour un modèle factoriel)
+        if isinstance(cov, FactorCovariance):
+            volatilities = np.sqrt(portfolio_variances(cov, weights))
+        else:
+            factor = np.linalg.cholesky(cov + 1e-12 * np.mean(np.diag(cov)) * np.eye(n))
+            volatilities = np.linalg.norm(weights @ factor, axis=1)
+
+    return {
+        "returns": weights @ mu,
+        "volatilities": volatilities,
+        "weights": weights,
+        "success": success,
+        "tickers": tickers,
+    }
+
+
+def frontier_to_dict(frontier):
+    """
+    Résumé de la frontière (points résolus, en %) tel qu'affiché par `interface.py`.
+    """
+    return {
+        "returns": frontier["returns"][frontier["success"]] * 100,
+        "volatilities": frontier["volatilities"][frontier["success"]] * 100,
+    }
@@ -0,0 +1,151 @@
+import json
+import time
+import uuid
+import contextvars
+from contextlib import contextmanager
+
+# 📌 Instrumentation légère du pipeline : durées par étape (spans imbriqués) et télémétrie des solveurs,
+# regroupées dans un enregistrement JSON par exécution. Sans enregistrement actif, `span` renvoie un
+# gestionnaire de contexte vide partagé et `record_solver` / `record_fallback` ne font rien.
+
+_current = contextvars.ContextVar("run_record", default=None)
+
+
+class RunRecord:
+    """
+    Enregistrement d'une exécution : spans agrégés par chemin ("optimize/solver"), appels de solveurs
+    et chemins de repli empruntés.
+    """
+
+    def __init__(self, **metadata):
+        self.run_id = uuid.uuid4().hex[:12]
+        self.metadata = metadata
+        self.started_at = time.time()
+        self.spans = {}  # 📌 chemin -> {"count", "total_seconds", "max_seconds"}, dans l'ordre de première apparition
+        self.solvers = []
+        self.fallbacks = []
+        self._stack = []
+
+    def span(self, name):
+        """ Mesure un bloc `with` dans cet enregistrement (sans passer par l'enregistrement actif). """
+        return _Span(self, name)
+
+    def _add_span(self, path, duration):
+        entry = self.spans.setdefault(path, {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+        entry["count"] += 1
+        entry["total_seconds"] += duration
+        entry["max_seconds"] = max(entry["max_seconds"], duration)
+
+    def to_dict(self):
+        return {
+            "run_id": self.run_id,
+            "started_at": self.started_at,
+            "metadata": self.metadata,
+            "spans": self.spans,
+            "solvers": self.solvers,
+            "fallbacks": self.fallbacks,
+        }
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), ensure_ascii=False, default=float)
+
+
+class _Span:
+    __slots__ = ("record", "name", "start")
+
+    def __init__(self, record, name):
+        self.record = record
+        self.name = name
+
+    def __enter__(self):
+        self.record._stack.append(self.name)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        duration = time.perf_counter() - self.start
+        self.record._add_span("/".join(self.record._stack), duration)
+        self.record._stack.pop()
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+@contextmanager
+def recording(record=None, **metadata):
+    """
+    Active un enregistrement pour le bloc `with` (et le thread ou la tâche courante).
+
+    Args:
+        record (RunRecord): Enregistrement à compléter (nouveau si None).
+        **metadata: Métadonnées d'un nouvel enregistrement (empreinte des réponses, identifiant de profil...).
+
+    Returns:
+        RunRecord: Enregistrement actif.
+    """
+    record = record if record is not None else RunRecord(**metadata)
+    token = _current.set(record)
+    try:
+        yield record
+    finally:
+        _current.reset(token)
+
+
+def active_record():
+    """ Enregistrement actif, ou None si l'instrumentation est désactivée. """
+    return _current.get()
+
+
+def span(name):
+    """
+    Mesure la durée d'un bloc `with` dans l'enregistrement actif (aucun effet sinon).
+    """
+    record = _current.get()
+    return _NULL_SPAN if record is None else _Span(record, name)
+
+
+def record_solver(name, result, constraint_violation=None, **details):
+    """
+    Ajoute la télémétrie d'un appel de solveur (itérations, évaluations, violation des contraintes).
+
+    Args:
+        name (str): Solveur ("SLSQP", "QP", ...).
+        result (OptimizeResult | QPResult): Résultat du solveur.
+        constraint_violation (float): Violation maximale des contraintes au point renvoyé.
+        **details: Informations complémentaires (méthode, tentative...).
+    """
+    record = _current.get()
+    if record is None:
+        return
+    entry = {
+        "solver": name,
+        "success": bool(result.success),
+        "message": str(result.message),
+        "nit": int(getattr(result, "nit", 0) or 0),
+        "nfev": getattr(result, "nfev", None),
+        "njev": getattr(result, "njev", None),
+        "constraint_violation": constraint_violation,
+    }
+    entry.update(details)
+    record.solvers.append(entry)
+
+
+def record_fallback(name, **details):
+    """
+    Signale un chemin de repli emprunté (rendement cible ajusté, bornes relâchées, phase 1 du QP...).
+    """
+    record = _current.get()
+    if record is None:
+        return
+    record.fallbacks.append({"name": name, "stage": "/".join(record._stack), **details})
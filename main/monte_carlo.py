@@ -0,0 +1,127 @@
+import numpy as np
+import pandas as pd
+
+from covariance import FactorCovariance, as_covariance, portfolio_variances
+
+# 📌 Simulation Monte Carlo de portefeuilles aléatoires par blocs de taille fixe :
+# la mémoire reste bornée par `chunk_size × N` quel que soit le nombre de tirages,
+# et seuls un résumé statistique et les k meilleurs portefeuilles sont renvoyés.
+
+
+def sample_weights(rng, n_samples, lb, ub, dtype=np.float64):
+    """
+    Tire des poids aléatoires réalisables : somme = 1 et lb <= w <= ub.
+
+    Un tirage de Dirichlet est placé au-dessus des bornes basses, puis l'excédent au-delà des bornes
+    hautes est redistribué proportionnellement à la marge restante de chaque actif (une seule passe).
+
+    Args:
+        rng (np.random.Generator): Générateur aléatoire.
+        n_samples (int): Nombre de portefeuilles.
+        lb, ub (np.ndarray): Bornes des poids.
+        dtype: np.float64 ou np.float32.
+
+    Returns:
+        np.ndarray: Poids (n_samples × N).
+    """
+    lb = lb.astype(dtype)
+    ub = ub.astype(dtype)
+    draws = rng.standard_exponential((n_samples, len(lb)), dtype=dtype)
+    weights = lb + (1 - lb.sum()) * draws / draws.sum(axis=1, keepdims=True)
+
+    capped = np.minimum(weights, ub)
+    excess = (weights - capped).sum(axis=1, keepdims=True)
+    headroom = ub - capped
+    return capped + excess * headroom / headroom.sum(axis=1, keepdims=True)
+
+
+class _RunningSummary:
+    """ Moyenne, écart-type, minimum et maximum cumulés, bloc par bloc. """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.minimum = np.inf
+        self.maximum = -np.inf
+
+    def update(self, values):
+        values = values.astype(np.float64)
+        self.count += len(values)
+        self.total += values.sum()
+        self.total_sq += (values ** 2).sum()
+        self.minimum = min(self.minimum, values.min())
+        self.maximum = max(self.maximum, values.max())
+
+    def to_dict(self):
+        mean = self.total / self.count
+        return {
+            "mean": mean,
+            "std": np.sqrt(max(self.total_sq / self.count - mean ** 2, 0.0)),
+            "min": self.minimum,
+            "max": self.maximum,
+        }
+
+
+def simulate_portfolios(mean_returns, cov_matrix, n_samples=1_000_000, min_allocation=0.0, max_allocation=1.0,
+                        risk_free_rate=0.0, chunk_size=100_000, top_k=10, dtype=np.float64, seed=None):
+    """
+    Évalue rendement, volatilité et ratio de Sharpe de portefeuilles aléatoires, par blocs.
+
+    Args:
+        mean_returns (pd.Series): Rendements annualisés.
+        cov_matrix (pd.DataFrame | np.ndarray | FactorCovariance): Covariance.
+        n_samples (int): Nombre total de portefeuilles tirés.
+        min_allocation, max_allocation (float): Bornes d'allocation (fractions).
+        risk_free_rate (float): Taux sans risque (fraction).
+        chunk_size (int): Nombre de portefeuilles évalués par bloc (borne la mémoire).
+        top_k (int): Nombre de meilleurs portefeuilles (ratio de Sharpe) conservés.
+        dtype: np.float64 ou np.float32 (moitié moins de mémoire et de bande passante).
+        seed (int): Graine du générateur aléatoire.
+
+    Returns:
+        dict: `n_samples`, `summary` (moyenne, écart-type, min, max par indicateur) et `top`
+        (DataFrame des k meilleurs portefeuilles avec leurs indicateurs).
+    """
+    tickers = list(getattr(mean_returns, "index", range(len(mean_returns))))
+    n_assets = len(tickers)
+    lb, ub = np.full(n_assets, min_allocation), np.full(n_assets, max_allocation)
+    if lb.sum() > 1 or ub.sum() < 1:
+        raise ValueError("Bornes d'allocation incompatibles avec une somme des poids égale à 1.")
+
+    rng = np.random.default_rng(seed)
+    mu = np.asarray(mean_returns, dtype=dtype)
+    cov = as_covariance(cov_matrix)
+    if not isinstance(cov, FactorCovariance):
+        cov = cov.astype(dtype)
+
+    summaries = {name: _RunningSummary() for name in ("return", "volatility", "sharpe")}
+    top_weights = np.empty((0, n_assets), dtype=dtype)
+    top_metrics = np.empty((0, 3))
+
+    for start in range(0, n_samples, chunk_size):
+        size = min(chunk_size, n_samples - start)
+        weights = sample_weights(rng, size, lb, ub, dtype)
+        returns = weights @ mu
+        volatilities = np.sqrt(np.maximum(portfolio_variances(cov, weights), 0))
+        sharpe = (returns - risk_free_rate) / volatilities
+
+        for name, values in zip(("return", "volatility", "sharpe"), (returns, volatilities, sharpe)):
+            summaries[name].update(values)
+
+        # 📌 Fusion du bloc avec les k meilleurs portefeuilles déjà vus
+        best = np.argpartition(-sharpe, min(top_k, size) - 1)[:top_k]
+        top_weights = np.vstack([top_weights, weights[best]])
+        top_metrics = np.vstack([top_metrics, np.column_stack([returns[best], volatilities[best], sharpe[best]])])
+        keep = np.argsort(-top_metrics[:, 2])[:top_k]
+        top_weights, top_metrics = top_weights[keep], top_metrics[keep]
+
+    top = pd.DataFrame(top_weights.astype(np.float64), columns=tickers)
+    top["expected_return"] = top_metrics[:, 0]
+    top["expected_volatility"] = top_metrics[:, 1]
+    top["sharpe_ratio"] = top_metrics[:, 2]
+    return {
+        "n_samples": n_samples,
+        "summary": {name: summary.to_dict() for name, summary in summaries.items()},
+        "top": top,
+    }
@@ -0,0 +1,55 @@
+import numpy as np
+
+# 📌 Fonctions objectifs et contraintes de l'optimisation, avec leurs gradients analytiques.
+# Fournir `jac` à SLSQP évite N évaluations supplémentaires par itération (différences finies).
+
+
+def portfolio_volatility(weights, cov_matrix):
+    """ Volatilité du portefeuille : sqrt(w' Σ w) """
+    return np.sqrt(weights @ cov_matrix @ weights)
+
+
+def min_volatility(weights, cov_matrix):
+    """ Fonction à minimiser pour minimiser la volatilité """
+    return portfolio_volatility(weights, cov_matrix)
+
+
+def min_volatility_grad(weights, cov_matrix):
+    """ Gradient de la volatilité : Σw / σ """
+    cov_w = cov_matrix @ weights
+    return cov_w / np.sqrt(weights @ cov_w)
+
+
+def neg_sharpe_ratio(weights, mean_returns, cov_matrix, risk_free_rate):
+    """ Fonction à minimiser pour maximiser le ratio de Sharpe """
+    port_return = weights @ mean_returns
+    port_volatility = portfolio_volatility(weights, cov_matrix)
+    return - (port_return - risk_free_rate) / port_volatility
+
+
+def neg_sharpe_ratio_grad(weights, mean_returns, cov_matrix, risk_free_rate):
+    """ Gradient de -Sharpe : -μ/σ + (μ'w - r_f) Σw / σ³ """
+    cov_w = cov_matrix @ weights
+    port_volatility = np.sqrt(weights @ cov_w)
+    excess_return = weights @ mean_returns - risk_free_rate
+    return -mean_returns / port_volatility + excess_return * cov_w / port_volatility ** 3
+
+
+def sum_to_one_constraint(weights):
+    """ Contrainte : somme des poids = 1 """
+    return np.sum(weights) - 1
+
+
+def sum_to_one_jac(weights):
+    """ Jacobien de la contrainte de somme des poids """
+    return np.ones_like(weights)
+
+
+def target_return_constraint(weights, mean_returns, target_return):
+    """ Contrainte : atteindre un rendement cible """
+    return weights @ mean_returns - target_return
+
+
+def target_return_jac(weights, mean_returns, target_return):
+    """ Jacobien de la contrainte de rendement cible """
+    return np.asarray(mean_returns, dtype=np.float64)
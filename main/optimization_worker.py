@@ -0,0 +1,410 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+
+import numpy as np
+
+from price_store import PriceStore
+from statistics import download_data, calculate_returns, calculate_statistics, resample_returns
+from portfolio_optimizer import PortfolioConstraints, optimize
+from frontier import efficient_frontier, frontier_to_dict
+from qp_solver import project_capped_simplex
+from backtest import backtest
+from instrumentation import recording, span
+
+# 📌 Travailleur d'optimisation persistant, partagé entre les sessions Streamlit :
+# les bibliothèques restent chargées, les statistiques par ensemble de tickers restent en mémoire
+# et les résultats sont mis en cache par empreinte des réponses. Quand seuls les paramètres changent,
+# l'optimisation repart de la solution précédente (ré-optimisation incrémentale).
+
+# 📌 Réponses dont dépend la solution de chaque méthode (les autres changements la laissent inchangée)
+SOLVE_INPUTS = {
+    "Maximisation du ratio de Sharpe": ("min_allocation", "max_allocation", "risk_free_rate", "solver"),
+    "Minimisation de la volatilité": ("min_allocation", "max_allocation", "solver", "max_candidates"),
+    "Optimisation pour un rendement cible": ("min_allocation", "max_allocation", "target_return", "solver",
+                                             "max_candidates"),
+    "Minimisation de la volatilité à K actifs": ("min_allocation", "max_allocation", "target_return", "max_assets",
+                                                 "search_time", "solver"),
+    "Minimisation de la CVaR": ("min_allocation", "max_allocation", "target_return", "cvar_level"),
+    "Parité de risque hiérarchique (HRP)": ("min_allocation", "max_allocation"),
+    "Contribution égale au risque (ERC)": ("min_allocation", "max_allocation"),
+    "Maximisation du ratio de Sharpe ré-échantillonnée": ("min_allocation", "max_allocation", "risk_free_rate",
+                                                          "n_resamples", "resampling"),
+}
+
+# 📌 Méthodes sans démarrage à chaud (programme linéaire, algorithmes de parité de risque)
+COLD_START_METHODS = ("Minimisation de la CVaR", "Parité de risque hiérarchique (HRP)",
+                      "Contribution égale au risque (ERC)", "Maximisation du ratio de Sharpe ré-échantillonnée")
+
+
+def canonical_answers(answers):
+    """
+    Réponses qui influencent l'optimisation, sous forme normalisée (le budget n'en fait pas partie :
+    il ne change que les montants investis).
+
+    Args:
+        answers (dict): Réponses du questionnaire.
+
+    Returns:
+        dict: Tickers triés, bornes, taux sans risque, méthode, rendement cible, nombre maximal d'actifs,
+        budget de temps, niveau de la CVaR, nombre et type de tirages, nombre de candidats de la
+        pré-sélection, solveur et nombre de points de la frontière efficiente.
+    """
+    return {
+        "tickers": sorted({ticker.strip() for ticker in answers["tickers"]}),
+        "min_allocation": float(answers["min_allocation"]),
+        "max_allocation": float(answers["max_allocation"]),
+        "risk_free_rate": float(answers["risk_free_rate"]),
+        "optimization_method": answers["optimization_method"],
+        "target_return": float(answers["target_return"]) if answers.get("target_return") is not None else None,
+        "max_assets": int(answers["max_assets"]) if answers.get("max_assets") is not None else None,
+        "search_time": float(answers.get("search_time", 1.0)),
+        "cvar_level": float(answers.get("cvar_level", 95)),
+        "n_resamples": int(answers.get("n_resamples", 1000)),
+        "resampling": answers.get("resampling", "bootstrap"),
+        "max_candidates": int(answers["max_candidates"]) if answers.get("max_candidates") is not None else None,
+        "solver": answers.get("solver", "QP"),
+        "frontier_points": int(answers.get("frontier_points", 30)),
+    }
+
+
+def answers_key(answers):
+    """
+    Empreinte canonique des réponses qui influencent l'optimisation.
+
+    Args:
+        answers (dict): Réponses du questionnaire.
+
+    Returns:
+        str: Empreinte SHA-256 hexadécimale.
+    """
+    payload = json.dumps(canonical_answers(answers), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def changed_inputs(previous, current):
+    """
+    Noms des réponses canoniques qui diffèrent entre deux soumissions.
+    """
+    return sorted(key for key in current if previous.get(key) != current[key])
+
+
+class ResultCache:
+    """
+    Cache LRU à durée de vie limitée (TTL), utilisable depuis plusieurs threads.
+    """
+
+    def __init__(self, max_size=128, ttl=3600):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()  # 📌 clé -> (horodatage, valeur), du plus ancien au plus récent
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """ Renvoie la valeur en cache, ou None si elle est absente ou expirée. """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        """ Ajoute une valeur et évince les entrées les moins récemment utilisées. """
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class Reoptimizer:
+    """
+    Ré-optimisation incrémentale par ensemble de tickers.
+
+    La dernière solution de chaque ensemble de tickers est conservée avec les statistiques qui l'ont produite.
+    Si seules des réponses sans effet sur la méthode changent (mêmes statistiques), la solution est reprise
+    telle quelle ; sinon l'optimisation démarre à chaud depuis l'ensemble actif (moteur QP) ou les poids
+    (SLSQP) précédents. La frontière efficiente, qui ne dépend que des bornes, est reprise tant que
+    les bornes et les statistiques sont inchangées.
+    """
+
+    def __init__(self, max_size=32, ttl=3600):
+        self.solutions = ResultCache(max_size, ttl)  # 📌 tickers -> (statistiques, réponses canoniques, résultat)
+        self.frontiers = ResultCache(max_size, ttl)  # 📌 (tickers, bornes, points) -> (statistiques, frontière)
+
+    def _warm_start(self, previous, method, solver, constraints):
+        """ Point de départ (poids, ensemble actif) tiré de la solution précédente. """
+        weights = np.asarray(previous.weights, dtype=np.float64)
+        if not np.all(np.isfinite(weights)) or method in COLD_START_METHODS:
+            return None, None  # 📌 HiGHS, HRP, ERC et tirages ré-échantillonnés repartent de zéro
+        if method == "Minimisation de la volatilité à K actifs":
+            # 📌 Recherche par échanges : les lignes précédentes (quelle que soit la méthode)
+            # ouvrent le classement
+            return weights, None
+        if method == "Maximisation du ratio de Sharpe" or solver == "SLSQP":
+            # 📌 SLSQP : poids précédents ramenés dans les nouvelles bornes
+            n = len(weights)
+            return project_capped_simplex(weights, np.full(n, constraints.min_allocation),
+                                          np.full(n, constraints.max_allocation)), None
+        if previous.state is not None:
+            # 📌 Moteur QP : l'ensemble actif précédent suffit (les poids ne sont plus réalisables si les bornes
+            # ou le rendement cible ont bougé) ; une ou deux itérations le corrigent
+            return None, previous.state
+        return weights, None  # 📌 solution SLSQP : ignorée par le moteur QP si elle n'est pas réalisable
+
+    def solve(self, stats, canonical, answers):
+        """
+        Optimise en repartant, si possible, de la dernière solution pour les mêmes tickers.
+
+        Args:
+            stats (dict): Statistiques des tickers.
+            canonical (dict): Réponses canoniques (`canonical_answers`).
+            answers (dict): Réponses du questionnaire.
+
+        Returns:
+            tuple: (OptimizationResult, dict {"mode": "cold" | "warm" | "reused", "changed": réponses modifiées})
+        """
+        tickers = tuple(canonical["tickers"])
+        method, solver = canonical["optimization_method"], canonical["solver"]
+        constraints = PortfolioConstraints.from_preferences(answers)
+        previous = self.solutions.get(tickers)
+
+        info = {"mode": "cold", "changed": None}
+        result = None
+        if previous is not None:
+            previous_stats, previous_canonical, previous_result = previous
+            changed = changed_inputs(previous_canonical, canonical)
+            info["changed"] = changed
+            if (previous_stats is stats and previous_canonical["optimization_method"] == method
+                    and not set(changed) & set(SOLVE_INPUTS[method]) and previous_result.success):
+                result, info["mode"] = previous_result, "reused"
+            else:
+                initial_weights, state = self._warm_start(previous_result, method, solver, constraints)
+                if initial_weights is not None or state is not None:
+                    info["mode"] = "warm"
+                with span("reoptimize"):
+                    result = optimize(stats, constraints, method, solver=solver, initial_weights=initial_weights,
+                                      state=state, verbose=False)
+        if result is None:
+            result = optimize(stats, constraints, method, solver=solver, verbose=False)
+        if result.success:
+            self.solutions.put(tickers, (stats, canonical, result))
+        return result, info
+
+    def frontier(self, stats, tickers, constraints, num_points=30):
+        """
+        Frontière efficiente, reprise si les bornes et les statistiques n'ont pas changé.
+        """
+        key = (tuple(tickers), constraints.min_allocation, constraints.max_allocation, num_points)
+        cached = self.frontiers.get(key)
+        if cached is not None and cached[0] is stats:
+            return cached[1]
+        frontier = efficient_frontier(stats["annualized_returns"], stats["covariance_matrix"],
+                                      constraints.min_allocation, constraints.max_allocation, num_points=num_points)
+        self.frontiers.put(key, (stats, frontier))
+        return frontier
+
+
+class OptimizationWorker:
+    """
+    Exécute les optimisations dans le processus courant, sur un pool de threads.
+
+    Deux soumissions identiques simultanées partagent le même calcul. Avec `telemetry=True`, chaque calcul
+    produit un enregistrement d'instrumentation (durées par étape, télémétrie des solveurs). Avec un
+    `result_store`, chaque calcul est ajouté à l'historique des résultats. Avec `incremental=True`, une
+    soumission qui ne change que des paramètres repart de la solution précédente (voir `Reoptimizer`).
+    """
+
+    def __init__(self, store=None, max_workers=2, cache_size=128, ttl=3600, telemetry=False, result_store=None,
+                 incremental=True):
+        self.store = store if store is not None else PriceStore()
+        self.telemetry = telemetry
+        self.result_store = result_store
+        self.reoptimizer = Reoptimizer(ttl=ttl) if incremental else None
+        self.results = ResultCache(cache_size, ttl)
+        self.statistics = ResultCache(32, ttl)  # 📌 statistiques par ensemble de tickers
+        self.backtests = ResultCache(32, ttl)  # 📌 backtests par réponses, méthode, fréquence et dernière date
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def get_statistics(self, tickers, frequency="daily"):
+        """
+        Statistiques des tickers, servies depuis le cache si elles sont encore valides.
+
+        Args:
+            tickers (list): Liste des tickers.
+            frequency (str): "daily", "weekly" ou "monthly" ; les fréquences autres que journalière sont
+                rééchantillonnées depuis le panel journalier en cache, sans nouveau téléchargement.
+
+        Returns:
+            StatisticsResult | None: Statistiques de `calculate_statistics`.
+        """
+        key = tuple(sorted(tickers))
+        stats = self.statistics.get((key, frequency))
+        if stats is not None:
+            return stats
+        if frequency != "daily":
+            daily = self.get_statistics(key)
+            if daily is None:
+                return None
+            stats = calculate_statistics(resample_returns(daily["returns"], frequency), covariance="pairwise",
+                                         frequency=frequency)
+        else:
+            data = download_data(list(key), store=self.store, dropna=False)
+            if data is None or data.empty:
+                return None
+            # 📌 historique complet de chaque ticker (un ticker récent ne tronque pas les autres)
+            stats = calculate_statistics(calculate_returns(data, dropna=False), covariance="pairwise")
+        self.statistics.put((key, frequency), stats)
+        return stats
+
+    def _compute(self, key, answers):
+        with recording(answers_hash=key) if self.telemetry else nullcontext() as record:
+            stats = self.get_statistics(answers["tickers"])
+            if stats is None:
+                raise ValueError("Échec de la récupération des données.")
+
+            constraints = PortfolioConstraints.from_preferences(answers)
+            num_points = answers.get("frontier_points", 30)
+            reoptimization = None
+            if self.reoptimizer is not None:
+                canonical = canonical_answers(answers)
+                result, reoptimization = self.reoptimizer.solve(stats, canonical, answers)
+            else:
+                result = optimize(stats, constraints, answers["optimization_method"],
+                                  solver=answers.get("solver", "QP"), verbose=False)
+            if not result.success:
+                raise ValueError(f"Échec de l'optimisation : {result.message}")
+
+            if self.reoptimizer is not None:
+                frontier = self.reoptimizer.frontier(stats, canonical["tickers"], constraints, num_points)
+            else:
+                frontier = efficient_frontier(stats["annualized_returns"], stats["covariance_matrix"],
+                                              constraints.min_allocation, constraints.max_allocation,
+                                              num_points=num_points)
+            if record is not None:
+                record.metadata["reoptimization"] = reoptimization
+        telemetry = record.to_dict() if record is not None else None
+
+        run_id = None
+        if self.result_store is not None:
+            run_id = self.result_store.save(result, answers, stats=stats, frontier=frontier, telemetry=telemetry,
+                                            answers_hash=key)
+        return result, frontier, telemetry, run_id, reoptimization
+
+    def _run_and_cache(self, key, answers):
+        try:
+            value = self._compute(key, answers)
+            self.results.put(key, value)
+            return value
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def submit(self, answers):
+        """
+        Soumet une optimisation ; les soumissions identiques en cours sont regroupées.
+
+        Returns:
+            tuple: (clé des réponses, Future de (OptimizationResult, frontière, télémétrie, run_id, mode))
+        """
+        key = answers_key(answers)
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is None:
+                future = self._executor.submit(self._run_and_cache, key, answers)
+                self._in_flight[key] = future
+        return key, future
+
+    def run(self, answers, timeout=None):
+        """
+        Optimise le portefeuille décrit par les réponses (réponse immédiate si déjà en cache).
+
+        Args:
+            answers (dict): Réponses du questionnaire.
+            timeout (float): Temps d'attente maximal en secondes.
+
+        Returns:
+            dict: Résultats au format de `OptimizationResult.to_dict` (avec la frontière efficiente,
+            l'enregistrement `telemetry` du calcul si l'instrumentation est active et le `run_id`
+            de l'exécution enregistrée dans l'historique, et le mode de `reoptimization` employé).
+        """
+        cached = self.results.get(answers_key(answers))
+        if cached is None:
+            _, future = self.submit(answers)
+            cached = future.result(timeout=timeout)
+
+        result, frontier, telemetry, run_id, reoptimization = cached
+        optimized_results = result.to_dict(answers["budget"])
+        if frontier is not None:
+            optimized_results["frontier"] = frontier_to_dict(frontier)
+        if telemetry is not None:
+            optimized_results["telemetry"] = telemetry
+        if run_id is not None:
+            optimized_results["run_id"] = run_id
+        if reoptimization is not None:
+            optimized_results["reoptimization"] = reoptimization
+        return optimized_results
+
+    def _backtest_and_cache(self, key, answers, prices, method, rebalance_frequency):
+        try:
+            history = backtest(prices, PortfolioConstraints.from_preferences(answers), method, rebalance_frequency,
+                               solver=answers.get("solver", "QP"))
+            self.backtests.put(key, history)
+            return history
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def backtest(self, answers, prices, rebalance_frequency=None, method=None, timeout=None):
+        """
+        Backtest glissant des réponses (voir `backtest.backtest`), calculé sur le pool du travailleur.
+
+        Le résultat est mis en cache par empreinte des réponses, méthode, fréquence de rebalancement et
+        dernière date des prix : une nouvelle soumission des mêmes réponses ne relance pas les
+        ré-optimisations, et deux soumissions simultanées partagent le même calcul.
+
+        Args:
+            answers (dict): Réponses du questionnaire.
+            prices (pd.DataFrame): Prix ajustés des tickers.
+            rebalance_frequency (str): Fréquence de rebalancement (celle des réponses si None).
+            method (str): Méthode d'optimisation (celle des réponses si None).
+            timeout (float): Temps d'attente maximal en secondes.
+
+        Returns:
+            dict: Résultat de `backtest.backtest`.
+        """
+        rebalance_frequency = rebalance_frequency or answers.get("rebalance_frequency", "Mensuel")
+        method = method or answers["optimization_method"]
+        key = ("backtest", answers_key(answers), method, rebalance_frequency,
+               prices.index[-1] if len(prices) else None)
+        history = self.backtests.get(key)
+        if history is not None:
+            return history
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is None:
+                future = self._executor.submit(self._backtest_and_cache, key, answers, prices, method,
+                                               rebalance_frequency)
+                self._in_flight[key] = future
+        return future.result(timeout=timeout)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,152 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+
+from price_store import PriceStore
+from instrumentation import span
+
+# 📌 Statistiques hors mémoire pour les historiques longs ou intrajournaliers :
+# - les rendements sont écrits dans un fichier `.npy` (ordre colonne, float32 par défaut), groupe de tickers
+#   par groupe de tickers, sans construire le panel complet ;
+# - la covariance est accumulée par blocs de lignes lus en mémoire projetée : moyenne et co-moments centrés
+#   de chaque bloc, fusionnés en float64 (formule de Chan). La mémoire de pointe dépend de N et de la taille
+#   des blocs, pas de T.
+
+SCHEMA_VERSION = 1
+
+# 📌 Taille par défaut d'un bloc de lignes converti en float64 (octets)
+BLOCK_BYTES = 32 * 2 ** 20
+
+
+def _meta_path(path):
+    return f"{os.path.splitext(path)[0]}.json"
+
+
+def write_returns(tickers, path, store=None, period="5y", interval="1d", dtype=np.float32, tickers_per_chunk=64):
+    """
+    Écrit les rendements des tickers dans un fichier `.npy` projetable, avec leurs métadonnées (`.json`).
+
+    Même alignement que `download_data` puis `calculate_returns` : tickers sans données écartés, dates
+    communes à tous les tickers, première barre retirée. Les prix sont relus par groupes de
+    `tickers_per_chunk` tickers (deux passes : dates communes, puis rendements).
+
+    Args:
+        tickers (list): Liste des tickers.
+        path (str): Fichier `.npy` de destination.
+        store (PriceStore): Stockage des prix (stockage par défaut si None).
+        period (str): Période d'historique ("1y", "5y", "max").
+        interval (str): Intervalle des données ("1d", "1wk", ...).
+        dtype (np.dtype): Type des rendements stockés (float32 : moitié moins de lectures disque).
+        tickers_per_chunk (int): Nombre de tickers relus à la fois.
+
+    Returns:
+        list: Tickers écrits (ordre des colonnes).
+    """
+    store = store if store is not None else PriceStore()
+    chunks = [tickers[i:i + tickers_per_chunk] for i in range(0, len(tickers), tickers_per_chunk)]
+
+    # 📌 1re passe : dates où tous les tickers disponibles ont un prix
+    kept, common = [], None
+    with span("download"):
+        for chunk in chunks:
+            prices = store.get_prices(chunk, period=period, interval=interval)
+            prices = prices[[ticker for ticker in chunk if ticker in prices and prices[ticker].notna().any()]]
+            kept += list(prices.columns)
+            dates = prices.dropna().index
+            common = dates if common is None else common.intersection(dates)
+    missing = [ticker for ticker in tickers if ticker not in kept]
+    if missing:
+        print(f"⚠️ Aucune donnée pour : {missing}. Tickers ignorés.")
+    if not kept or common is None or len(common) < 2:
+        raise ValueError("Pas assez de dates communes pour calculer des rendements")
+
+    # 📌 2e passe : rendements groupe par groupe, écrits en colonnes contiguës (ordre Fortran)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    returns = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=(len(common) - 1, len(kept)),
+                                        fortran_order=True)
+    with span("returns"):
+        column = 0
+        for start in range(0, len(kept), tickers_per_chunk):
+            chunk = kept[start:start + tickers_per_chunk]
+            prices = store.get_prices(chunk, period=period, interval=interval)[chunk].reindex(common)
+            returns[:, column:column + len(chunk)] = prices.pct_change().to_numpy()[1:]
+            column += len(chunk)
+    returns.flush()
+    del returns
+
+    meta = {
+        "schema_version": SCHEMA_VERSION,
+        "tickers": kept,
+        "start": common[1].isoformat(),
+        "end": common[-1].isoformat(),
+        "interval": interval,
+    }
+    with open(_meta_path(path), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2, ensure_ascii=False)
+    return kept
+
+
+def open_returns(path):
+    """
+    Ouvre un fichier de rendements en mémoire projetée (lecture seule).
+
+    Returns:
+        tuple: (np.memmap T×N, liste des tickers)
+    """
+    with open(_meta_path(path), encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("schema_version") != SCHEMA_VERSION:
+        raise ValueError(f"Version de fichier de rendements non prise en charge : {meta.get('schema_version')}")
+    return np.load(path, mmap_mode="r"), meta["tickers"]
+
+
+def streaming_statistics(path, block_rows=None, periods=252):
+    """
+    Statistiques de `calculate_statistics` (covariance empirique) calculées par blocs de lignes.
+
+    Chaque bloc est converti en float64 et centré sur sa propre moyenne ; le produit croisé est calculé
+    dans le type du fichier (float32 : produit BLAS simple précision) puis accumulé en float64.
+
+    Args:
+        path (str): Fichier `.npy` écrit par `write_returns`.
+        block_rows (int): Nombre de lignes par bloc (déduit de `BLOCK_BYTES` si None).
+        periods (int): Nombre de barres par an pour l'annualisation.
+
+    Returns:
+        dict: Mêmes clés que `calculate_statistics` ; "returns" est le tableau projeté (non chargé).
+    """
+    returns, tickers = open_returns(path)
+    n_rows, n_assets = returns.shape
+    if n_rows < 2:
+        raise ValueError("Au moins deux lignes de rendements sont nécessaires")
+    block_rows = block_rows or max(1, BLOCK_BYTES // (8 * n_assets))
+
+    with span("covariance"):
+        count, mean = 0, np.zeros(n_assets)
+        comoment = np.zeros((n_assets, n_assets))  # 📌 somme des produits croisés centrés
+        for start in range(0, n_rows, block_rows):
+            block = returns[start:start + block_rows].astype(np.float64)  # 📌 copie modifiable
+            rows = len(block)
+            block_mean = block.mean(axis=0)
+            block -= block_mean
+            centered = block.astype(returns.dtype, copy=False)
+            comoment += centered.T @ centered
+            # 📌 Fusion avec les blocs précédents (Chan et al.)
+            delta = block_mean - mean
+            total = count + rows
+            comoment += np.outer(delta, delta) * (count * rows / total)
+            mean += delta * (rows / total)
+            count = total
+
+    cov = comoment / (count - 1)
+    volatility = pd.Series(np.sqrt(np.diag(cov)), index=tickers)
+    mean_returns = pd.Series(mean, index=tickers)
+    return {
+        "mean_returns": mean_returns,
+        "annualized_returns": mean_returns * periods,
+        "volatility": volatility,
+        "annualized_volatility": volatility * periods ** 0.5,
+        "covariance_matrix": pd.DataFrame(cov, index=tickers, columns=tickers),
+        "returns": returns,
+    }
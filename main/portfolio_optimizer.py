@@ -1,162 +1,397 @@
-import os
-import pickle
 import numpy as np
-import scipy.optimize as sco
 import sys
+from dataclasses import dataclass, field
+
+from objectives import (min_volatility, min_volatility_grad, neg_sharpe_ratio, neg_sharpe_ratio_grad,
+                        sum_to_one_constraint, sum_to_one_jac, target_return_constraint, target_return_jac)
+from qp_solver import min_variance_qp
+from cardinality import cardinality_min_variance
+from risk import min_cvar_weights
+from risk_parity import hrp_weights, erc_weights
+from resampling import resampled_weights
+from screening import screen_universe, screened_min_variance
+from frontier import efficient_frontier, frontier_to_dict
+from covariance import as_covariance
+from instrumentation import active_record, span, record_solver, record_fallback
+
+# 📌 Méthodes d'optimisation proposées dans `interface.py`
+OPTIMIZATION_METHODS = (
+    "Maximisation du ratio de Sharpe",
+    "Minimisation de la volatilité",
+    "Optimisation pour un rendement cible",
+    "Minimisation de la volatilité à K actifs",
+    "Minimisation de la CVaR",
+    "Parité de risque hiérarchique (HRP)",
+    "Contribution égale au risque (ERC)",
+    "Maximisation du ratio de Sharpe ré-échantillonnée",
+)
+
+# 📌 Méthodes qui acceptent la pré-sélection de l'univers (`PortfolioConstraints.max_candidates`)
+SCREENED_METHODS = ("Minimisation de la volatilité", "Optimisation pour un rendement cible")
+
+
+@dataclass
+class PortfolioConstraints:
+    """
+    Contraintes d'optimisation, exprimées en fractions (0.05 = 5 %).
+    """
+    min_allocation: float = 0.0
+    max_allocation: float = 1.0
+    risk_free_rate: float = 0.0
+    target_return: float = None
+    max_assets: int = None  # 📌 nombre maximal de lignes (méthode à K actifs)
+    search_time: float = 1.0  # 📌 budget de temps (s) de la méthode à K actifs : compromis durée / qualité
+    cvar_level: float = 0.95  # 📌 niveau de confiance de la CVaR minimisée
+    n_resamples: int = 1000  # 📌 nombre de tirages de la méthode ré-échantillonnée
+    resampling: str = "bootstrap"  # 📌 "bootstrap" (jours historiques) ou "parametric" (tirages gaussiens)
+    max_candidates: int = None  # 📌 pré-sélection : nombre d'actifs optimisés par le QP (univers complet si None)
+    processes: int = None  # 📌 processus de la méthode ré-échantillonnée (1 : sans pool ; défaut borné si None)
+
+    @classmethod
+    def from_preferences(cls, preferences):
+        """
+        Construit les contraintes à partir des réponses du questionnaire (exprimées en %).
+        """
+        target_return = preferences.get("target_return")
+        max_assets = preferences.get("max_assets")
+        max_candidates = preferences.get("max_candidates")
+        processes = preferences.get("processes")
+        return cls(
+            min_allocation=preferences["min_allocation"] / 100,
+            max_allocation=preferences["max_allocation"] / 100,
+            risk_free_rate=preferences["risk_free_rate"] / 100,
+            target_return=target_return / 100 if target_return is not None else None,
+            max_assets=int(max_assets) if max_assets is not None else None,
+            search_time=float(preferences.get("search_time", 1.0)),
+            cvar_level=float(preferences.get("cvar_level", 95)) / 100,
+            n_resamples=int(preferences.get("n_resamples", 1000)),
+            resampling=preferences.get("resampling", "bootstrap"),
+            max_candidates=int(max_candidates) if max_candidates is not None else None,
+            processes=int(processes) if processes is not None else None,
+        )
+
+
+@dataclass
+class OptimizationResult:
+    """
+    Résultat d'une optimisation de portefeuille.
+    """
+    tickers: list
+    weights: np.ndarray
+    expected_return: float
+    expected_volatility: float
+    success: bool
+    message: str
+    method: str
+    solver: str
+    nit: int = 0
+    state: np.ndarray = field(default=None, repr=False)  # 📌 Ensemble actif final (démarrage à chaud)
+    dispersion: np.ndarray = field(default=None, repr=False)  # 📌 Écart-type des poids entre tirages
+
+    def to_dict(self, budget):
+        """
+        Convertit le résultat au format des résultats affichés par `interface.py` (valeurs en %).
+        """
+        investment_amounts = self.weights * budget
+        results = {
+            "expected_return": self.expected_return * 100,
+            "expected_volatility": self.expected_volatility * 100,
+            "weights": {asset: weight * 100 for asset, weight in zip(self.tickers, self.weights)},
+            "investment_amounts": {asset: amount for asset, amount in zip(self.tickers, investment_amounts)},
+        }
+        if self.dispersion is not None:
+            results["weights_dispersion"] = {asset: std * 100 for asset, std in zip(self.tickers, self.dispersion)}
+        return results
 
-# 📌 Importer les statistiques calculées (rendements, volatilité, covariance)
-from statistics import analyze_portfolio
-
-# 📌 Définir le chemin du fichier contenant les réponses de l'utilisateur
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DATA_DIR = os.path.join(BASE_DIR, "../data")
-ANSWER_PATH = os.path.join(DATA_DIR, "answers.pkl")
-ANSWER_DIR = os.path.join(BASE_DIR, "../main")
-RESULTS_PATH = os.path.join(ANSWER_DIR, "optimized_portfolio.pkl")  # 📌 Fichier pour sauvegarder les résultats
 
 # 📌 Charger les réponses de l'utilisateur
 def load_user_preferences():
     """
-    Charge les préférences de l'utilisateur enregistrées dans `answers.pkl`.
+    Charge les préférences de l'utilisateur enregistrées dans `answers.json`.
 
     Returns:
         dict: Contient les paramètres d'optimisation.
     """
-    try:
-        with open(ANSWER_PATH, "rb") as f:
-            preferences = pickle.load(f)
-        return preferences
-    except FileNotFoundError:
-        print(f"❌ Fichier introuvable : '{ANSWER_PATH}'")
-        return None
-
-# 📌 Charger les préférences utilisateur
-user_preferences = load_user_preferences()
-if not user_preferences:
-    print("❌ Impossible de charger les préférences utilisateur.")
-    sys.exit(1)
-
-# 📌 Extraire les paramètres d'optimisation
-risk_level = user_preferences["risk_level"]
-budget = user_preferences["budget"]
-min_allocation = user_preferences["min_allocation"] / 100
-max_allocation = user_preferences["max_allocation"] / 100
-risk_free_rate = user_preferences["risk_free_rate"] / 100
-optimization_method = user_preferences["optimization_method"]
-
-# 📌 Charger les statistiques des actifs
-portfolio_stats = analyze_portfolio()
-if not portfolio_stats:
-    print("❌ Échec de la récupération des statistiques.")
-    sys.exit(1)
-
-# 📌 Extraire les statistiques
-mean_returns = portfolio_stats["annualized_returns"]
-cov_matrix = portfolio_stats["covariance_matrix"]
-
-# 📌 Nombre d'actifs
-num_assets = len(mean_returns)
-
-# 📌 Contraintes d’allocation (min/max)
-bounds = tuple((min_allocation, max_allocation) for _ in range(num_assets))
-constraints = {"type": "eq", "fun": lambda weights: np.sum(weights) - 1}  # Somme des poids = 1
-
-# 📌 Fonction à optimiser selon le choix de l'utilisateur
-def neg_sharpe_ratio(weights):
-    """ Fonction à minimiser pour maximiser le ratio de Sharpe """
-    port_return = np.dot(weights, mean_returns)
-    port_volatility = np.sqrt(np.dot(weights.T, np.dot(cov_matrix, weights)))
-    return - (port_return - risk_free_rate) / port_volatility  # Maximisation du Sharpe
-
-def min_volatility(weights):
-    """ Fonction à minimiser pour minimiser la volatilité """
-    return np.sqrt(np.dot(weights.T, np.dot(cov_matrix, weights)))
-
-def target_return_constraint(weights, target_return):
-    """ Contrainte : atteindre un rendement cible """
-    return np.dot(weights, mean_returns) - target_return
-
-# 📌 Vérification si le rendement cible est atteignable
-max_possible_return = np.max(mean_returns) * 252  # Rendement annuel max atteignable
-min_possible_return = np.min(mean_returns) * 252  # Rendement annuel min atteignable
-
-if optimization_method == "Optimisation pour un rendement cible":
-    target_return = user_preferences["target_return"] / 100  # Convertir en fraction
-
-    if target_return > max_possible_return:
-        print(f"❌ Impossible d'atteindre un rendement cible de {target_return:.2f}%.")
-        print(f"📌 Le rendement max possible avec ces actifs est {max_possible_return:.2f}%.")
-        print("💡 Ajustement automatique du rendement cible au rendement maximal atteignable.")
-        target_return = max_possible_return  # Ajustement automatique
-
-    if target_return < min_possible_return:
-        print(f"❌ Impossible d'atteindre un rendement cible de {target_return*100:.2f}%.")
-        print(f"📌 Le rendement minimum réalisable avec ces actifs est {min_possible_return:.2f}%.")
-        print("💡 Ajustement automatique du rendement cible au rendement minimum atteignable.")
-        target_return = min_possible_return  # Ajustement automatique
-
-# 📌 Optimisation en fonction du choix utilisateur
-if optimization_method == "Maximisation du ratio de Sharpe":
-    result = sco.minimize(neg_sharpe_ratio, np.ones(num_assets) / num_assets,
-                          method="SLSQP", bounds=bounds, constraints=constraints)
-
-elif optimization_method == "Minimisation de la volatilité":
-    result = sco.minimize(min_volatility, np.ones(num_assets) / num_assets,
-                          method="SLSQP", bounds=bounds, constraints=constraints)
-
-elif optimization_method == "Optimisation pour un rendement cible":
-    new_constraints = [constraints, {"type": "eq", "fun": lambda w: target_return_constraint(w, target_return)}]
-    result = sco.minimize(min_volatility, np.ones(num_assets) / num_assets,
-                          method="SLSQP", bounds=bounds, constraints=new_constraints)
-
-    # 📌 Si l'optimisation échoue, essayer d'élargir les bornes de l'allocation
+    from result_store import PREFERENCES_PATH, load_preferences
+
+    preferences = load_preferences()
+    if preferences is None:
+        print(f"❌ Fichier introuvable : '{PREFERENCES_PATH}'")
+    return preferences
+
+
+def _minimize_volatility(mu, cov, bounds, solver, target_return=None, initial_weights=None, state=None,
+                         candidates=None):
+    """
+    Minimise la volatilité, par le moteur QP à ensemble actif ou par SLSQP avec gradients analytiques.
+    Avec des `candidates` (pré-sélection), le QP ne porte que sur eux puis est vérifié sur tout l'univers.
+    """
+    if solver == "QP":
+        lb, ub = np.array(bounds).T
+        if candidates is not None:
+            with span("QP"):
+                return screened_min_variance(cov, lb, ub, candidates, mean_returns=mu, target_return=target_return,
+                                             state=state)
+        with span("QP"):
+            return min_variance_qp(cov, lb, ub, mean_returns=mu, target_return=target_return,
+                                   w0=initial_weights, state=state)
+    constraints = [{"type": "eq", "fun": sum_to_one_constraint, "jac": sum_to_one_jac}]  # Somme des poids = 1
+    if target_return is not None:
+        constraints.append({"type": "eq", "fun": target_return_constraint, "jac": target_return_jac,
+                            "args": (mu, target_return)})
+    x0 = initial_weights if initial_weights is not None else np.ones(len(mu)) / len(mu)
+    import scipy.optimize as sco  # 📌 import différé : SLSQP n'est chargé que s'il est utilisé
+
+    with span("SLSQP"):
+        return sco.minimize(min_volatility, x0, args=(cov,), jac=min_volatility_grad,
+                            method="SLSQP", bounds=bounds, constraints=constraints)
+
+
+def _record_solve(result, solver, method, bounds, mu, target_return=None, attempt="initial"):
+    """
+    Télémétrie d'un appel de solveur, calculée uniquement si l'instrumentation est active.
+    """
+    if active_record() is None:
+        return
+    violation = None
+    if result.x is not None:
+        lb, ub = np.array(bounds).T
+        residuals = [abs(result.x.sum() - 1), np.max(lb - result.x), np.max(result.x - ub)]
+        if target_return is not None:
+            residuals.append(abs(result.x @ mu - target_return))
+        violation = float(max(residuals))
+    record_solver(solver, result, violation, method=method, attempt=attempt)
+
+
+def optimize(stats, constraints, method, solver="QP", initial_weights=None, state=None, verbose=True):
+    """
+    Optimise un portefeuille à partir de statistiques déjà calculées, sans effet de bord.
+
+    Args:
+        stats (dict): Statistiques de `calculate_statistics` (`annualized_returns`, `covariance_matrix`).
+        constraints (PortfolioConstraints): Bornes d'allocation, taux sans risque et rendement cible.
+        method (str): Une des `OPTIMIZATION_METHODS`.
+        solver (str): "QP" (ensemble actif) ou "SLSQP" (repli) pour les méthodes de volatilité ; ignoré par les
+            méthodes CVaR, HRP, ERC et ré-échantillonnée, qui ont leur propre algorithme.
+        initial_weights (np.ndarray): Poids de départ (démarrage à chaud), équipondéré si None.
+        state (np.ndarray): Ensemble actif de départ pour le moteur QP.
+        verbose (bool): Affiche les ajustements et relaxations de contraintes.
+
+    Returns:
+        OptimizationResult: Poids optimaux, rendement et volatilité attendus.
+    """
+    mean_returns = stats["annualized_returns"]
+    tickers = list(getattr(mean_returns, "index", range(len(mean_returns))))
+
+    # 📌 Statistiques sous forme de tableaux NumPy (évite l'alignement pandas à chaque évaluation)
+    mu = np.asarray(mean_returns, dtype=np.float64)
+    cov = as_covariance(stats["covariance_matrix"])  # 📌 dense ou factorielle
+    num_assets = len(mu)
+
+    # 📌 Contraintes d’allocation (min/max)
+    bounds = tuple((constraints.min_allocation, constraints.max_allocation) for _ in range(num_assets))
+
+    # 📌 Pré-sélection de l'univers (méthodes de volatilité par QP) : solution identique, QP de taille réduite
+    candidates = None
+    if (method in SCREENED_METHODS and solver == "QP" and constraints.max_candidates is not None
+            and num_assets > constraints.max_candidates):
+        candidates = screen_universe(stats, constraints.max_candidates, constraints.risk_free_rate,
+                                     constraints.min_allocation, constraints.max_allocation)
+
+    with span("optimize"):
+        if method == "Maximisation du ratio de Sharpe":
+            x0 = initial_weights if initial_weights is not None else np.ones(num_assets) / num_assets
+            import scipy.optimize as sco  # 📌 import différé : SLSQP n'est chargé que s'il est utilisé
+
+            with span("SLSQP"):
+                result = sco.minimize(neg_sharpe_ratio, x0, args=(mu, cov, constraints.risk_free_rate),
+                                      jac=neg_sharpe_ratio_grad, method="SLSQP", bounds=bounds,
+                                      constraints={"type": "eq", "fun": sum_to_one_constraint,
+                                                   "jac": sum_to_one_jac})
+            solver = "SLSQP"
+            _record_solve(result, solver, method, bounds, mu)
+
+        elif method == "Minimisation de la volatilité":
+            result = _minimize_volatility(mu, cov, bounds, solver, initial_weights=initial_weights, state=state,
+                                          candidates=candidates)
+            _record_solve(result, solver, method, bounds, mu)
+
+        elif method == "Optimisation pour un rendement cible":
+            target_return = constraints.target_return
+            if target_return is None:
+                raise ValueError("Un rendement cible est requis pour l'optimisation pour un rendement cible.")
+
+            # 📌 Vérification si le rendement cible est atteignable (rendements déjà annualisés)
+            max_possible_return = np.max(mu)
+            min_possible_return = np.min(mu)
+            if target_return > max_possible_return:
+                if verbose:
+                    print(f"❌ Impossible d'atteindre un rendement cible de {target_return*100:.2f}%.")
+                    print(f"📌 Le rendement max possible avec ces actifs est {max_possible_return*100:.2f}%.")
+                    print("💡 Ajustement automatique du rendement cible au rendement maximal atteignable.")
+                record_fallback("target_return_clamped", requested=target_return, used=float(max_possible_return))
+                target_return = max_possible_return  # Ajustement automatique
+            if target_return < min_possible_return:
+                if verbose:
+                    print(f"❌ Impossible d'atteindre un rendement cible de {target_return*100:.2f}%.")
+                    print(f"📌 Le rendement minimum réalisable avec ces actifs est {min_possible_return*100:.2f}%.")
+                    print("💡 Ajustement automatique du rendement cible au rendement minimum atteignable.")
+                record_fallback("target_return_clamped", requested=target_return, used=float(min_possible_return))
+                target_return = min_possible_return  # Ajustement automatique
+
+            result = _minimize_volatility(mu, cov, bounds, solver, target_return, initial_weights, state, candidates)
+            _record_solve(result, solver, method, bounds, mu, target_return)
+
+            # 📌 Si l'optimisation échoue, essayer d'élargir les bornes de l'allocation
+            if not result.success:
+                if verbose:
+                    print("⚠️ L'optimisation a échoué avec les contraintes actuelles.")
+                    print("🔄 Réduction des contraintes d'allocation et nouvel essai...")
+
+                new_min_allocation = constraints.min_allocation / 2  # Diminuer la contrainte min
+                bounds = tuple((new_min_allocation, 1) for _ in range(num_assets))
+
+                record_fallback("relaxed_bounds", min_allocation=new_min_allocation, max_allocation=1)
+                result = _minimize_volatility(mu, cov, bounds, solver, target_return)
+                _record_solve(result, solver, method, bounds, mu, target_return, attempt="relaxed_bounds")
+
+        elif method == "Minimisation de la volatilité à K actifs":
+            if constraints.max_assets is None:
+                raise ValueError("Un nombre maximal d'actifs est requis pour la minimisation à K actifs.")
+            # 📌 Rendement cible facultatif ; les actifs non retenus ont un poids nul (bornes [0, max])
+            with span("cardinality"):
+                result = cardinality_min_variance(mu, cov, constraints.max_assets, constraints.min_allocation,
+                                                  constraints.max_allocation, constraints.target_return,
+                                                  time_limit=constraints.search_time,
+                                                  initial_weights=initial_weights)
+            solver = "QP"
+            _record_solve(result, solver, method, tuple((0.0, constraints.max_allocation) for _ in range(num_assets)),
+                          mu, constraints.target_return)
+
+        elif method == "Minimisation de la CVaR":
+            returns = stats.get("returns")
+            if returns is None:
+                raise ValueError("Le panel de rendements est requis pour la minimisation de la CVaR.")
+            lb, ub = np.array(bounds).T
+            with span("LP"):
+                result = min_cvar_weights(returns, constraints.cvar_level, lb, ub, mean_returns=mu,
+                                          target_return=constraints.target_return)
+            solver = "HiGHS"
+            _record_solve(result, solver, method, bounds, mu)
+
+        elif method == "Parité de risque hiérarchique (HRP)":
+            # 📌 Sans solveur : classification hiérarchique puis bissection récursive
+            with span("HRP"):
+                result = hrp_weights(cov, constraints.min_allocation, constraints.max_allocation)
+            solver = "HRP"
+            _record_solve(result, solver, method, bounds, mu)
+
+        elif method == "Contribution égale au risque (ERC)":
+            with span("ERC"):
+                result = erc_weights(cov, constraints.min_allocation, constraints.max_allocation)
+            solver = "Newton"
+            _record_solve(result, solver, method, bounds, mu)
+
+        elif method == "Maximisation du ratio de Sharpe ré-échantillonnée":
+            if stats.get("returns") is None:
+                raise ValueError("Le panel de rendements est requis pour l'optimisation ré-échantillonnée.")
+            # 📌 Graine fixe : les mêmes réponses donnent les mêmes poids (cache et ré-optimisation à chaud)
+            with span("resampled"):
+                result = resampled_weights(stats, constraints.min_allocation, constraints.max_allocation,
+                                           constraints.risk_free_rate, n_resamples=constraints.n_resamples,
+                                           kind=constraints.resampling, processes=constraints.processes, seed=0)
+            solver = "QP"
+            _record_solve(result, solver, method, bounds, mu)
+
+        else:
+            raise ValueError(f"Méthode d'optimisation inconnue : '{method}'")
+
+    # 📌 Résultats de l'optimisation
+    optimal_weights = result.x if result.x is not None else np.full(num_assets, np.nan)
+    return OptimizationResult(
+        tickers=tickers,
+        weights=optimal_weights,
+        expected_return=float(optimal_weights @ mu),
+        expected_volatility=float(min_volatility(optimal_weights, cov)),
+        success=bool(result.success),
+        message=str(result.message),
+        method=method,
+        solver=solver,
+        nit=int(getattr(result, "nit", 0)),
+        state=getattr(result, "state", None),
+        dispersion=getattr(result, "dispersion", None),
+    )
+
+
+def print_results(optimized_results):
+    """
+    Affiche les résultats de l'optimisation.
+    """
+    print("\n✅ **Optimisation réussie !**")
+    print(f"📈 **Rendement attendu :** {optimized_results['expected_return']:.2f}%")
+    print(f"📊 **Volatilité attendue :** {optimized_results['expected_volatility']:.2f}%\n")
+
+    print("🛠 **Répartition optimale du portefeuille :**")
+    for asset, weight in optimized_results["weights"].items():
+        print(f"{asset}: {weight:.2f}%")
+
+    print("\n💰 **Montants investis :**")
+    for asset, amount in optimized_results["investment_amounts"].items():
+        print(f"{asset}: {amount:.2f}€")
+
+
+def main():
+    """
+    Point d'entrée en ligne de commande : `answers.json` -> statistiques -> optimisation -> historique des résultats.
+    """
+    # 📌 Imports différés : statistiques et stockage des résultats ne servent qu'en ligne de commande
+    from statistics import analyze_portfolio
+    from result_store import ResultStore
+    from optimization_worker import answers_key
+
+    # 📌 Charger les préférences utilisateur
+    user_preferences = load_user_preferences()
+    if not user_preferences:
+        print("❌ Impossible de charger les préférences utilisateur.")
+        sys.exit(1)
+
+    # 📌 Charger les statistiques des actifs
+    portfolio_stats = analyze_portfolio(user_preferences["tickers"])
+    if not portfolio_stats:
+        print("❌ Échec de la récupération des statistiques.")
+        sys.exit(1)
+
+    constraints = PortfolioConstraints.from_preferences(user_preferences)
+    result = optimize(portfolio_stats, constraints, user_preferences["optimization_method"],
+                      solver=user_preferences.get("solver", "QP"))
+
+    # 📌 Vérification de la réussite de l'optimisation
     if not result.success:
-        print("⚠️ L'optimisation a échoué avec les contraintes actuelles.")
-        print("🔄 Réduction des contraintes d'allocation et nouvel essai...")
-
-        new_min_allocation = min_allocation / 2  # Diminuer la contrainte min
-        bounds = tuple((new_min_allocation, 1) for _ in range(num_assets))
-
-        result = sco.minimize(min_volatility, np.ones(num_assets) / num_assets,
-                              method="SLSQP", bounds=bounds, constraints=new_constraints)
-
-# 📌 Vérification de la réussite de l'optimisation
-if not result.success:
-    print(f"❌ Échec de l'optimisation même après relaxation des contraintes : {result.message}")
-    print("💡 Essayez de modifier les actifs sélectionnés ou d'assouplir les contraintes d'allocation.")
-    sys.exit(1)
-
-# 📌 Résultats de l'optimisation
-optimal_weights = result.x
-expected_return = np.dot(optimal_weights, mean_returns)
-expected_volatility = np.sqrt(np.dot(optimal_weights.T, np.dot(cov_matrix, optimal_weights)))
-
-# 📌 Calculer les montants investis en fonction du budget total
-investment_amounts = optimal_weights * budget
-
-# 📌 Création du dictionnaire des résultats
-optimized_results = {
-    "expected_return": expected_return * 100,
-    "expected_volatility": expected_volatility * 100,
-    "weights": {asset: weight * 100 for asset, weight in zip(mean_returns.index, optimal_weights)},
-    "investment_amounts": {asset: amount for asset, amount in zip(mean_returns.index, investment_amounts)}
-}
-
-# 📌 Sauvegarde des résultats dans un fichier pour `view_results.py`
-with open(RESULTS_PATH, "wb") as f:
-    pickle.dump(optimized_results, f)
-
-# 📌 Affichage des résultats
-print("\n✅ **Optimisation réussie !**")
-print(f"📈 **Rendement attendu :** {optimized_results['expected_return']:.2f}%")
-print(f"📊 **Volatilité attendue :** {optimized_results['expected_volatility']:.2f}%\n")
-
-print("🛠 **Répartition optimale du portefeuille :**")
-for asset, weight in optimized_results["weights"].items():
-    print(f"{asset}: {weight:.2f}%")
-
-print("\n💰 **Montants investis :**")
-for asset, amount in optimized_results["investment_amounts"].items():
-    print(f"{asset}: {amount:.2f}€")
-
-print(f"\n✅ Résultats sauvegardés dans `{RESULTS_PATH}`")
\ No newline at end of file
+        print(f"❌ Échec de l'optimisation même après relaxation des contraintes : {result.message}")
+        print("💡 Essayez de modifier les actifs sélectionnés ou d'assouplir les contraintes d'allocation.")
+        sys.exit(1)
+
+    optimized_results = result.to_dict(user_preferences["budget"])
+
+    # 📌 Frontière efficiente : la ligne de commande ne l'affiche pas, elle n'est tracée (et historisée)
+    # que si les préférences demandent un nombre de points (`frontier_points`)
+    frontier = None
+    if user_preferences.get("frontier_points"):
+        frontier = efficient_frontier(portfolio_stats["annualized_returns"], portfolio_stats["covariance_matrix"],
+                                      constraints.min_allocation, constraints.max_allocation,
+                                      num_points=int(user_preferences["frontier_points"]))
+        if frontier is not None:
+            optimized_results["frontier"] = frontier_to_dict(frontier)
+
+    # 📌 Sauvegarde de l'exécution dans l'historique versionné des résultats
+    store = ResultStore()
+    run_id = store.save(result, user_preferences, stats=portfolio_stats, frontier=frontier,
+                        answers_hash=answers_key(user_preferences))
+
+    # 📌 Affichage des résultats
+    print_results(optimized_results)
+    print(f"\n✅ Résultats sauvegardés dans `{store.root}` (exécution `{run_id}`)")
+
+
+if __name__ == "__main__":
+    main()
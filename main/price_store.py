@@ -0,0 +1,150 @@
+import os
+import threading
+import datetime as dt
+import numpy as np
+import pandas as pd
+
+from data_sources import default_source
+
+# 📌 Dossier par défaut du stockage local des prix (un fichier par ticker et par intervalle)
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STORE_DIR = os.path.join(BASE_DIR, "../data/prices")
+
+# 📌 Écart maximal toléré entre la dernière barre stockée et aujourd'hui avant de re-télécharger
+FRESHNESS = {
+    "1d": pd.offsets.BDay(1),
+    "1wk": pd.DateOffset(days=7),
+    "1mo": pd.DateOffset(months=1),
+}
+
+
+def period_start(period, today=None):
+    """
+    Convertit une période yfinance ("6mo", "1y", "5y", "max") en date de début.
+
+    Args:
+        period (str): Période d'historique.
+        today (pd.Timestamp): Date de référence (aujourd'hui par défaut).
+
+    Returns:
+        pd.Timestamp | None: Date de début, ou None pour "max".
+    """
+    today = pd.Timestamp(today or dt.date.today()).normalize()
+    if period == "max":
+        return None
+    units = {"d": "days", "wk": "weeks", "mo": "months", "y": "years"}
+    for suffix, unit in units.items():
+        if period.endswith(suffix) and period[:-len(suffix)].isdigit():
+            return today - pd.DateOffset(**{unit: int(period[:-len(suffix)])})
+    raise ValueError(f"Période non reconnue : '{period}'")
+
+
+class PriceStore:
+    """
+    Stockage local et incrémental des prix : un fichier `.npz` colonnaire par ticker et par intervalle.
+
+    Seules les barres postérieures à la dernière barre stockée sont téléchargées ;
+    tout le reste est servi depuis le disque.
+    """
+
+    def __init__(self, root=STORE_DIR, provider=None):
+        self.root = root
+        self.provider = provider if provider is not None else default_source()
+
+    def _path(self, ticker, interval):
+        return os.path.join(self.root, interval, f"{ticker}.npz")
+
+    def load(self, ticker, interval="1d"):
+        """
+        Charge l'historique stocké d'un ticker.
+
+        Returns:
+            tuple: (pd.Series des prix, date de début couverte, date du dernier téléchargement) ou None.
+        """
+        path = self._path(ticker, interval)
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as f:
+            series = pd.Series(f["close"], index=pd.to_datetime(f["dates"]), name=ticker)
+            covered_from = pd.Timestamp(int(f["covered_from"])) if f["covered_from"] >= 0 else None
+            checked = pd.Timestamp(int(f["checked"]))
+        return series, covered_from, checked
+
+    def save(self, ticker, series, covered_from, interval="1d"):
+        """
+        Écrit l'historique d'un ticker (écriture atomique pour éviter les fichiers tronqués).
+        """
+        path = self._path(ticker, interval)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp.npz"  # 📌 unique par thread
+        np.savez(
+            tmp_path,
+            dates=series.index.values.astype("datetime64[ns]").astype(np.int64),
+            close=series.to_numpy(dtype=np.float64),
+            covered_from=np.int64(covered_from.value if covered_from is not None else -1),
+            checked=np.int64(pd.Timestamp(dt.date.today()).value),
+        )
+        os.replace(tmp_path, path)
+
+    def _is_current(self, series, checked, interval):
+        """ Les données sont à jour si elles ont été vérifiées aujourd'hui ou si la dernière barre est récente. """
+        today = pd.Timestamp(dt.date.today())
+        if checked >= today:
+            return True
+        if series.empty:
+            return False
+        return series.index[-1] >= today - FRESHNESS.get(interval, pd.offsets.BDay(1))
+
+    def get_prices(self, tickers, period="5y", interval="1d"):
+        """
+        Renvoie les prix des tickers sur la période demandée, en ne téléchargeant que les barres manquantes.
+
+        Args:
+            tickers (list): Liste des tickers.
+            period (str): Période d'historique ("1y", "5y", "max").
+            interval (str): Intervalle des données ("1d", "1wk").
+
+        Returns:
+            pd.DataFrame: Prix ajustés, une colonne par ticker (NaN conservés).
+        """
+        start = period_start(period)
+        stored = {}
+        to_fetch = {}  # 📌 (date de début, mise à jour de tickers stockés) -> tickers à télécharger
+
+        for ticker in tickers:
+            entry = self.load(ticker, interval)
+            covers_period = entry is not None and (
+                entry[1] is None or (start is not None and entry[1] <= start)
+            )
+            if not covers_period:
+                to_fetch.setdefault((start, False), []).append(ticker)
+                continue
+            series, covered_from, checked = entry
+            stored[ticker] = (series, covered_from)
+            if not self._is_current(series, checked, interval):
+                next_bar = series.index[-1] + pd.Timedelta(days=1) if not series.empty else start
+                to_fetch.setdefault((next_bar, not series.empty), []).append(ticker)
+
+        # 📌 Un seul appel au fournisseur par date de début (téléchargement groupé) ; seules les mises à jour
+        # de tickers ayant déjà des barres tolèrent une réponse vide
+        for (fetch_start, incremental), group in to_fetch.items():
+            new_data = self.provider.fetch(group, start=fetch_start, interval=interval, incremental=incremental)
+            for ticker in group:
+                new_bars = new_data[ticker].dropna() if ticker in new_data else pd.Series(dtype=np.float64)
+                new_bars.index = pd.to_datetime(new_bars.index).tz_localize(None)
+                if ticker not in stored and new_bars.empty:
+                    continue  # 📌 échec de récupération : rien n'est enregistré, le ticker sera retenté
+                if ticker in stored:
+                    series, covered_from = stored[ticker]
+                    new_bars = new_bars[new_bars.index > series.index[-1]] if not series.empty else new_bars
+                    series = pd.concat([series, new_bars])
+                else:
+                    series, covered_from = new_bars, start
+                series = series.rename(ticker).astype(np.float64)
+                self.save(ticker, series, covered_from, interval)
+                stored[ticker] = (series, covered_from)
+
+        prices = pd.DataFrame({ticker: stored[ticker][0] for ticker in tickers if ticker in stored})
+        if start is not None:
+            prices = prices[prices.index >= start]
+        return prices
@@ -0,0 +1,252 @@
+import numpy as np
+
+from covariance import as_covariance, covariance_block, covariance_diagonal
+from instrumentation import record_fallback
+
+# 📌 Moteur de programmation quadratique à ensemble actif pour les problèmes de Markowitz :
+#     min 0.5 w'Gw + c'w   s.t.   A w = b,   lb <= w <= ub
+# L'état de chaque actif vaut -1 (borne basse active), +1 (borne haute active) ou 0 (libre).
+
+AT_LOWER, FREE, AT_UPPER = -1, 0, 1
+
+
+class QPResult(dict):
+    """
+    Résultat du moteur QP, lisible par attribut comme `scipy.optimize.OptimizeResult`
+    (sans importer `scipy.optimize`, coûteux au démarrage).
+    """
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+
+def project_capped_simplex(values, lb, ub, total=1.0, iterations=100):
+    """
+    Projette un vecteur sur {w : sum(w) = total, lb <= w <= ub} par dichotomie sur le décalage.
+
+    Args:
+        values (np.ndarray): Vecteur à projeter.
+        lb, ub (np.ndarray): Bornes inférieures et supérieures.
+        total (float): Somme imposée.
+        iterations (int): Nombre d'itérations de dichotomie.
+
+    Returns:
+        np.ndarray | None: Point projeté, ou None si l'ensemble est vide.
+    """
+    if lb.sum() > total + 1e-12 or ub.sum() < total - 1e-12:
+        return None
+    low, high = np.min(values - ub), np.max(values - lb)
+    for _ in range(iterations):
+        shift = 0.5 * (low + high)
+        if np.clip(values - shift, lb, ub).sum() > total:
+            low = shift
+        else:
+            high = shift
+    return np.clip(values - 0.5 * (low + high), lb, ub)
+
+
+def find_feasible_point(A, b, lb, ub, start=None):
+    """
+    Trouve un point vérifiant A w = b et lb <= w <= ub (phase 1).
+
+    La projection sur le simplexe borné suffit pour la seule contrainte de somme ;
+    sinon un programme linéaire (HiGHS) est résolu.
+
+    Args:
+        start (np.ndarray): Point à projeter pour la seule contrainte de somme (équipondéré si None).
+
+    Returns:
+        np.ndarray | None: Point réalisable, ou None si le problème est infaisable.
+    """
+    n = A.shape[1]
+    if A.shape[0] == 1 and np.allclose(A[0], 1.0):
+        start = np.full(n, b[0] / n) if start is None else start
+        return project_capped_simplex(start, lb, ub, total=b[0])
+    from scipy.optimize import linprog  # 📌 import différé : seulement pour les contraintes générales
+
+    res = linprog(np.zeros(n), A_eq=A, b_eq=b, bounds=np.column_stack([lb, ub]), method="highs")
+    return res.x if res.status == 0 else None
+
+
+def _solve_equality_qp(G, c, A, b, w, state):
+    """
+    Résout le QP restreint aux actifs libres, les autres étant fixés à leur borne.
+
+    Returns:
+        tuple: (poids complets, multiplicateurs des contraintes d'égalité)
+    """
+    free = state == FREE
+    fixed = ~free
+    m = A.shape[0]
+    n_free = int(free.sum())
+    G_ff = covariance_block(G, free, free)
+    A_f = A[:, free]
+
+    kkt = np.zeros((n_free + m, n_free + m))
+    kkt[:n_free, :n_free] = G_ff
+    kkt[:n_free, n_free:] = A_f.T
+    kkt[n_free:, :n_free] = A_f
+    rhs = np.concatenate([
+        -(c[free] + covariance_block(G, free, fixed) @ w[fixed]),
+        b - A[:, fixed] @ w[fixed],
+    ])
+    try:
+        solution = np.linalg.solve(kkt, rhs)
+    except np.linalg.LinAlgError:
+        solution = np.linalg.lstsq(kkt, rhs, rcond=None)[0]
+
+    new_w = w.copy()
+    new_w[free] = solution[:n_free]
+    return new_w, solution[n_free:]
+
+
+def _fix_to_bounds(w, state, lb, ub):
+    w = w.copy()
+    w[state == AT_LOWER] = lb[state == AT_LOWER]
+    w[state == AT_UPPER] = ub[state == AT_UPPER]
+    return w
+
+
+def _crash_active_set(G, c, A, b, lb, ub, state, iterations, tol):
+    """
+    Devine l'ensemble actif par quelques itérations primal-dual (plusieurs changements à la fois).
+
+    Returns:
+        tuple: (poids, état) réalisables, ou (None, état) si aucun point réalisable n'a été atteint,
+        suivis du dernier itéré (point de départ de la phase 1).
+    """
+    best, w = (None, state), None
+    for _ in range(iterations):
+        w, y = _solve_equality_qp(G, c, A, b, _fix_to_bounds(np.zeros_like(lb), state, lb, ub), state)
+        if np.all(w >= lb - tol) and np.all(w <= ub + tol) and np.allclose(A @ w, b, atol=1e-9):
+            best = (np.clip(w, lb, ub), state)
+        reduced_costs = G @ w + c + A.T @ y
+        new_state = state.copy()
+        new_state[(state == FREE) & (w < lb - tol)] = AT_LOWER
+        new_state[(state == FREE) & (w > ub + tol)] = AT_UPPER
+        new_state[(state == AT_LOWER) & (reduced_costs < -tol)] = FREE
+        new_state[(state == AT_UPPER) & (reduced_costs > tol)] = FREE
+        if np.array_equal(new_state, state):
+            break
+        state = new_state
+    return (*best, w)
+
+
+def solve_qp(G, A, b, lb, ub, c=None, w0=None, state=None, max_iter=None, crash_iter=50, tol=1e-10):
+    """
+    Résout min 0.5 w'Gw + c'w  s.t.  A w = b,  lb <= w <= ub  par une méthode primale à ensemble actif.
+
+    Un point et un ensemble actif de départ (`w0`, `state`) permettent un démarrage à chaud.
+
+    Args:
+        G (np.ndarray | FactorCovariance): Matrice (semi-)définie positive N×N.
+        A (np.ndarray): Matrice des contraintes d'égalité m×N.
+        b (np.ndarray): Second membre des égalités.
+        lb, ub (np.ndarray): Bornes des poids.
+        c (np.ndarray): Terme linéaire (nul par défaut).
+        w0 (np.ndarray): Point de départ (ignoré s'il n'est pas réalisable).
+        state (np.ndarray): Ensemble actif de départ (-1 borne basse, 0 libre, +1 borne haute).
+        max_iter (int): Nombre maximal d'itérations (10·N par défaut).
+        crash_iter (int): Itérations primal-dual pour deviner l'ensemble actif initial.
+        tol (float): Tolérance numérique.
+
+    Returns:
+        QPResult: `x`, `success`, `message`, `nit`, `state` (ensemble actif final) et `multipliers`.
+    """
+    G = as_covariance(G)  # 📌 dense ou factorielle (seuls des sous-blocs sont formés)
+    A = np.atleast_2d(np.asarray(A, dtype=np.float64))
+    b = np.atleast_1d(np.asarray(b, dtype=np.float64))
+    lb = np.asarray(lb, dtype=np.float64)
+    ub = np.asarray(ub, dtype=np.float64)
+    n = G.shape[0]
+    c = np.zeros(n) if c is None else np.asarray(c, dtype=np.float64)
+    max_iter = max_iter or 10 * n
+
+    # 📌 Mise à l'échelle : la solution est inchangée, les tolérances deviennent relatives
+    scale = np.mean(covariance_diagonal(G)) or 1.0
+    G, c = G / scale, c / scale
+
+    # 📌 Point de départ : démarrage à chaud si réalisable, sinon devinette primal-dual, sinon phase 1
+    w = None
+    if w0 is not None:
+        w0 = np.asarray(w0, dtype=np.float64)
+        if np.all(w0 >= lb - tol) and np.all(w0 <= ub + tol) and np.allclose(A @ w0, b, atol=1e-9):
+            w = np.clip(w0, lb, ub)
+            if state is None:
+                state = np.where(w <= lb + tol, AT_LOWER, np.where(w >= ub - tol, AT_UPPER, FREE))
+            w = _fix_to_bounds(w, state, lb, ub)
+        elif state is None:
+            record_fallback("qp_warm_start_rejected")  # 📌 avec un ensemble actif, la devinette reste à chaud
+    crashed = None
+    if w is None:
+        guess = np.zeros(n, dtype=np.int8) if state is None else np.asarray(state, dtype=np.int8).copy()
+        w, state, crashed = _crash_active_set(G, c, A, b, lb, ub, guess, crash_iter, tol)
+    if w is None:
+        # 📌 Phase 1 depuis le dernier itéré primal-dual : peu d'itérations primales restent à faire
+        record_fallback("qp_phase1")
+        w = find_feasible_point(A, b, lb, ub, start=crashed)
+        if w is None:
+            return QPResult(x=None, success=False, nit=0, state=None, multipliers=None,
+                            message="Contraintes infaisables (bornes incompatibles avec les égalités)")
+        state = np.where(w <= lb + tol, AT_LOWER, np.where(w >= ub - tol, AT_UPPER, FREE)).astype(np.int8)
+        w = _fix_to_bounds(w, state, lb, ub)
+    state = np.asarray(state, dtype=np.int8).copy()
+
+    for iteration in range(1, max_iter + 1):
+        target, y = _solve_equality_qp(G, c, A, b, w, state)
+        step = target - w
+
+        if np.linalg.norm(step) <= 1e-9 * (1 + np.linalg.norm(w)):
+            # 📌 Point stationnaire : libérer la borne dont le multiplicateur a le mauvais signe
+            reduced_costs = G @ w + c + A.T @ y
+            violation = np.where(state == AT_LOWER, -reduced_costs,
+                                 np.where(state == AT_UPPER, reduced_costs, 0.0))
+            worst = int(np.argmax(violation))
+            if violation[worst] <= 1e-9 * (1 + np.abs(reduced_costs).max()):
+                return QPResult(x=w, success=True, nit=iteration, state=state,
+                                multipliers=y * scale, message="Optimisation terminée avec succès")
+            state[worst] = FREE
+            continue
+
+        # 📌 Pas maximal avant qu'un actif libre ne touche une borne
+        ratios = np.full(n, np.inf)
+        moving = state == FREE
+        down = moving & (step < -tol)
+        up = moving & (step > tol)
+        ratios[down] = (lb[down] - w[down]) / step[down]
+        ratios[up] = (ub[up] - w[up]) / step[up]
+        blocking = int(np.argmin(ratios))
+        alpha = min(1.0, max(ratios[blocking], 0.0))
+
+        w = w + alpha * step
+        if alpha < 1.0:
+            state[blocking] = AT_LOWER if step[blocking] < 0 else AT_UPPER
+            w = _fix_to_bounds(w, state, lb, ub)
+
+    return QPResult(x=w, success=False, nit=max_iter, state=state, multipliers=None,
+                    message="Nombre maximal d'itérations atteint")
+
+
+def min_variance_qp(cov_matrix, lb, ub, mean_returns=None, target_return=None, w0=None, state=None):
+    """
+    Portefeuille de variance minimale (éventuellement sous contrainte de rendement cible).
+
+    Args:
+        cov_matrix (np.ndarray): Matrice de covariance.
+        lb, ub (np.ndarray): Bornes des poids.
+        mean_returns (np.ndarray): Rendements attendus (requis si `target_return` est fourni).
+        target_return (float): Rendement cible, ou None.
+        w0, state: Démarrage à chaud (voir `solve_qp`).
+
+    Returns:
+        QPResult: Résultat de `solve_qp`.
+    """
+    n = len(lb)
+    A, b = np.ones((1, n)), np.array([1.0])
+    if target_return is not None:
+        A = np.vstack([A, np.asarray(mean_returns, dtype=np.float64)])
+        b = np.array([1.0, target_return])
+    return solve_qp(cov_matrix, A, b, lb, ub, w0=w0, state=state)
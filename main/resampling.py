@@ -0,0 +1,163 @@
+import os
+import multiprocessing
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+from qp_solver import QPResult
+from frontier import max_sharpe_weights
+from covariance import as_covariance
+from shared_arrays import share_array, attach_array, release
+from instrumentation import recording, span, record_fallback
+
+# 📌 Optimisation ré-échantillonnée (Michaud) : B jeux de statistiques tirés autour des statistiques estimées
+# (bootstrap des jours historiques, ou tirages gaussiens de même moyenne et covariance), un portefeuille
+# de ratio de Sharpe maximal par tirage, puis moyenne des poids. L'écart-type des poids de chaque actif
+# mesure la sensibilité de la solution au bruit d'estimation.
+# Les tirages sont répartis par paquets sur un pool de processus ; le panel de rendements (ou le facteur de
+# Cholesky) est en mémoire partagée, seuls une graine et les bornes sont envoyées à chaque tâche.
+
+RESAMPLING_KINDS = ("bootstrap", "parametric")
+
+# 📌 Tirages par tâche : les graines dépendent du paquet, pas du nombre de processus (résultats reproductibles)
+RESAMPLES_PER_TASK = 25
+
+# 📌 Taille par défaut du pool : bornée, l'optimisation peut déjà tourner dans plusieurs threads (travailleur)
+MAX_PROCESSES = 4
+
+# 📌 Tableaux partagés ouverts une seule fois par processus du pool
+_SHARED = {}
+
+
+def _attach_shared(descriptors):
+    for name, descriptor in descriptors.items():
+        _SHARED[name] = attach_array(descriptor)
+
+
+def _resampled_statistics(rng, kind, arrays, n_days, periods):
+    """
+    Rendements moyens annualisés et covariance d'un tirage (par période, comme `calculate_statistics`).
+
+    Args:
+        rng (np.random.Generator): Générateur du paquet.
+        kind (str): "bootstrap" (jours tirés avec remise) ou "parametric" (tirages gaussiens).
+        arrays (dict): "returns" (T×N, bootstrap) ou "mean" (par période) et "factor" (Cholesky, paramétrique).
+        n_days (int): Nombre T de jours par tirage.
+        periods (int): Nombre de barres par an.
+
+    Returns:
+        tuple: (rendements annualisés (N), covariance (N×N))
+    """
+    if kind == "bootstrap":
+        sample = arrays["returns"][rng.integers(0, len(arrays["returns"]), size=n_days)]
+    else:
+        sample = rng.standard_normal((n_days, len(arrays["mean"]))) @ arrays["factor"].T
+        sample += arrays["mean"]
+    mean = sample.mean(axis=0)
+    sample -= mean
+    return mean * periods, (sample.T @ sample) / (n_days - 1)
+
+
+def _solve_resamples(task, arrays=None):
+    """
+    Résout un paquet de tirages.
+
+    Returns:
+        tuple: (poids k×N, NaN pour un tirage sans solution ; nombre de QP résolus)
+    """
+    seed, count, kind, lb, ub, risk_free_rate, n_days, periods = task
+    if arrays is None:
+        arrays = {name: view for name, (_, view) in _SHARED.items()}
+    rng = np.random.default_rng(seed)
+    weights = np.full((count, len(lb)), np.nan)
+    solves = 0
+    for k in range(count):
+        mu, cov = _resampled_statistics(rng, kind, arrays, n_days, periods)
+        result = max_sharpe_weights(mu, cov, lb, ub, risk_free_rate)
+        solves += result.nit
+        if result.success:
+            weights[k] = result.x
+    return weights, solves
+
+
+def resampled_weights(stats, min_allocation=0.0, max_allocation=1.0, risk_free_rate=0.0, n_resamples=1000,
+                      kind="bootstrap", processes=None, seed=None):
+    """
+    Portefeuille de ratio de Sharpe maximal ré-échantillonné : moyenne des solutions de B tirages.
+
+    Le bootstrap tire des jours complets (tous les actifs cotés) avec remise ; s'il y en a moins que
+    d'actifs, les tirages deviennent paramétriques (gaussiens de moyenne et covariance estimées).
+
+    Args:
+        stats (dict): Statistiques de `calculate_statistics` (avec le panel "returns").
+        min_allocation (float): Poids minimal par actif (fraction).
+        max_allocation (float): Poids maximal par actif (fraction).
+        risk_free_rate (float): Taux sans risque (fraction).
+        n_resamples (int): Nombre B de tirages.
+        kind (str): "bootstrap" ou "parametric".
+        processes (int): Nombre de processus du pool (nombre de cœurs, au plus `MAX_PROCESSES`, par défaut ;
+            1 : sans pool).
+        seed (int): Graine des tirages.
+
+    Returns:
+        QPResult: `x` (poids moyens), `success`, `message`, `nit` (QP résolus), `dispersion` (écart-type
+        des poids de chaque actif entre tirages) et `resamples` (tirages résolus).
+    """
+    if kind not in RESAMPLING_KINDS:
+        raise ValueError(f"Ré-échantillonnage inconnu : '{kind}'")
+    n = len(stats["annualized_returns"])
+    periods = stats.get("periods", 252)  # 📌 statistiques glissantes ou hors mémoire : journalières
+    lb, ub = np.full(n, float(min_allocation)), np.full(n, float(max_allocation))
+    if lb.sum() > 1 + 1e-12 or ub.sum() < 1 - 1e-12:
+        return QPResult(x=None, success=False, nit=0, state=None, multipliers=None, dispersion=None, resamples=0,
+                        message="Les bornes d'allocation ne permettent pas une somme des poids égale à 1")
+
+    values = np.asarray(stats["returns"], dtype=np.float64)
+    complete = values[~np.isnan(values).any(axis=1)]  # 📌 jours où tous les actifs ont un rendement
+    n_days = len(values)
+    if kind == "bootstrap" and len(complete) <= n:
+        record_fallback("resampling_parametric", complete_rows=len(complete), n_assets=n)
+        kind = "parametric"
+    if kind == "bootstrap":
+        arrays = {"returns": complete}
+        n_days = len(complete)
+    else:
+        cov = np.asarray(as_covariance(stats["covariance_matrix"]), dtype=np.float64)
+        factor = np.linalg.cholesky(cov + 1e-12 * np.mean(np.diag(cov)) * np.eye(n))
+        arrays = {"mean": np.asarray(stats["annualized_returns"], dtype=np.float64) / periods, "factor": factor}
+
+    sizes = [min(RESAMPLES_PER_TASK, n_resamples - start) for start in range(0, n_resamples, RESAMPLES_PER_TASK)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(task_seed, size, kind, lb, ub, risk_free_rate, n_days, periods) for task_seed, size in zip(seeds, sizes)]
+    processes = min(processes or min(os.cpu_count() or 1, MAX_PROCESSES), len(tasks))
+
+    with span("resampling"):
+        if processes <= 1:
+            # 📌 Enregistrement jetable : télémétrie des B × ~10 QP écartée, comme dans les processus du pool
+            with recording():
+                parts = [_solve_resamples(task, arrays) for task in tasks]
+        else:
+            # 📌 Tableaux partagés une fois pour tout le pool (pas de sérialisation N×N par tâche)
+            segments, descriptors = [], {}
+            try:
+                for name, array in arrays.items():
+                    shm, descriptors[name] = share_array(array)
+                    segments.append(shm)
+                # 📌 Processus "spawn" : un `fork` depuis un thread du travailleur copierait des verrous tenus
+                with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn"),
+                                         initializer=_attach_shared, initargs=(descriptors,)) as executor:
+                    parts = list(executor.map(_solve_resamples, tasks))
+            finally:
+                release(segments)
+
+    weights = np.vstack([part[0] for part in parts])
+    solved = ~np.isnan(weights).any(axis=1)
+    solves = int(sum(part[1] for part in parts))
+    if not solved.any():
+        return QPResult(x=None, success=False, nit=solves, state=None, multipliers=None, dispersion=None,
+                        resamples=0, message="Aucun tirage n'a pu être optimisé")
+    weights = weights[solved]
+    # 📌 Moyenne de points de l'ensemble réalisable (convexe) : bornes et somme restent respectées
+    return QPResult(x=weights.mean(axis=0), success=True, nit=solves, state=None, multipliers=None,
+                    dispersion=weights.std(axis=0, ddof=1) if len(weights) > 1 else np.zeros(n),
+                    resamples=int(solved.sum()),
+                    message=f"Optimisation terminée avec succès ({int(solved.sum())}/{len(solved)} tirages résolus)")
@@ -0,0 +1,301 @@
+import os
+import json
+import uuid
+import pickle
+import shutil
+import threading
+import datetime as dt
+import numpy as np
+import pandas as pd
+
+from covariance import FactorCovariance
+
+# 📌 Stockage versionné des préférences et des résultats, à la place des pickles :
+# - préférences : `data/answers.json` ({"schema_version", "answers"})
+# - résultats : un dossier par exécution `runs/<run_id>/` avec des tableaux `.npy` contigus (chargeables en
+#   mémoire projetée) et leurs métadonnées `meta.json`, plus un historique `history.jsonl` en ajout seul,
+#   indexé par empreinte des réponses et par date.
+
+SCHEMA_VERSION = 1
+
+# 📌 Définition des chemins
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, "../data")
+PREFERENCES_PATH = os.path.join(DATA_DIR, "answers.json")
+LEGACY_PREFERENCES_PATH = os.path.join(DATA_DIR, "answers.pkl")  # 📌 ancien format, lu seulement
+RESULTS_DIR = os.path.join(DATA_DIR, "results")
+
+# 📌 Champs de `meta.json` recopiés dans l'historique (comparaison sans ouvrir les dossiers d'exécution)
+HISTORY_FIELDS = ("run_id", "created_at", "answers_hash", "optimization_method", "solver", "success",
+                  "expected_return", "expected_volatility", "budget", "tickers")
+
+
+def _write_json(path, payload):
+    """ Écriture atomique d'un fichier JSON. """
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2, ensure_ascii=False, default=float)
+    os.replace(tmp_path, path)
+
+
+def save_preferences(answers, path=PREFERENCES_PATH):
+    """
+    Enregistre les réponses du questionnaire au format JSON versionné.
+
+    Args:
+        answers (dict): Réponses du questionnaire.
+        path (str): Fichier de destination.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    _write_json(path, {"schema_version": SCHEMA_VERSION, "answers": answers})
+
+
+def load_preferences(path=PREFERENCES_PATH):
+    """
+    Charge les réponses du questionnaire (ancien `answers.pkl` accepté s'il n'existe pas de fichier JSON).
+
+    Args:
+        path (str): Fichier JSON des préférences.
+
+    Returns:
+        dict | None: Réponses, ou None si aucun fichier n'existe.
+    """
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            payload = json.load(f)
+        version = payload.get("schema_version")
+        if version != SCHEMA_VERSION:
+            raise ValueError(f"Version de préférences non prise en charge : {version}")
+        return payload["answers"]
+    if path == PREFERENCES_PATH and os.path.exists(LEGACY_PREFERENCES_PATH):
+        with open(LEGACY_PREFERENCES_PATH, "rb") as f:
+            return pickle.load(f)
+    return None
+
+
+class ResultStore:
+    """
+    Historique des optimisations : un dossier par exécution et un index `history.jsonl` en ajout seul.
+
+    Les poids, montants et la covariance de chaque exécution sont des fichiers `.npy` contigus, relus
+    en mémoire projetée ; l'historique permet de retrouver et comparer des exécutions sans les ouvrir.
+    Il est gardé en mémoire, indexé par empreinte des réponses, et seules les lignes ajoutées depuis
+    la dernière lecture sont relues.
+    """
+
+    def __init__(self, root=RESULTS_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+        self._entries = []  # 📌 lignes de l'historique déjà lues
+        self._by_hash = {}  # 📌 empreinte des réponses -> positions dans `_entries`
+        self._offset = 0  # 📌 octets de `history.jsonl` déjà lus
+
+    @property
+    def history_path(self):
+        return os.path.join(self.root, "history.jsonl")
+
+    def _run_dir(self, run_id):
+        return os.path.join(self.root, "runs", run_id)
+
+    def save(self, result, answers, stats=None, frontier=None, telemetry=None, answers_hash=None):
+        """
+        Enregistre une exécution et l'ajoute à l'historique.
+
+        Args:
+            result (OptimizationResult): Résultat de `optimize`.
+            answers (dict): Réponses du questionnaire (budget compris).
+            stats (dict): Statistiques utilisées (instantané des rendements et de la covariance si fourni).
+            frontier (dict): Frontière efficiente de `efficient_frontier`.
+            telemetry (dict): Enregistrement d'instrumentation.
+            answers_hash (str): Empreinte des réponses (`answers_key`).
+
+        Returns:
+            str: Identifiant de l'exécution.
+        """
+        created_at = dt.datetime.now()
+        run_id = f"{created_at:%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}"  # 📌 triable par date
+        weights = np.ascontiguousarray(result.weights, dtype=np.float64)
+        arrays = {"weights": weights, "amounts": weights * float(answers["budget"])}
+        if getattr(result, "dispersion", None) is not None:
+            arrays["weights_dispersion"] = np.asarray(result.dispersion, dtype=np.float64)  # 📌 ré-échantillonnage
+        covariance_kind = None
+        if stats is not None:
+            arrays["mean_returns"] = np.asarray(stats["annualized_returns"], dtype=np.float64)
+            cov = stats["covariance_matrix"]
+            if isinstance(cov, FactorCovariance):
+                # 📌 Modèle factoriel conservé sous forme compacte (O(N·K))
+                covariance_kind = "factor"
+                arrays.update(cov_loadings=cov.loadings, cov_factor_variances=cov.factor_variances,
+                              cov_specific_variances=cov.specific_variances)
+            else:
+                covariance_kind = "dense"
+                arrays["covariance"] = np.asarray(cov, dtype=np.float64)
+        if frontier is not None:
+            arrays.update(frontier_returns=frontier["returns"], frontier_volatilities=frontier["volatilities"],
+                          frontier_weights=frontier["weights"], frontier_success=frontier["success"])
+        arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+
+        meta = {
+            "schema_version": SCHEMA_VERSION,
+            "run_id": run_id,
+            "created_at": created_at.isoformat(timespec="seconds"),
+            "answers_hash": answers_hash,
+            "answers": answers,
+            "tickers": list(result.tickers),
+            "optimization_method": result.method,
+            "solver": result.solver,
+            "success": result.success,
+            "message": result.message,
+            "nit": result.nit,
+            "expected_return": result.expected_return,
+            "expected_volatility": result.expected_volatility,
+            "budget": float(answers["budget"]),
+            "covariance": covariance_kind,
+            "arrays": {name: {"shape": list(array.shape), "dtype": array.dtype.str} for name, array in arrays.items()},
+            "telemetry": telemetry,
+        }
+
+        # 📌 Dossier complet écrit à côté puis renommé : une exécution est visible entière ou pas du tout
+        run_dir = self._run_dir(run_id)
+        tmp_dir = f"{run_dir}.{os.getpid()}.{threading.get_ident()}.tmp"
+        os.makedirs(tmp_dir)
+        try:
+            for name, array in arrays.items():
+                np.save(os.path.join(tmp_dir, f"{name}.npy"), array)
+            _write_json(os.path.join(tmp_dir, "meta.json"), meta)
+            os.replace(tmp_dir, run_dir)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        # 📌 Une ligne par exécution, écrite en un seul appel (ajout seul, jamais réécrit)
+        line = json.dumps({field: meta[field] for field in HISTORY_FIELDS}, ensure_ascii=False, default=float)
+        with self._lock, open(self.history_path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+        return run_id
+
+    def _refresh(self):
+        """ Ajoute à l'index les lignes écrites dans l'historique depuis la dernière lecture (verrou tenu). """
+        size = os.path.getsize(self.history_path) if os.path.exists(self.history_path) else 0
+        if size < self._offset:  # 📌 historique remplacé ou vidé : relecture complète
+            self._entries, self._by_hash, self._offset = [], {}, 0
+        if size == self._offset:
+            return
+        with open(self.history_path, "rb") as f:
+            f.seek(self._offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # 📌 ligne en cours d'écriture par un autre processus : relue au prochain appel
+                self._offset += len(line)
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # 📌 ligne tronquée par une interruption
+                self._by_hash.setdefault(entry.get("answers_hash"), []).append(len(self._entries))
+                self._entries.append(entry)
+
+    def history(self, answers_hash=None, since=None, until=None):
+        """
+        Parcourt l'historique des exécutions, filtré par empreinte des réponses et par date.
+
+        Args:
+            answers_hash (str): Empreinte des réponses (toutes si None).
+            since (str | datetime): Date de début incluse.
+            until (str | datetime): Date de fin incluse.
+
+        Returns:
+            pd.DataFrame: Une ligne par exécution, indexée par `run_id`, de la plus ancienne à la plus récente.
+        """
+        with self._lock:
+            self._refresh()
+            if answers_hash is None:
+                entries = list(self._entries)
+            else:
+                entries = [self._entries[position] for position in self._by_hash.get(answers_hash, [])]
+        frame = pd.DataFrame(entries, columns=list(HISTORY_FIELDS))
+        frame["created_at"] = pd.to_datetime(frame["created_at"])
+        if since is not None:
+            frame = frame[frame["created_at"] >= pd.Timestamp(since)]
+        if until is not None:
+            frame = frame[frame["created_at"] <= pd.Timestamp(until)]
+        return frame.set_index("run_id")
+
+    def latest(self, answers_hash):
+        """ Identifiant de la dernière exécution pour ces réponses, ou None. """
+        runs = self.history(answers_hash=answers_hash)
+        return runs.index[-1] if not runs.empty else None
+
+    def load(self, run_id, mmap=True):
+        """
+        Relit une exécution.
+
+        Args:
+            run_id (str): Identifiant de l'exécution.
+            mmap (bool): Projette les tableaux en mémoire (lecture seule) au lieu de les charger.
+
+        Returns:
+            dict: Métadonnées de `meta.json`, avec les tableaux sous la clé "arrays".
+        """
+        run_dir = self._run_dir(run_id)
+        with open(os.path.join(run_dir, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("schema_version") != SCHEMA_VERSION:
+            raise ValueError(f"Version de résultat non prise en charge : {meta.get('schema_version')}")
+        meta["arrays"] = {name: np.load(os.path.join(run_dir, f"{name}.npy"), mmap_mode="r" if mmap else None)
+                          for name in meta["arrays"]}
+        return meta
+
+    def covariance(self, run):
+        """
+        Covariance enregistrée avec une exécution (dense ou factorielle), ou None.
+
+        Args:
+            run (dict): Exécution relue par `load`.
+        """
+        arrays = run["arrays"]
+        if run["covariance"] == "factor":
+            return FactorCovariance(arrays["cov_loadings"], arrays["cov_factor_variances"],
+                                    arrays["cov_specific_variances"], index=run["tickers"])
+        if run["covariance"] == "dense":
+            return pd.DataFrame(arrays["covariance"], index=run["tickers"], columns=run["tickers"])
+        return None
+
+    def weights(self, run_ids):
+        """
+        Poids de plusieurs exécutions côte à côte (0 pour un actif absent d'une exécution).
+
+        Args:
+            run_ids (list): Identifiants des exécutions.
+
+        Returns:
+            pd.DataFrame: Poids, une ligne par ticker et une colonne par exécution.
+        """
+        columns = {}
+        for run_id in run_ids:
+            run = self.load(run_id)
+            columns[run_id] = pd.Series(np.asarray(run["arrays"]["weights"]), index=run["tickers"])
+        return pd.DataFrame(columns).fillna(0.0)
+
+    def to_results(self, run):
+        """
+        Résultats d'une exécution relue au format des résultats de l'interface (valeurs en %).
+        """
+        arrays = run["arrays"]
+        results = {
+            "expected_return": run["expected_return"] * 100,
+            "expected_volatility": run["expected_volatility"] * 100,
+            "weights": {asset: float(weight) * 100 for asset, weight in zip(run["tickers"], arrays["weights"])},
+            "investment_amounts": {asset: float(amount) for asset, amount in zip(run["tickers"], arrays["amounts"])},
+        }
+        if "weights_dispersion" in arrays:
+            results["weights_dispersion"] = {asset: float(std) * 100 for asset, std
+                                             in zip(run["tickers"], arrays["weights_dispersion"])}
+        if "frontier_success" in arrays:
+            success = np.asarray(arrays["frontier_success"])
+            results["frontier"] = {
+                "returns": np.asarray(arrays["frontier_returns"])[success] * 100,
+                "volatilities": np.asarray(arrays["frontier_volatilities"])[success] * 100,
+            }
+        return results
@@ -0,0 +1,199 @@
+import numpy as np
+import pandas as pd
+
+from instrumentation import span, record_fallback
+
+# 📌 Mesures de risque vectorisées : les rendements de P portefeuilles sont obtenus en un seul produit
+# matriciel (T×N)·(N×P), puis VaR, CVaR, drawdown maximal et ratio de Sortino sont calculés colonne par colonne.
+# Les pertes sont positives (VaR 95 % = 0.02 : 2 % de perte journalière dépassée 5 % du temps).
+# Minimisation de la CVaR par programme linéaire (formulation de Rockafellar-Uryasev, solveur HiGHS creux).
+
+
+def portfolio_returns(returns, weights):
+    """
+    Rendements journaliers de plusieurs portefeuilles.
+
+    Args:
+        returns (pd.DataFrame | np.ndarray): Rendements des actifs (T×N).
+        weights (np.ndarray): Poids (N) ou (P×N).
+
+    Returns:
+        np.ndarray: Rendements des portefeuilles (T×P).
+    """
+    values = np.asarray(returns, dtype=np.float64)
+    return values @ np.atleast_2d(np.asarray(weights, dtype=np.float64)).T
+
+
+def historical_var(port_returns, level=0.95):
+    """ VaR historique (quantile empirique des pertes) de chaque colonne. """
+    return -np.quantile(port_returns, 1 - level, axis=0)
+
+
+def historical_cvar(port_returns, level=0.95):
+    """ CVaR historique : perte moyenne des ⌈(1 - level)·T⌉ pires jours de chaque colonne. """
+    tail = max(1, int(np.ceil((1 - level) * len(port_returns))))
+    worst = np.partition(port_returns, tail - 1, axis=0)[:tail]
+    return -worst.mean(axis=0)
+
+
+def parametric_var(port_returns, level=0.95):
+    """ VaR gaussienne : -(μ + σ·z), avec z le quantile normal d'ordre 1 - level. """
+    from scipy.special import ndtri  # 📌 import différé
+
+    z = ndtri(1 - level)
+    return -(port_returns.mean(axis=0) + port_returns.std(axis=0, ddof=1) * z)
+
+
+def parametric_cvar(port_returns, level=0.95):
+    """ CVaR gaussienne : -μ + σ·φ(z) / (1 - level). """
+    from scipy.special import ndtri  # 📌 import différé
+
+    z = ndtri(1 - level)
+    density = np.exp(-0.5 * z ** 2) / np.sqrt(2 * np.pi)
+    return -port_returns.mean(axis=0) + port_returns.std(axis=0, ddof=1) * density / (1 - level)
+
+
+def max_drawdown(port_returns):
+    """ Baisse maximale depuis un plus haut de la valeur cumulée de chaque colonne (fraction positive). """
+    wealth = np.cumprod(1 + port_returns, axis=0)
+    peaks = np.maximum.accumulate(np.maximum(wealth, 1.0), axis=0)  # 📌 valeur initiale 1 comptée comme plus haut
+    return -(wealth / peaks - 1).min(axis=0)
+
+
+def sortino_ratio(port_returns, risk_free_rate=0.0, periods=252):
+    """
+    Ratio de Sortino annualisé : rendement excédentaire moyen / écart-type des rendements sous le taux sans risque.
+    """
+    excess = port_returns - risk_free_rate / periods
+    downside = np.sqrt(np.mean(np.minimum(excess, 0.0) ** 2, axis=0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(downside > 0, excess.mean(axis=0) / downside * np.sqrt(periods), np.inf)
+
+
+def risk_report(returns, weights, level=0.95, risk_free_rate=0.0, names=None):
+    """
+    Toutes les mesures de risque de plusieurs portefeuilles, en une passe.
+
+    Args:
+        returns (pd.DataFrame | np.ndarray): Rendements journaliers des actifs (T×N).
+        weights (np.ndarray): Poids (N) ou (P×N).
+        level (float): Niveau de confiance de la VaR et de la CVaR.
+        risk_free_rate (float): Taux sans risque annuel (Sortino).
+        names (list): Noms des portefeuilles (index du résultat).
+
+    Returns:
+        pd.DataFrame: Une ligne par portefeuille : VaR et CVaR historiques et gaussiennes (journalières),
+        drawdown maximal, ratio de Sortino et volatilité annualisée.
+    """
+    with span("risk"):
+        port_returns = portfolio_returns(returns, weights)
+        return pd.DataFrame({
+            "historical_var": historical_var(port_returns, level),
+            "historical_cvar": historical_cvar(port_returns, level),
+            "parametric_var": parametric_var(port_returns, level),
+            "parametric_cvar": parametric_cvar(port_returns, level),
+            "max_drawdown": max_drawdown(port_returns),
+            "sortino": sortino_ratio(port_returns, risk_free_rate),
+            "annualized_volatility": port_returns.std(axis=0, ddof=1) * np.sqrt(252),
+        }, index=names)
+
+
+def common_scenarios(returns):
+    """
+    Scénarios utilisables par la minimisation de la CVaR : dates où tous les actifs ont un rendement.
+
+    Avec des historiques inégaux (introductions, radiations, jours manquants), seule la fenêtre commune
+    à tous les actifs est conservée. Si elle est vide, le message nomme l'actif introduit le plus tard
+    et celui dont la cotation s'arrête le plus tôt.
+
+    Args:
+        returns (pd.DataFrame | np.ndarray): Rendements des actifs (T×N), NaN là où un actif ne cote pas.
+
+    Returns:
+        tuple: (rendements des dates complètes (S×N), message d'explication si S = 0, sinon None)
+    """
+    values = np.asarray(returns, dtype=np.float64)
+    valid = ~np.isnan(values)
+    complete = valid.all(axis=1)
+    if complete.any():
+        return values[complete], None
+    if not valid.any(axis=0).all():
+        return values[complete], "Au moins un actif n'a aucun rendement"
+    dates = getattr(returns, "index", np.arange(len(values)))
+    names = list(getattr(returns, "columns", range(values.shape[1])))
+    first = valid.argmax(axis=0)  # 📌 premier et dernier rendement de chaque actif
+    last = len(values) - 1 - valid[::-1].argmax(axis=0)
+    latest, earliest = int(np.argmax(first)), int(np.argmin(last))
+    if first[latest] > last[earliest]:
+        return values[complete], (f"Aucune date où tous les actifs ont un rendement : {names[latest]} n'a de "
+                                  f"rendements qu'à partir du {dates[first[latest]]}, {names[earliest]} s'arrête "
+                                  f"le {dates[last[earliest]]}")
+    return values[complete], ("Aucune date où tous les actifs ont un rendement : chaque date de la fenêtre commune "
+                              "a au moins un rendement manquant")
+
+
+def min_cvar_weights(returns, level, lb, ub, mean_returns=None, target_return=None):
+    """
+    Portefeuille de CVaR historique minimale, par programme linéaire (Rockafellar-Uryasev) :
+
+        min ζ + Σ u_t / ((1 - level)·T)   s.t.   u_t >= -r_t·w - ζ,  u >= 0,  Σ w = 1,  lb <= w <= ub
+        (et μ·w >= rendement cible si fourni).
+
+    La contrainte des T scénarios est une matrice creuse [-R | -1 | -I] : seul le panel de rendements est dense.
+    Avec des historiques inégaux, les scénarios sont restreints aux dates communes à tous les actifs
+    (`common_scenarios`) ; le message indique combien ont été conservés. Il en faut au moins 1 / (1 - level)
+    pour que la queue de distribution contienne un scénario.
+
+    Args:
+        returns (pd.DataFrame | np.ndarray): Rendements journaliers des actifs (T×N), NaN hors historique.
+        level (float): Niveau de confiance.
+        lb, ub (np.ndarray): Bornes des poids.
+        mean_returns (np.ndarray): Rendements attendus (requis si `target_return` est fourni).
+        target_return (float): Rendement cible minimal, ou None.
+
+    Returns:
+        QPResult: `x`, `success`, `message`, `nit`, `cvar` (CVaR journalière), `var` (ζ optimal) et
+        `scenarios` (nombre de dates utilisées).
+    """
+    import scipy.sparse as sp  # 📌 imports différés : SciPy n'est chargé que pour ce solveur
+    from scipy.optimize import linprog
+    from qp_solver import QPResult
+
+    n_rows = len(returns)
+    values, problem = common_scenarios(returns)  # 📌 scénarios complets seulement (historiques inégaux)
+    n_days, n_assets = values.shape
+    min_scenarios = int(np.ceil(1 / (1 - level) - 1e-9))
+    if n_days < min_scenarios:
+        problem = problem or (f"Seulement {n_days} dates où tous les actifs ont un rendement, au moins "
+                              f"{min_scenarios} nécessaires au niveau {level:.0%}")
+        return QPResult(x=None, success=False, nit=0, state=None, multipliers=None, cvar=None, var=None,
+                        scenarios=n_days, message=f"{problem} : la CVaR historique ne peut pas être minimisée "
+                                                  f"sur ces actifs.")
+    if n_days < n_rows:
+        record_fallback("cvar_common_window", scenarios=n_days, rows=n_rows)
+    cost = np.concatenate([np.zeros(n_assets), [1.0], np.full(n_days, 1.0 / ((1 - level) * n_days))])
+
+    A_ub = sp.hstack([sp.csr_matrix(-values), -np.ones((n_days, 1)), -sp.identity(n_days, format="csr")],
+                     format="csr")
+    b_ub = np.zeros(n_days)
+    if target_return is not None:
+        target_row = sp.csr_matrix(np.concatenate([-np.asarray(mean_returns, dtype=np.float64),
+                                                   np.zeros(1 + n_days)]))
+        A_ub = sp.vstack([A_ub, target_row], format="csr")
+        b_ub = np.append(b_ub, -target_return)
+    A_eq = sp.csr_matrix(np.concatenate([np.ones(n_assets), np.zeros(1 + n_days)]))
+    bounds = np.column_stack([
+        np.concatenate([lb, [-np.inf], np.zeros(n_days)]),
+        np.concatenate([ub, [np.inf], np.full(n_days, np.inf)]),
+    ])
+
+    solution = linprog(cost, A_ub=A_ub, b_ub=b_ub, A_eq=A_eq, b_eq=[1.0], bounds=bounds, method="highs")
+    if solution.status != 0:
+        return QPResult(x=None, success=False, nit=int(getattr(solution, "nit", 0) or 0), state=None,
+                        multipliers=None, cvar=None, var=None, scenarios=n_days, message=str(solution.message))
+    message = "Optimisation terminée avec succès"
+    if n_days < n_rows:
+        message += f" ({n_days} dates communes à tous les actifs sur {n_rows})"
+    return QPResult(x=solution.x[:n_assets], success=True, nit=int(getattr(solution, "nit", 0) or 0), state=None,
+                    multipliers=None, cvar=float(solution.fun), var=float(solution.x[n_assets]), scenarios=n_days,
+                    message=message)
@@ -0,0 +1,214 @@
+import numpy as np
+
+from qp_solver import QPResult, project_capped_simplex
+from covariance import as_covariance
+from instrumentation import record_fallback
+
+# 📌 Méthodes de parité de risque, sans solveur d'optimisation générique :
+# - HRP (Hierarchical Risk Parity, López de Prado) : classification hiérarchique sur la distance de corrélation,
+#   puis bissection récursive de l'ordre obtenu, chaque moitié recevant un poids inverse à sa variance ;
+# - ERC (Equal Risk Contribution) : chaque actif contribue également à la variance du portefeuille.
+#   Avec bornes, min ½ w'Σw - λ Σ b_i ln w_i sur la boîte [lb, ub] (Newton projeté) et λ ajusté par
+#   la méthode de Newton pour que Σ w = 1 : les actifs libres ont alors tous la contribution λ·b_i.
+
+
+def _feasible(n, lb, ub):
+    return n * lb <= 1 + 1e-12 and n * ub >= 1 - 1e-12
+
+
+def _dense(cov_matrix):
+    """ Covariance dense (modèle factoriel développé) en float64. """
+    return np.asarray(as_covariance(cov_matrix), dtype=np.float64)
+
+
+def risk_contributions(weights, cov_matrix):
+    """
+    Contributions de chaque actif à la variance du portefeuille (leur somme vaut w'Σw).
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    return weights * (as_covariance(cov_matrix) @ weights)
+
+
+def _inverse_variance_variance(cov, start, stop):
+    """ Variance du portefeuille inverse-variance du segment [start, stop) de la covariance réordonnée. """
+    block = cov[start:stop, start:stop]  # 📌 vue, sans copie
+    weights = 1.0 / np.diag(block)
+    weights /= weights.sum()
+    return weights @ block @ weights
+
+
+def hrp_weights(cov_matrix, min_allocation=0.0, max_allocation=1.0, linkage="single"):
+    """
+    Portefeuille HRP (Hierarchical Risk Parity) respectant les bornes d'allocation.
+
+    À chaque bissection, la part α de la moitié gauche (1 - Var_gauche / (Var_gauche + Var_droite)) est
+    ramenée dans l'intervalle qui permet encore à chaque moitié de respecter les bornes de ses actifs :
+    les poids finaux sont donc toujours dans [min, max].
+
+    Args:
+        cov_matrix (np.ndarray | pd.DataFrame | FactorCovariance): Covariance (N×N).
+        min_allocation (float): Poids minimal par actif (fraction).
+        max_allocation (float): Poids maximal par actif (fraction).
+        linkage (str): Critère de regroupement de `scipy.cluster.hierarchy.linkage`.
+
+    Returns:
+        QPResult: `x`, `success`, `message`, `nit` (nombre de bissections) et `order` (ordre des feuilles).
+    """
+    cov = _dense(cov_matrix)
+    n = len(cov)
+    if not _feasible(n, min_allocation, max_allocation):
+        return QPResult(x=None, success=False, nit=0, state=None, multipliers=None, order=None,
+                        message="Les bornes d'allocation ne permettent pas une somme des poids égale à 1")
+    if n == 1:
+        return QPResult(x=np.ones(1), success=True, nit=0, state=None, multipliers=None, order=np.zeros(1, int),
+                        message="Optimisation terminée avec succès")
+
+    # 📌 Imports différés : SciPy n'est chargé que pour cette méthode
+    from scipy.cluster.hierarchy import linkage as hierarchical_linkage, leaves_list
+    from scipy.spatial.distance import squareform
+
+    std = np.sqrt(np.diag(cov))
+    corr = cov / np.outer(std, std)
+    distance = np.sqrt(np.clip(0.5 * (1.0 - corr), 0.0, None))
+    np.fill_diagonal(distance, 0.0)
+    order = leaves_list(hierarchical_linkage(squareform(distance, checks=False), method=linkage))
+    ordered = cov[np.ix_(order, order)]  # 📌 segments contigus : chaque sous-groupe est une vue
+
+    weights = np.empty(n)
+    clusters = [(0, n, 1.0)]  # 📌 (début, fin, poids total du groupe)
+    splits = 0
+    while clusters:
+        start, stop, total = clusters.pop()
+        if stop - start == 1:
+            weights[start] = total
+            continue
+        middle = (start + stop) // 2
+        left_variance = _inverse_variance_variance(ordered, start, middle)
+        right_variance = _inverse_variance_variance(ordered, middle, stop)
+        alpha = 1.0 - left_variance / (left_variance + right_variance)
+        # 📌 Bornes : n_g·min <= α·total <= n_g·max et n_d·min <= (1 - α)·total <= n_d·max
+        n_left, n_right = middle - start, stop - middle
+        low = max(n_left * min_allocation, total - n_right * max_allocation)
+        high = min(n_left * max_allocation, total - n_right * min_allocation)
+        left_total = min(max(alpha * total, low), high)
+        clusters.append((start, middle, left_total))
+        clusters.append((middle, stop, total - left_total))
+        splits += 1
+
+    result = np.empty(n)
+    result[order] = weights
+    return QPResult(x=result, success=True, nit=splits, state=None, multipliers=None, order=order,
+                    message="Optimisation terminée avec succès")
+
+
+def _box_newton(cov, scale, budgets, lb, ub, w, tol=1e-10, max_iter=100):
+    """
+    Newton projeté pour min ½ w'Σw - scale·Σ b_i ln w_i sur lb <= w <= ub (w > 0).
+
+    Les actifs à une borne dont le gradient pousse vers l'extérieur sont fixés ; le pas de Newton est calculé
+    sur les autres, puis projeté sur la boîte avec recherche linéaire d'Armijo.
+
+    Returns:
+        tuple: (w, nombre d'itérations)
+    """
+    barrier = scale * budgets
+
+    def objective(x):
+        return 0.5 * x @ cov @ x - barrier @ np.log(x)
+
+    value = objective(w)
+    for iteration in range(1, max_iter + 1):
+        gradient = cov @ w - barrier / w
+        fixed = ((w <= lb) & (gradient > 0)) | ((w >= ub) & (gradient < 0))
+        free = ~fixed
+        if np.max(np.abs(gradient[free]), initial=0.0) <= tol * np.max(barrier / w):
+            return w, iteration
+        hessian = cov[np.ix_(free, free)]
+        hessian[np.diag_indices_from(hessian)] += barrier[free] / w[free] ** 2
+        direction = np.zeros_like(w)
+        direction[free] = -np.linalg.solve(hessian, gradient[free])
+        # 📌 Chaque pas réduit un poids d'au plus 99 % (le logarithme garde w > 0 quand lb = 0)
+        floor = np.maximum(lb, 0.01 * w)
+        step = 1.0
+        while True:
+            trial = np.clip(w + step * direction, floor, ub)
+            trial_value = objective(trial)
+            if trial_value <= value + 1e-4 * gradient @ (trial - w) or step < 1e-10:
+                break
+            step *= 0.5
+        if np.max(np.abs(trial - w)) <= 1e-15 * max(1.0, np.max(w)):
+            return trial, iteration
+        w, value = trial, trial_value
+    return w, max_iter
+
+
+def erc_weights(cov_matrix, min_allocation=0.0, max_allocation=1.0, budgets=None, tol=1e-10, max_iter=50):
+    """
+    Portefeuille ERC (Equal Risk Contribution) respectant les bornes d'allocation.
+
+    Sans borne active, toutes les contributions au risque w_i·(Σw)_i sont égales (à b_i près si des budgets
+    de risque sont fournis) ; les actifs bloqués à une borne s'en écartent et les autres restent égaux entre eux.
+
+    Args:
+        cov_matrix (np.ndarray | pd.DataFrame | FactorCovariance): Covariance (N×N).
+        min_allocation (float): Poids minimal par actif (fraction).
+        max_allocation (float): Poids maximal par actif (fraction).
+        budgets (np.ndarray): Budgets de risque b (somme 1), égaux si None.
+        tol (float): Tolérance sur la somme des poids et le gradient.
+        max_iter (int): Nombre maximal d'ajustements de λ.
+
+    Returns:
+        QPResult: `x`, `success`, `message` et `nit` (itérations de Newton cumulées). Si λ n'est pas trouvé en
+        `max_iter` ajustements, `success` est faux et `x` contient les poids projetés sur les bornes.
+    """
+    cov = _dense(cov_matrix)
+    n = len(cov)
+    if not _feasible(n, min_allocation, max_allocation):
+        return QPResult(x=None, success=False, nit=0, state=None, multipliers=None,
+                        message="Les bornes d'allocation ne permettent pas une somme des poids égale à 1")
+    budgets = np.full(n, 1.0 / n) if budgets is None else np.asarray(budgets, dtype=np.float64) / np.sum(budgets)
+    lb, ub = np.full(n, float(min_allocation)), np.full(n, float(max_allocation))
+
+    # 📌 Départ : portefeuille inverse-volatilité et λ = w'Σw (valeur exacte sans bornes pour des budgets égaux)
+    w = 1.0 / np.sqrt(np.diag(cov))
+    w /= w.sum()
+    scale = w @ cov @ w
+    w = np.clip(w, np.maximum(lb, 1e-12), ub)
+
+    newton_steps = 0
+    bracket = {}  # 📌 λ donnant une somme des poids < 1 ("low") et > 1 ("high")
+    for _ in range(max_iter):
+        w, steps = _box_newton(cov, scale, budgets, lb, ub, w, tol=tol)
+        newton_steps += steps
+        total = w.sum()
+        if abs(total - 1.0) <= tol:
+            # 📌 Somme exacte par projection (une division pourrait sortir des bornes)
+            return QPResult(x=project_capped_simplex(w, lb, ub), success=True, nit=newton_steps, state=None,
+                            multipliers=None, message="Optimisation terminée avec succès")
+        bracket["low" if total < 1 else "high"] = scale
+
+        # 📌 Newton sur λ : sensibilité des poids libres dérivée de la condition d'optimalité Σw = λ·b / w,
+        # soit (Σ + diag(λ·b / w²)) dw/dλ = b / w
+        free = (w > lb) & (w < ub)
+        slope = np.zeros(n)
+        if free.any():
+            hessian = cov[np.ix_(free, free)]
+            hessian[np.diag_indices_from(hessian)] += scale * budgets[free] / w[free] ** 2
+            slope[free] = np.linalg.solve(hessian, budgets[free] / w[free])
+        derivative = slope.sum()
+        new_scale = scale + (1.0 - total) / derivative if derivative > 0 else np.nan
+        if "low" in bracket and "high" in bracket:
+            low, high = bracket["low"], bracket["high"]
+            if not low < new_scale < high:
+                new_scale = 0.5 * (low + high)  # 📌 repli par dichotomie
+        elif not new_scale > 0:
+            new_scale = scale * (4.0 if total < 1 else 0.25)
+        w = np.clip(w + (new_scale - scale) * slope, np.maximum(lb, 0.01 * w), ub)
+        scale = new_scale
+
+    # 📌 Bornes presque saturées (λ sans effet sur la somme) : poids projetés sur le simplexe borné,
+    # renvoyés pour information mais signalés en échec (les contributions ne sont pas égales)
+    record_fallback("erc_projection", total=float(w.sum()), iterations=max_iter)
+    return QPResult(x=project_capped_simplex(w, lb, ub), success=False, nit=newton_steps, state=None,
+                    multipliers=None, message=f"Contributions égales non atteignables avec ces bornes après "
+                                              f"{max_iter} itérations : poids projetés sur les bornes")
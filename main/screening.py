@@ -0,0 +1,216 @@
+import numpy as np
+
+from qp_solver import QPResult, AT_LOWER, solve_qp
+from covariance import as_covariance, covariance_block, covariance_diagonal
+from instrumentation import span, record_fallback
+
+# 📌 Pré-sélection de l'univers avant l'optimisation (grands univers, liste du S&P 500) :
+# 1. indicateurs vectorisés par actif : ratio de Sharpe isolé, volatilité, longueur d'historique (liquidité) ;
+# 2. regroupement par corrélation autour de meneurs choisis de proche en proche (O(N·K), sans matrice N×N) ;
+# 3. les meilleurs actifs de chaque groupe forment les candidats, seuls optimisés ; les autres restent à
+#    l'allocation minimale ;
+# 4. vérification sur tout l'univers : un actif écarté dont le coût réduit est négatif (il entrerait dans la
+#    solution) rejoint les candidats et le QP est relancé. La solution finale est celle du problème complet.
+
+
+def rank_scores(values, ascending=False):
+    """ Rang normalisé dans [0, 1] (1 = meilleur), valeurs manquantes classées en dernier. """
+    values = np.where(np.isfinite(values), values, np.inf if ascending else -np.inf)
+    order = np.argsort(values if ascending else -values, kind="stable")
+    ranks = np.empty(len(values))
+    ranks[order] = np.arange(len(values))
+    return 1.0 - ranks / max(len(values) - 1, 1)
+
+
+def correlation_clusters(cov_matrix, scores, threshold=0.7, max_clusters=None):
+    """
+    Regroupe les actifs autour de meneurs : le meilleur actif non encore couvert (corrélation < `threshold`
+    avec tous les meneurs) devient meneur, puis chaque actif rejoint le meneur le plus corrélé.
+
+    Args:
+        cov_matrix (np.ndarray | FactorCovariance): Covariance (N×N).
+        scores (np.ndarray): Score de chaque actif (meneurs choisis par score décroissant).
+        threshold (float): Corrélation au-delà de laquelle un actif est couvert par un meneur.
+        max_clusters (int): Nombre maximal de groupes.
+
+    Returns:
+        tuple: (meneurs (K), groupe de chaque actif (N))
+    """
+    cov = as_covariance(cov_matrix)
+    n = len(scores)
+    max_clusters = max_clusters or n
+    std = np.sqrt(covariance_diagonal(cov))
+    every = np.arange(n)
+    best_correlation = np.full(n, -np.inf)  # 📌 corrélation maximale avec un meneur
+    cluster = np.zeros(n, dtype=np.int64)
+    leaders = []
+    order = np.argsort(-scores, kind="stable")
+    for candidate in order:
+        if len(leaders) >= max_clusters:
+            break
+        if best_correlation[candidate] >= threshold:
+            continue
+        # 📌 une colonne de covariance par meneur : O(N) (O(N·K) pour un modèle factoriel)
+        correlation = covariance_block(cov, every, [candidate])[:, 0] / (std * std[candidate])
+        closer = correlation > best_correlation
+        cluster[closer] = len(leaders)
+        best_correlation[closer] = correlation[closer]
+        leaders.append(candidate)
+    return np.asarray(leaders), cluster
+
+
+def screen_universe(stats, max_candidates, risk_free_rate=0.0, min_allocation=0.0, max_allocation=1.0,
+                    threshold=0.7):
+    """
+    Choisit les actifs candidats à l'optimisation.
+
+    Score d'un actif : moyenne des rangs de son ratio de Sharpe isolé, de sa volatilité (faible en tête :
+    les méthodes de variance minimale s'y intéressent d'abord) et de la longueur de son historique.
+    Les candidats sont répartis entre les groupes de corrélation au prorata de leur taille, puis
+    complétés par les meilleurs rendements (rendement cible atteignable).
+
+    Args:
+        stats (dict): Statistiques de `calculate_statistics` (sans "annualized_volatility", les volatilités
+            sont tirées de la diagonale de la covariance, par exemple pour l'exécution par lots).
+        max_candidates (int): Nombre visé de candidats.
+        risk_free_rate (float): Taux sans risque (fraction).
+        min_allocation, max_allocation (float): Bornes d'allocation (nombre minimal de candidats réalisable).
+        threshold (float): Corrélation de regroupement.
+
+    Returns:
+        np.ndarray: Indices triés des candidats.
+    """
+    mu = np.asarray(stats["annualized_returns"], dtype=np.float64)
+    cov = as_covariance(stats["covariance_matrix"])
+    n = len(mu)
+    # 📌 Assez de candidats pour que Σ w = 1 reste atteignable, les autres actifs restant au minimum
+    needed = int(np.ceil((1 - n * min_allocation) / max(max_allocation - min_allocation, 1e-12) - 1e-9))
+    max_candidates = min(n, max(int(max_candidates), needed, 1))
+
+    with span("screening"):
+        volatility = stats.get("annualized_volatility")
+        if volatility is None:
+            volatility = np.sqrt(covariance_diagonal(cov) * stats.get("periods", 252))
+        volatility = np.asarray(volatility, dtype=np.float64)
+        returns = stats.get("returns")
+        history = (np.isfinite(np.asarray(returns, dtype=np.float64)).sum(axis=0) if returns is not None
+                   else np.ones(n))
+        scores = (rank_scores((mu - risk_free_rate) / volatility) + rank_scores(volatility, ascending=True)
+                  + rank_scores(history)) / 3
+
+        leaders, cluster = correlation_clusters(cov, scores, threshold, max_clusters=max_candidates)
+        sizes = np.bincount(cluster, minlength=len(leaders))
+        quotas = np.maximum(1, np.floor(sizes * max_candidates / n)).astype(np.int64)
+
+        # 📌 Rang de chaque actif dans son groupe (scores décroissants), sans boucle par groupe
+        order = np.lexsort((-scores, cluster))
+        starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+        rank_in_cluster = np.empty(n, dtype=np.int64)
+        rank_in_cluster[order] = np.arange(n) - starts[cluster[order]]
+        selected = rank_in_cluster < quotas[cluster]
+        if selected.sum() > max_candidates:
+            # 📌 Quota minimal d'un actif par groupe : trop de petits groupes, tête de chaque groupe d'abord
+            order = np.lexsort((-scores, rank_in_cluster))
+            kept = order[selected[order]][:max_candidates]
+            selected[:] = False
+            selected[kept] = True
+
+        # 📌 Complément : moitié par meilleurs rendements (rendement cible), le reste par meilleurs scores
+        missing = max_candidates - int(selected.sum())
+        for ranking, count in ((np.argsort(-mu, kind="stable"), (missing + 1) // 2),
+                               (np.argsort(-scores, kind="stable"), missing)):
+            count = min(count, max_candidates - int(selected.sum()))
+            if count > 0:
+                selected[ranking[~selected[ranking]][:count]] = True
+    return np.flatnonzero(selected)
+
+
+def screened_min_variance(cov_matrix, lb, ub, candidates, mean_returns=None, target_return=None, state=None,
+                          tol=1e-9, max_rounds=50):
+    """
+    Variance minimale (éventuellement à rendement cible) résolue sur les candidats, les autres actifs étant
+    fixés à leur borne basse, puis vérifiée sur tout l'univers.
+
+    Le QP des candidats C reçoit le terme linéaire Σ_CE·w_E des actifs écartés E. À l'optimum, un actif écarté
+    reste à sa borne basse si son coût réduit (Σw)_j + y_0 + y_1·μ_j est positif (conditions KKT du problème
+    complet) ; sinon il rejoint les candidats et le QP repart de l'ensemble actif précédent.
+
+    Args:
+        cov_matrix (np.ndarray | FactorCovariance): Covariance (N×N).
+        lb, ub (np.ndarray): Bornes des poids (N).
+        candidates (np.ndarray): Indices des candidats de départ.
+        mean_returns (np.ndarray): Rendements attendus (requis si `target_return` est fourni).
+        target_return (float): Rendement cible, ou None.
+        state (np.ndarray): Ensemble actif du problème complet (démarrage à chaud) : ses actifs libres ou
+            à la borne haute sont ajoutés aux candidats.
+        tol (float): Tolérance relative sur les coûts réduits.
+        max_rounds (int): Nombre maximal de vérifications.
+
+    Returns:
+        QPResult: `x` et `state` sur tout l'univers, `success`, `message`, `nit` (itérations QP cumulées),
+        `multipliers`, `candidates` (taille finale de l'ensemble optimisé) et `rounds`.
+    """
+    cov = as_covariance(cov_matrix)
+    lb = np.asarray(lb, dtype=np.float64)
+    ub = np.asarray(ub, dtype=np.float64)
+    n = len(lb)
+    mu = np.asarray(mean_returns, dtype=np.float64) if mean_returns is not None else None
+    selected = np.zeros(n, dtype=bool)
+    selected[candidates] = True
+    full_state = None
+    if state is not None and len(state) == n:
+        full_state = np.asarray(state, dtype=np.int8)
+        selected |= full_state != AT_LOWER
+
+    iterations, sub_state = 0, None
+    for rounds in range(1, max_rounds + 1):
+        chosen = np.flatnonzero(selected)
+        excluded = np.flatnonzero(~selected)
+        w = lb.copy()
+        # 📌 Contribution des actifs écartés (fixés à la borne basse) au gradient et aux égalités
+        c = covariance_block(cov, chosen, excluded) @ lb[excluded] if len(excluded) else np.zeros(len(chosen))
+        A, b = np.ones((1, len(chosen))), np.array([1.0 - lb[excluded].sum()])
+        if target_return is not None:
+            A = np.vstack([A, mu[chosen]])
+            b = np.append(b, target_return - mu[excluded] @ lb[excluded])
+        if sub_state is None and full_state is not None:
+            sub_state = full_state[chosen]
+        result = solve_qp(covariance_block(cov, chosen, chosen), A, b, lb[chosen], ub[chosen], c=c, state=sub_state)
+        iterations += result.nit
+        if not result.success:
+            if not len(excluded):
+                return QPResult(x=None, success=False, nit=iterations, state=None, multipliers=None,
+                                candidates=len(chosen), rounds=rounds, message=result.message)
+            # 📌 Candidats insuffisants (bornes ou rendement cible) : ensemble doublé par les meilleurs rendements
+            # des actifs écartés (l'univers complet au pire après log2(N / |C|) tours)
+            record_fallback("screening_infeasible", candidates=len(chosen))
+            ranking = excluded[np.argsort(-mu[excluded], kind="stable")] if mu is not None else excluded
+            selected[ranking[:len(chosen)]] = True
+            sub_state = None
+            continue
+
+        w[chosen] = result.x
+        if not len(excluded):
+            break
+        # 📌 Vérification KKT sur les actifs écartés : coût réduit négatif -> l'actif entrerait dans la solution
+        gradient = covariance_block(cov, excluded, np.arange(n)) @ w
+        reduced = gradient + result.multipliers[0]
+        if target_return is not None:
+            reduced = reduced + result.multipliers[1] * mu[excluded]
+        entering = excluded[reduced < -tol * (1 + np.abs(reduced).max())]
+        if not len(entering):
+            break
+        selected[entering] = True
+        # 📌 Démarrage à chaud : ensemble actif précédent, nouveaux candidats à leur borne basse
+        previous = dict(zip(chosen, result.state))
+        sub_state = np.array([previous.get(i, AT_LOWER) for i in np.flatnonzero(selected)], dtype=np.int8)
+    else:
+        return QPResult(x=None, success=False, nit=iterations, state=None, multipliers=None,
+                        candidates=int(selected.sum()), rounds=max_rounds,
+                        message=f"Vérification de la pré-sélection non conclue après {max_rounds} tours")
+
+    full = np.full(n, AT_LOWER, dtype=np.int8)
+    full[chosen] = result.state
+    return QPResult(x=w, success=True, nit=iterations, state=full, multipliers=result.multipliers,
+                    candidates=len(chosen), rounds=rounds,
+                    message=f"Optimisation terminée avec succès ({len(chosen)} candidats sur {n} actifs)")
@@ -0,0 +1,44 @@
+import numpy as np
+from multiprocessing import shared_memory
+
+# 📌 Tableaux NumPy en mémoire partagée : les processus du pool lisent les matrices de covariance
+# (et panels de rendements) sans qu'elles soient sérialisées pour chaque tâche.
+
+
+def share_array(array):
+    """
+    Copie un tableau dans un segment de mémoire partagée.
+
+    Args:
+        array (np.ndarray): Tableau à partager.
+
+    Returns:
+        tuple: (SharedMemory à fermer et libérer par l'appelant, descripteur (nom, forme, dtype) à transmettre)
+    """
+    array = np.ascontiguousarray(array)
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+    return shm, (shm.name, array.shape, array.dtype.str)
+
+
+def attach_array(descriptor):
+    """
+    Ouvre un tableau partagé depuis son descripteur (sans copie).
+
+    Returns:
+        tuple: (SharedMemory à garder ouvert tant que la vue est utilisée, vue np.ndarray en lecture seule)
+    """
+    name, shape, dtype = descriptor
+    shm = shared_memory.SharedMemory(name=name)
+    view = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+    view.flags.writeable = False
+    return shm, view
+
+
+def release(segments):
+    """
+    Ferme et libère des segments créés par `share_array`.
+    """
+    for shm in segments:
+        shm.close()
+        shm.unlink()
@@ -1,153 +1,258 @@
-import os
-import pickle
 import sys
 import subprocess
-import yfinance as yf
+import numpy as np
 import pandas as pd
 
-# 📌 Définition des chemins de fichiers
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # Chemin absolu du script en cours
-DATA_DIR = os.path.join(BASE_DIR, "../data")  # Accès au dossier `data`
-ANSWERS_FILE = os.path.join(DATA_DIR, "answers.pkl")  # 📌 Nouveau fichier contenant toutes les réponses utilisateur
+from price_store import PriceStore
+from covariance import factor_covariance, ledoit_wolf_covariance, pairwise_covariance
+from instrumentation import span
+from result_store import PREFERENCES_PATH, load_preferences
+
+# 📌 Fréquences des statistiques : règle de rééchantillonnage des rendements journaliers, périodes par an
+FREQUENCIES = {
+    "daily": (None, 252),
+    "weekly": ("W-FRI", 52),
+    "monthly": ("ME", 12),
+}
+
+
+class StatisticsResult(dict):
+    """
+    Statistiques des actifs : dictionnaire aux clés de `calculate_statistics` (accepté tel quel par
+    `optimize`), lisible aussi par attribut.
+    """
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    @property
+    def correlation(self):
+        """ Matrice de corrélation, déduite de la covariance et des volatilités (sans nouveau passage). """
+        cov = np.asarray(self["covariance_matrix"])  # 📌 modèle factoriel formé en dense
+        volatility = self["volatility"].to_numpy()
+        scale = np.where(volatility > 0, volatility, np.nan)
+        return pd.DataFrame(cov / np.outer(scale, scale), index=self["volatility"].index,
+                            columns=self["volatility"].index)
 
 def load_user_answers():
     """
-    Charge les réponses utilisateur depuis `answers.pkl` pour extraire les tickers et autres paramètres.
+    Charge les réponses utilisateur depuis `answers.json` pour extraire les tickers et autres paramètres.
     
     Returns:
         dict: Dictionnaire contenant toutes les réponses de l'utilisateur.
     """
     try:
-        if not os.path.exists(ANSWERS_FILE):
-            print(f"❌ Fichier introuvable : '{ANSWERS_FILE}'\nAssurez-vous que les réponses ont bien été enregistrées depuis `interface.py`.")
-            return None
-        with open(ANSWERS_FILE, "rb") as f:
-            user_answers = pickle.load(f)
+        user_answers = load_preferences()
+        if user_answers is None:
+            print(f"❌ Fichier introuvable : '{PREFERENCES_PATH}'\nAssurez-vous que les réponses ont bien été enregistrées depuis `interface.py`.")
         return user_answers
     except Exception as e:
         print(f"❌ Erreur lors du chargement des réponses utilisateur : {e}")
         return None
 
-# 📌 Chargement des réponses utilisateur
-user_answers = load_user_answers()
-if not user_answers:
-    print("❌ Impossible de récupérer les réponses utilisateur.")
-    exit()
-
-# 📌 Extraction des tickers validés
-tickers_selected = user_answers.get("tickers", [])
-if not tickers_selected:
-    print("❌ Aucun ticker validé dans `answers.pkl`.")
-    exit()
-
-print("\n✅ Tickers validés par l'utilisateur :")
-print(tickers_selected)
-
-def download_data(tickers, period="5y", interval="1d"):
+def download_data(tickers, period="5y", interval="1d", store=None, dropna=True):
     """
-    Télécharge les données financières des tickers sélectionnés.
+    Récupère les prix ajustés des tickers sélectionnés via le stockage local des prix.
+
+    Seules les barres postérieures à la dernière barre stockée sont téléchargées.
     
     Args:
         tickers (list): Liste des tickers.
         period (str): Période d'historique ("1y", "5y", "max").
         interval (str): Intervalle des données ("1d", "1wk").
+        store (PriceStore): Stockage des prix (stockage par défaut dans `data/prices` si None).
+        dropna (bool): Ne garde que les dates où tous les tickers cotent ; sinon l'historique complet
+            de chaque ticker est conservé (NaN avant son introduction ou après sa radiation).
     
     Returns:
         pd.DataFrame: Prix ajustés des tickers.
     """
     try:
-        data = yf.download(tickers, period=period, interval=interval, group_by="ticker")
-
-        # 📌 Vérifier si 'Adj Close' est dans le DataFrame multi-indexé
-        if isinstance(data.columns, pd.MultiIndex):
-            try:
-                adj_close = data.xs("Adj Close", level=1, axis=1)
-                print("✅ 'Adj Close' extrait depuis MultiIndex.")
-            except KeyError:
-                print("⚠️ 'Adj Close' absent du MultiIndex. Vérification de 'Close'.")
-                adj_close = data.xs("Close", level=1, axis=1)
-        elif "Adj Close" in data:
-            adj_close = data["Adj Close"]
-            print("✅ 'Adj Close' trouvé !")
-        elif "Close" in data:
-            adj_close = data["Close"]
-            print("⚠️ 'Adj Close' introuvable. Utilisation de 'Close'.")
-        else:
+        store = store if store is not None else PriceStore()
+        with span("download"):
+            adj_close = store.get_prices(tickers, period=period, interval=interval)
+
+        # 📌 Un ticker sans données est écarté au lieu de vider tout le panel au `dropna`
+        missing = [ticker for ticker in tickers if ticker not in adj_close or adj_close[ticker].isna().all()]
+        if missing:
+            print(f"⚠️ Aucune donnée pour : {missing}. Tickers ignorés.")
+            adj_close = adj_close.drop(columns=[ticker for ticker in missing if ticker in adj_close])
+        if adj_close.empty:
             print("❌ Aucune donnée 'Adj Close' ou 'Close' disponible.")
             return None
 
+        if not dropna:
+            return adj_close.dropna(how="all")  # 📌 historiques de longueurs différentes conservés
         return adj_close.dropna()  # Supprime les lignes avec NaN
 
     except Exception as e:
         print(f"❌ Erreur lors du téléchargement des données : {e}")
         return None
 
-def calculate_returns(data):
+def calculate_returns(data, dropna=True):
     """
     Calcule les rendements journaliers des actifs.
 
     Args:
         data (pd.DataFrame): Données des prix ajustés.
+        dropna (bool): Supprime les dates où un rendement manque ; sinon NaN conservés par actif.
 
     Returns:
         pd.DataFrame: Rendements journaliers.
     """
-    return data.pct_change().dropna()
+    with span("returns"):
+        if not dropna:
+            return data.pct_change(fill_method=None).iloc[1:].dropna(how="all")
+        return data.pct_change().dropna()
+
+def resample_returns(returns, frequency):
+    """
+    Rendements hebdomadaires ou mensuels composés à partir des rendements journaliers (sans nouveau
+    téléchargement).
+
+    Une période n'a de rendement que si l'actif en a un pour chacun de ses jours de bourse.
 
-def calculate_statistics(returns):
+    Args:
+        returns (pd.DataFrame): Rendements journaliers (NaN acceptés).
+        frequency (str): "daily", "weekly" ou "monthly".
+
+    Returns:
+        pd.DataFrame: Rendements de la fréquence demandée.
+    """
+    if frequency not in FREQUENCIES:
+        raise ValueError(f"Fréquence inconnue : '{frequency}'")
+    rule, _ = FREQUENCIES[frequency]
+    if rule is None:
+        return returns
+    with span("resample"):
+        growth = np.log1p(returns).resample(rule).sum()
+        missing = returns.isna().resample(rule).sum()
+        days = returns.resample(rule).size()
+        complete = missing.eq(0) & (days > 0).to_numpy()[:, None]  # 📌 périodes vides écartées
+        return np.expm1(growth.where(complete)).dropna(how="all")
+
+def calculate_statistics(returns, covariance="sample", n_factors=10, frequency="daily"):
     """
     Calcule les rendements moyens, la volatilité et la matrice de covariance.
 
+    Noyau fusionné : les rendements sont centrés une seule fois et la covariance empirique est un unique
+    produit matriciel, dont la diagonale donne les volatilités.
+
     Args:
-        returns (pd.DataFrame): Rendements journaliers.
+        returns (pd.DataFrame): Rendements de la fréquence `frequency`.
+        covariance (str): "sample" (empirique), "shrinkage" (Ledoit-Wolf), "factor" (ACP à K facteurs)
+            ou "pairwise" (paires d'observations complètes, pour des rendements contenant des NaN ; noyau
+            empirique si le panel est complet).
+        n_factors (int): Nombre de facteurs du modèle factoriel.
+        frequency (str): Fréquence des rendements ("daily", "weekly", "monthly"), pour l'annualisation.
 
     Returns:
-        dict: Contient les rendements moyens, volatilité et covariance.
+        StatisticsResult: Contient les rendements moyens, volatilité et covariance, ainsi que le panel de
+        rendements (scénarios historiques de la minimisation de la CVaR), la fréquence, le nombre de périodes
+        par an et le nombre d'observations.
     """
-    mean_returns = returns.mean()  # 📌 Rendement moyen journalier
-    annualized_returns = mean_returns * 252  # 📌 Conversion en rendement annuel
-    
-    volatility = returns.std()  # 📌 Volatilité journalière
-    annualized_volatility = volatility * (252 ** 0.5)  # 📌 Conversion en volatilité annuelle
+    if frequency not in FREQUENCIES:
+        raise ValueError(f"Fréquence inconnue : '{frequency}'")
+    periods = FREQUENCIES[frequency][1]
+    tickers = returns.columns
+    values = returns.to_numpy(dtype=np.float64)
+    if covariance == "pairwise" and not np.isnan(values).any():
+        covariance = "sample"  # 📌 panel complet : mêmes paires partout, produit matriciel unique et exactement SDP
+
+    with span("moments"):
+        if covariance == "pairwise":
+            mean = np.nanmean(values, axis=0)  # 📌 Rendement moyen de chaque historique complet
+        else:
+            mean = values.mean(axis=0)  # 📌 Rendement moyen journalier
+            centered = values - mean
+
+    # 📌 Matrice de covariance des rendements
+    with span("covariance"):
+        if covariance == "factor":
+            cov_matrix = factor_covariance(returns, n_factors)  # 📌 Stockage O(N·K) au lieu de O(N²)
+            variances = np.einsum("ij,ij->j", centered, centered) / (len(values) - 1)
+        elif covariance == "shrinkage":
+            cov_matrix, _ = ledoit_wolf_covariance(returns)
+            variances = np.einsum("ij,ij->j", centered, centered) / (len(values) - 1)
+        elif covariance == "pairwise":
+            cov_matrix = pairwise_covariance(returns)  # 📌 la correction conserve la diagonale
+            variances = np.diag(cov_matrix.to_numpy())
+        elif covariance == "sample":
+            sample = centered.T @ centered  # 📌 seul produit matriciel du noyau
+            sample /= len(values) - 1
+            cov_matrix = pd.DataFrame(sample, index=tickers, columns=tickers, copy=False)
+            variances = np.diag(sample)
+        else:
+            raise ValueError(f"Type de covariance inconnu : '{covariance}'")
 
-    cov_matrix = returns.cov()  # 📌 Matrice de covariance des rendements journaliers
+    mean_returns = pd.Series(mean, index=tickers)
+    volatility = pd.Series(np.sqrt(variances), index=tickers)
+    return StatisticsResult(
+        mean_returns=mean_returns,
+        annualized_returns=mean_returns * periods,  # 📌 Conversion en rendement annuel
+        volatility=volatility,
+        annualized_volatility=volatility * (periods ** 0.5),  # 📌 Conversion en volatilité annuelle
+        covariance_matrix=cov_matrix,
+        returns=returns,
+        frequency=frequency,
+        periods=periods,
+        observations=len(values),
+    )
 
-    return {
-        "mean_returns": mean_returns,
-        "annualized_returns": annualized_returns,
-        "volatility": volatility,
-        "annualized_volatility": annualized_volatility,
-        "covariance_matrix": cov_matrix
-    }
+# 📌 Libellés de l'affichage selon la fréquence (rendements, volatilité)
+FREQUENCY_LABELS = {
+    "daily": ("Journaliers", "Journalière"),
+    "weekly": ("Hebdomadaires", "Hebdomadaire"),
+    "monthly": ("Mensuels", "Mensuelle"),
+}
 
-def analyze_portfolio():
+def analyze_portfolio(tickers=None, store=None, frequency="daily", quiet=False):
     """
-    Récupère les tickers validés, télécharge les données et calcule les statistiques.
+    Télécharge les données des tickers et calcule les statistiques.
+
+    Args:
+        tickers (list): Liste des tickers (tickers validés dans `answers.json` si None).
+        store (PriceStore): Stockage des prix (stockage par défaut si None).
+        frequency (str): "daily", "weekly" ou "monthly" (rééchantillonnage des rendements journaliers).
+        quiet (bool): Renvoie les statistiques sans les afficher.
+
+    Returns:
+        StatisticsResult: Statistiques des actifs (corrélation comprise), ou None en cas d'échec.
     """
-    tickers = tickers_selected  # On utilise directement les tickers de `answers.pkl`
+    if tickers is None:
+        user_answers = load_user_answers()
+        tickers = user_answers.get("tickers", []) if user_answers else []
     if not tickers:
+        print("❌ Aucun ticker validé.")
         return
 
-    print(f"📌 Tickers sélectionnés : {tickers}")
+    if not quiet:
+        print(f"📌 Tickers sélectionnés : {tickers}")
 
-    # 📌 Télécharger les prix ajustés des tickers
-    data = download_data(tickers)
+    # 📌 Télécharger les prix ajustés journaliers des tickers (historique complet de chacun)
+    data = download_data(tickers, store=store, dropna=False)
     if data is None or data.empty:
         print("❌ Échec de la récupération des données.")
         return
 
-    # 📌 Calcul des rendements et statistiques
-    returns = calculate_returns(data)
-    stats = calculate_statistics(returns)
+    # 📌 Calcul des rendements et statistiques (autres fréquences rééchantillonnées depuis le journalier)
+    returns = resample_returns(calculate_returns(data, dropna=False), frequency)
+    stats = calculate_statistics(returns, covariance="pairwise", frequency=frequency)
+    if quiet:
+        return stats
 
     # 📌 Affichage des résultats
-    print("\n📈 **Rendements Moyens Journaliers**")
+    returns_label, volatility_label = FREQUENCY_LABELS[frequency]
+    print(f"\n📈 **Rendements Moyens {returns_label}**")
     print(stats["mean_returns"])
 
     print("\n📈 **Rendements Moyens Annuels**")
     print(stats["annualized_returns"])
 
-    print("\n📊 **Volatilité Journalière**")
+    print(f"\n📊 **Volatilité {volatility_label}**")
     print(stats["volatility"])
 
     print("\n📊 **Volatilité Annuelle**")
@@ -156,14 +261,31 @@ def analyze_portfolio():
     print("\n🔄 **Matrice de Covariance**")
     print(stats["covariance_matrix"])
 
-    # 📌 Matrice de corrélation
-    corr_matrix = returns.corr()
-
     print("\n🔄 **Matrice de Corrélation**")
-    print(corr_matrix)
+    print(stats.correlation)
 
     return stats  # Renvoie les statistiques pour `portfolio_optimizer.py`
 
+def main():
+    """
+    Point d'entrée en ligne de commande : analyse les tickers validés dans `answers.json`.
+    """
+    user_answers = load_user_answers()
+    if not user_answers:
+        print("❌ Impossible de récupérer les réponses utilisateur.")
+        sys.exit(1)
+
+    # 📌 Extraction des tickers validés
+    tickers_selected = user_answers.get("tickers", [])
+    if not tickers_selected:
+        print("❌ Aucun ticker validé dans `answers.json`.")
+        sys.exit(1)
+
+    print("\n✅ Tickers validés par l'utilisateur :")
+    print(tickers_selected)
+
+    analyze_portfolio(tickers_selected)
+
 # 📌 Exécuter l'analyse si ce script est lancé directement
 if __name__ == "__main__":
-    analyze_portfolio()
\ No newline at end of file
+    main()
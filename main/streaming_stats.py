@@ -0,0 +1,315 @@
+import numpy as np
+import pandas as pd
+
+# 📌 Statistiques incrémentales (Welford / co-moments) sur une fenêtre glissante :
+# chaque nouvelle barre coûte O(N²) au lieu de recalculer O(T·N²) sur tout l'historique.
+# `RollingStatistics` parcourt toutes les fenêtres d'un historique par sommes glissantes (O(T·N²) au total).
+
+
+def _statistics(mean, covariance, tickers):
+    """ Dictionnaire au format de `calculate_statistics` à partir des moments journaliers. """
+    mean_returns = pd.Series(mean, index=tickers)
+    volatility = pd.Series(np.sqrt(np.diag(covariance)), index=tickers)
+    return {
+        "mean_returns": mean_returns,
+        "annualized_returns": mean_returns * 252,
+        "volatility": volatility,
+        "annualized_volatility": volatility * (252 ** 0.5),
+        "covariance_matrix": pd.DataFrame(covariance, index=tickers, columns=tickers, copy=False),
+    }
+
+
+class IncrementalStatistics:
+    """
+    Moyennes, variances et matrice de covariance des rendements journaliers, mises à jour barre par barre.
+
+    Avec `window`, les barres sortant de la fenêtre sont retirées (mise à jour de Welford inversée).
+    L'état complet peut être sauvegardé puis rechargé pour être avancé chaque nuit.
+    """
+
+    def __init__(self, tickers, window=None, refresh_every=None):
+        """
+        Args:
+            tickers (list): Tickers suivis (ordre des colonnes).
+            window (int): Taille de la fenêtre glissante en barres (fenêtre croissante si None).
+            refresh_every (int): Recalcul exact depuis la fenêtre toutes les `refresh_every` sorties
+                de barre, pour borner la dérive numérique (`window` par défaut).
+        """
+        self.tickers = list(tickers)
+        self.window = window
+        self.refresh_every = refresh_every or window
+        n = len(self.tickers)
+        self.count = 0
+        self.mean = np.zeros(n)
+        self.comoment = np.zeros((n, n))  # 📌 somme des produits croisés centrés
+        self.last_prices = None
+        self.last_date = None
+        self._buffer = np.empty((window, n)) if window else None  # 📌 tampon circulaire des rendements
+        self._head = 0
+        self._removed = 0
+
+    # 📌 Mises à jour élémentaires
+    def _add(self, returns):
+        self.count += 1
+        delta = returns - self.mean
+        self.mean += delta / self.count
+        self.comoment += np.outer(delta, returns - self.mean)
+
+    def _remove(self, returns):
+        if self.count <= 1:
+            self.count = 0
+            self.mean[:] = 0.0
+            self.comoment[:] = 0.0
+            return
+        delta = returns - self.mean
+        self.count -= 1
+        self.mean -= delta / self.count
+        self.comoment -= np.outer(returns - self.mean, delta)
+
+    def _window_returns(self):
+        """ Rendements de la fenêtre, du plus ancien au plus récent. """
+        if self.count < self.window:
+            return self._buffer[:self.count]
+        return np.roll(self._buffer, -self._head, axis=0)
+
+    def recompute(self):
+        """
+        Recalcule exactement moyenne et co-moments depuis la fenêtre stockée.
+        """
+        returns = self._window_returns()
+        self.mean = returns.mean(axis=0) if len(returns) else np.zeros(len(self.tickers))
+        centered = returns - self.mean
+        self.comoment = centered.T @ centered
+        self._removed = 0
+
+    def add_returns(self, returns):
+        """
+        Ajoute une barre de rendements (les lignes contenant des NaN sont ignorées).
+
+        Args:
+            returns (np.ndarray): Rendements des N actifs pour une barre.
+        """
+        returns = np.asarray(returns, dtype=np.float64)
+        if np.isnan(returns).any():
+            return
+        if self.window:
+            if self.count == self.window:
+                self._remove(self._buffer[self._head].copy())
+                self._removed += 1
+            self._buffer[self._head] = returns
+            self._head = (self._head + 1) % self.window
+        self._add(returns)
+        if self.window and self._removed >= self.refresh_every:
+            self.recompute()
+
+    def update(self, prices):
+        """
+        Avance l'état avec les prix postérieurs à la dernière date déjà intégrée.
+
+        Args:
+            prices (pd.DataFrame): Prix ajustés (colonnes = tickers), par exemple depuis `PriceStore`.
+
+        Returns:
+            int: Nombre de barres de prix intégrées.
+        """
+        prices = prices[self.tickers]
+        if self.last_date is not None:
+            prices = prices[prices.index > self.last_date]
+        values = prices.to_numpy(dtype=np.float64)
+        for row in values:
+            if self.last_prices is not None:
+                self.add_returns(row / self.last_prices - 1)
+            if not np.isnan(row).any():
+                self.last_prices = row
+        if len(prices):
+            self.last_date = prices.index[-1]
+        return len(prices)
+
+    @classmethod
+    def from_prices(cls, prices, window=None):
+        """
+        Initialise l'état en une passe vectorisée sur un panel de prix.
+
+        Args:
+            prices (pd.DataFrame): Prix ajustés.
+            window (int): Taille de la fenêtre glissante.
+
+        Returns:
+            IncrementalStatistics: État prêt à être avancé barre par barre.
+        """
+        stats = cls(prices.columns, window=window)
+        returns = prices.pct_change(fill_method=None).iloc[1:].dropna().to_numpy(dtype=np.float64)
+        if window:
+            returns = returns[-window:]
+            stats._buffer[:len(returns)] = returns
+            stats._head = len(returns) % window
+        stats.count = len(returns)
+        if stats.window:
+            stats.recompute()
+        else:
+            stats.mean = returns.mean(axis=0)
+            centered = returns - stats.mean
+            stats.comoment = centered.T @ centered
+        complete = prices.dropna()
+        stats.last_prices = complete.iloc[-1].to_numpy(dtype=np.float64) if len(complete) else None
+        stats.last_date = prices.index[-1] if len(prices) else None
+        return stats
+
+    def to_statistics(self):
+        """
+        Statistiques courantes, au même format que `calculate_statistics`.
+
+        Returns:
+            dict: Rendements moyens, volatilités et matrice de covariance (journaliers et annualisés).
+        """
+        covariance = self.comoment / (self.count - 1) if self.count > 1 else np.full_like(self.comoment, np.nan)
+        return _statistics(self.mean, covariance, self.tickers)
+
+    def save(self, path):
+        """
+        Sauvegarde l'état complet dans un fichier `.npz`.
+        """
+        np.savez(
+            path,
+            tickers=np.array(self.tickers),
+            window=np.int64(self.window or 0),
+            refresh_every=np.int64(self.refresh_every or 0),
+            count=np.int64(self.count),
+            mean=self.mean,
+            comoment=self.comoment,
+            buffer=self._buffer if self.window else np.empty((0, len(self.tickers))),
+            head=np.int64(self._head),
+            removed=np.int64(self._removed),
+            last_prices=self.last_prices if self.last_prices is not None else np.empty(0),
+            last_date=np.int64(self.last_date.value if self.last_date is not None else -1),
+        )
+
+    @classmethod
+    def load(cls, path):
+        """
+        Recharge un état sauvegardé par `save`.
+
+        Returns:
+            IncrementalStatistics: État restauré.
+        """
+        with np.load(path) as f:
+            stats = cls(f["tickers"].tolist(), window=int(f["window"]) or None,
+                        refresh_every=int(f["refresh_every"]) or None)
+            stats.count = int(f["count"])
+            stats.mean = f["mean"].copy()
+            stats.comoment = f["comoment"].copy()
+            if stats.window:
+                stats._buffer = f["buffer"].copy()
+            stats._head = int(f["head"])
+            stats._removed = int(f["removed"])
+            stats.last_prices = f["last_prices"].copy() if f["last_prices"].size else None
+            stats.last_date = pd.Timestamp(int(f["last_date"])) if f["last_date"] >= 0 else None
+        return stats
+
+
+class RollingStatistics:
+    """
+    Moyennes et covariances de toutes les fenêtres glissantes de `window` rendements d'un historique.
+
+    Les sommes des rendements et des produits croisés de la fenêtre sont avancées d'une fin de fenêtre à
+    la suivante en ajoutant les lignes entrantes et en retirant les lignes sortantes (un seul produit
+    matriciel signé), soit O(N²) par jour parcouru. Les statistiques sont produites à la demande :
+    une seule matrice de covariance est tenue en mémoire à la fois.
+    """
+
+    def __init__(self, returns, window, refresh_every=None):
+        """
+        Args:
+            returns (pd.DataFrame): Rendements journaliers sans NaN (T×N).
+            window (int): Taille W des fenêtres.
+            refresh_every (int): Recalcul exact des sommes depuis la fenêtre tous les `refresh_every` jours
+                parcourus, pour borner la dérive numérique (`window` par défaut).
+        """
+        if not 1 < window <= len(returns):
+            raise ValueError(f"Fenêtre de {window} rendements incompatible avec un historique de {len(returns)}.")
+        self.returns = returns
+        self.window = window
+        self.refresh_every = refresh_every or window
+        self.tickers = returns.columns  # 📌 index réutilisé par toutes les fenêtres (pas de reconstruction)
+        values = returns.to_numpy(dtype=np.float64)
+        # 📌 Centrage sur la moyenne globale : sommes de petits nombres, différences moins sujettes aux annulations
+        self._shift = values.mean(axis=0)
+        self._centered = values - self._shift
+
+    def __len__(self):
+        return len(self.returns) - self.window + 1
+
+    @property
+    def ends(self):
+        """ Fins (exclues) de toutes les fenêtres : la fenêtre `end` couvre les lignes [end - W, end). """
+        return np.arange(self.window, len(self.returns) + 1)
+
+    def means(self):
+        """
+        Rendements moyens journaliers de toutes les fenêtres, en O(T·N) par sommes cumulées.
+
+        Returns:
+            pd.DataFrame: Une ligne par fenêtre, indexée par la date de son dernier rendement.
+        """
+        cumulative = np.vstack([np.zeros(len(self.tickers)), np.cumsum(self._centered, axis=0)])
+        sums = cumulative[self.window:] - cumulative[:-self.window]
+        return pd.DataFrame(self._shift + sums / self.window, index=self.returns.index[self.window - 1:],
+                            columns=self.tickers)
+
+    def _window_sums(self, end):
+        block = self._centered[end - self.window:end]
+        return block.sum(axis=0), block.T @ block
+
+    def _to_statistics(self, end, total, cross):
+        mean = total / self.window
+        covariance = np.outer(total, mean)
+        np.subtract(cross, covariance, out=covariance)
+        covariance /= self.window - 1
+        stats = _statistics(self._shift + mean, covariance, self.tickers)
+        stats["returns"] = self.returns.iloc[end - self.window:end]
+        return stats
+
+    def window_statistics(self, end):
+        """
+        Statistiques d'une seule fenêtre, au format de `calculate_statistics` (accès direct, O(W·N²)).
+
+        Args:
+            end (int): Fin (exclue) de la fenêtre, entre W et T.
+        """
+        if not self.window <= end <= len(self.returns):
+            raise IndexError(f"Fin de fenêtre hors de l'historique : {end}")
+        return self._to_statistics(end, *self._window_sums(end))
+
+    def iter_statistics(self, ends=None):
+        """
+        Parcourt des fenêtres dans l'ordre chronologique en avançant les sommes glissantes.
+
+        Args:
+            ends (array-like): Fins (exclues) croissantes des fenêtres voulues (toutes si None), par exemple
+                les positions de rebalancement d'un backtest.
+
+        Yields:
+            tuple: (fin de la fenêtre, statistiques au format de `calculate_statistics`)
+        """
+        ends = self.ends if ends is None else np.asarray(ends)
+        current, total, cross, drift = None, None, None, 0
+        for end in ends:
+            end = int(end)
+            if not self.window <= end <= len(self.returns):
+                raise IndexError(f"Fin de fenêtre hors de l'historique : {end}")
+            step = end - current if current is not None else None
+            if step is None or step < 0 or step >= self.window or drift + step > self.refresh_every:
+                total, cross = self._window_sums(end)
+                drift = 0
+            elif step > 0:
+                # 📌 lignes entrantes (+) et sortantes (-) en un seul produit matriciel
+                entering = self._centered[current:end]
+                leaving = self._centered[current - self.window:end - self.window]
+                total += entering.sum(axis=0) - leaving.sum(axis=0)
+                cross += np.vstack([entering, -leaving]).T @ np.vstack([entering, leaving])
+                drift += step
+            current = end
+            yield end, self._to_statistics(end, total, cross)
+
+    def __iter__(self):
+        return self.iter_statistics()
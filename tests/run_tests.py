@@ -1,24 +1,26 @@
 import os
 import importlib
 import sys
-import subprocess
-import pickle
+import argparse
 
 # 📌 Définition des chemins
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # Dossier `tests`
 MAIN_DIR = os.path.join(BASE_DIR, "../main")  # Dossier `main`
-ANSWERS_FILE = os.path.join(BASE_DIR, "../data/answers.pkl")  # Fichier temporaire des réponses
-RESULTS_FILE = os.path.join(MAIN_DIR, "optimized_portfolio.pkl")  # Fichier des résultats
 
-# 📌 Ajouter `main/` au PATH pour pouvoir importer les modules
+# 📌 Ajouter `tests/` et `main/` au PATH pour pouvoir importer les modules
 sys.path.append(BASE_DIR)  # Ajouter le dossier `tests` au path Python
+sys.path.insert(0, MAIN_DIR)  # 📌 en tête : `main/statistics.py` doit masquer le module standard
+
+from statistics import analyze_portfolio
+from portfolio_optimizer import PortfolioConstraints, optimize
+from batch_runner import BATCH_RESULTS_PATH, run_batch
 
 def run_test_scenario(test_file):
     """
-    Exécute un scénario de test complet :
+    Exécute un scénario de test complet, dans le même processus :
     1. Charge les réponses utilisateur depuis un fichier Python (.py).
-    2. Exécute `statistics.py` pour récupérer les données financières.
-    3. Exécute `portfolio_optimizer.py` pour optimiser le portefeuille.
+    2. Calcule les statistiques financières des tickers (`analyze_portfolio`).
+    3. Optimise le portefeuille (`optimize`).
     4. Retourne les résultats optimisés.
 
     Args:
@@ -41,25 +43,21 @@ def run_test_scenario(test_file):
     for key, value in answers.items():
         print(f"{key}: {value}")
 
-    # 📌 Sauvegarder les réponses dans `answers.pkl`
-    with open(ANSWERS_FILE, "wb") as f:
-        pickle.dump(answers, f)
-
-    print("\n📁 ✅ Fichier `answers.pkl` mis à jour.")
-
-    # 📌 Exécuter `statistics.py` pour récupérer les données financières
-    print("\n⏳ Exécution de `statistics.py` pour récupérer les données financières...")
-    subprocess.run(["python", os.path.join(MAIN_DIR, "statistics.py")])
+    # 📌 Statistiques financières (une seule récupération des données)
+    print("\n⏳ Calcul des statistiques financières...")
+    stats = analyze_portfolio(answers["tickers"])
+    if stats is None:
+        print("❌ Erreur : impossible de récupérer les données financières.")
+        return None
 
-    # 📌 Exécuter `portfolio_optimizer.py` pour optimiser le portefeuille
-    print("\n⏳ Exécution de `portfolio_optimizer.py` pour optimiser le portefeuille...")
-    subprocess.run(["python", os.path.join(MAIN_DIR, "portfolio_optimizer.py")])
+    # 📌 Optimisation du portefeuille
+    print("\n⏳ Optimisation du portefeuille...")
+    result = optimize(stats, PortfolioConstraints.from_preferences(answers), answers["optimization_method"],
+                      solver=answers.get("solver", "QP"))
+    results = result.to_dict(answers["budget"]) if result.success else None
 
     # 📌 Vérification des résultats
-    if os.path.exists(RESULTS_FILE):
-        with open(RESULTS_FILE, "rb") as f:
-            results = pickle.load(f)
-
+    if results is not None:
         print("\n📊 ✅ **Résultats du Portefeuille Optimisé**")
         print(f"📈 **Rendement attendu :** {results['expected_return']:.2f}%")
         print(f"📊 **Volatilité attendue :** {results['expected_volatility']:.2f}%\n")
@@ -74,11 +72,27 @@ def run_test_scenario(test_file):
 
         return results
     else:
-        print("❌ Erreur : Aucun fichier de résultats trouvé.")
+        print(f"❌ Erreur : {result.message}")
         return None
 
 # 📌 Exécuter le script si lancé directement
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scénarios de test du simulateur de portefeuille.")
+    parser.add_argument("--batch", metavar="SOURCE",
+                        help="Dossier (test_*.py, JSON, JSONL) ou fichier JSONL de profils à optimiser en lot.")
+    parser.add_argument("--output", default=BATCH_RESULTS_PATH, help="Fichier JSONL consolidé des résultats.")
+    parser.add_argument("--processes", type=int, default=None, help="Nombre de processus du pool.")
+    parser.add_argument("--telemetry", action="store_true",
+                        help="Ajoute les durées par étape et la télémétrie des solveurs à chaque résultat.")
+    args = parser.parse_args()
+
+    if args.batch:
+        records = run_batch(args.batch, output_path=args.output, processes=args.processes,
+                            telemetry=args.telemetry)
+        succeeded = sum(record["success"] for record in records)
+        print(f"\n📁 ✅ {succeeded}/{len(records)} profils optimisés, résultats dans `{args.output}`.")
+        sys.exit(0)
+
     print("\n📢 Sélectionnez un test à exécuter :")
     print("1 - Test avec 5 tickers connus (test_1)")
     print("2 - Test avec 10 tickers moins connus (test_2)")
@@ -0,0 +1,30 @@
+import os
+import sys
+
+import pytest
+
+# 📌 `main/` en tête du chemin : `main/statistics.py` masque le module standard, comme dans `tests/run_tests.py`
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, os.path.join(ROOT_DIR, "benchmarks"))
+sys.path.insert(0, os.path.join(ROOT_DIR, "main"))
+sys.modules.pop("statistics", None)
+
+from synthetic_market import generate_prices  # noqa: E402
+from statistics import calculate_returns  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def prices():
+    """ Panel synthétique complet : 40 actifs, 3 ans de bourse. """
+    return generate_prices(40, 756, seed=7)
+
+
+@pytest.fixture(scope="session")
+def returns(prices):
+    return calculate_returns(prices)
+
+
+@pytest.fixture(scope="session")
+def ragged_returns():
+    """ Rendements à historiques inégaux (introductions, radiations et trous isolés). """
+    return calculate_returns(generate_prices(30, 504, missing="mixed", missing_fraction=0.3, seed=11), dropna=False)
@@ -0,0 +1,79 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from batch_runner import load_profiles, run_batch
+from data_sources import InMemorySource
+from price_store import PriceStore
+from synthetic_market import generate_prices
+
+TESTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+PROFILE = {"tickers": ["AAA", "BBB"], "budget": 1000, "min_allocation": 0, "max_allocation": 100,
+           "risk_free_rate": 1.0, "optimization_method": "Minimisation de la volatilité"}
+
+
+def test_repository_profiles_only():
+    # 📌 `run_tests.py` (menu interactif) et `__init__.py` ne sont pas exécutés
+    assert [profile_id for profile_id, _ in load_profiles(TESTS_DIR)] == ["test_1", "test_2", "test_3"]
+
+
+def test_non_profile_files_are_skipped(tmp_path):
+    marker = tmp_path / "executed"
+    (tmp_path / "run_tests.py").write_text(f"open({str(marker)!r}, 'w').close()\n")
+    (tmp_path / "__init__.py").write_text(f"open({str(marker)!r}, 'w').close()\n")
+    (tmp_path / "test_helpers.py").write_text("def helper():\n    return 1\n")
+    (tmp_path / "test_broken.py").write_text("raise RuntimeError('pas un profil')\n")
+    (tmp_path / "test_partial.py").write_text("answers = {'tickers': ['AAA']}\n")
+    (tmp_path / "test_valid.py").write_text(f"answers = {PROFILE!r}\n")
+    (tmp_path / "notes.json").write_text(json.dumps({"comment": "pas un profil"}))
+    (tmp_path / "lines.jsonl").write_text(json.dumps(dict(PROFILE, id="line")) + "\n" + json.dumps({"id": "x"}) + "\n")
+
+    profiles = load_profiles(str(tmp_path))
+    assert [profile_id for profile_id, _ in profiles] == ["line", "test_valid"]
+    assert not marker.exists()
+
+
+def test_screened_profile_matches_the_full_solve(tmp_path):
+    # 📌 Prix jusqu'à aujourd'hui : la période par défaut ("5y") de l'exécution par lots les couvre
+    prices = generate_prices(300, 504, n_factors=5, seed=3, end=pd.Timestamp.today().normalize())
+    store = PriceStore(root=str(tmp_path / "prices"), provider=InMemorySource(prices))
+    profile = dict(PROFILE, tickers=list(prices.columns), max_allocation=5)
+    profiles = tmp_path / "profiles.jsonl"
+    profiles.write_text("\n".join(json.dumps(line) for line in (
+        dict(profile, id="full"),
+        dict(profile, id="screened", max_candidates=30),
+        dict(profile, id="target", optimization_method="Optimisation pour un rendement cible", target_return=5,
+             max_candidates=30),
+    )) + "\n")
+
+    full, screened, target = run_batch(str(profiles), output_path=str(tmp_path / "results.jsonl"), processes=1,
+                                       store=store)
+    assert full["success"] and screened["success"], screened["message"]
+    assert "candidats" in screened["message"]
+    np.testing.assert_allclose([screened["weights"][ticker] for ticker in prices.columns],
+                               [full["weights"][ticker] for ticker in prices.columns], atol=1e-7)
+    assert target["success"], target["message"]
+    assert target["expected_return"] >= 5 - 1e-7
+
+
+def test_failing_profile_does_not_stop_the_batch(tmp_path):
+    prices = generate_prices(4, 300, seed=5, end=pd.Timestamp.today().normalize())
+    store = PriceStore(root=str(tmp_path / "prices"), provider=InMemorySource(prices))
+    profile = dict(PROFILE, tickers=list(prices.columns))
+    profiles = tmp_path / "profiles.jsonl"
+    # 📌 Réponse non numérique (ValueError) et budget absent (TypeError au calcul des montants)
+    profiles.write_text("\n".join(json.dumps(line) for line in (
+        dict(profile, id="first"),
+        dict(profile, id="not_a_number", max_assets="deux"),
+        dict(profile, id="no_budget", budget=None),
+        dict(profile, id="last", optimization_method="Contribution égale au risque (ERC)"),
+    )) + "\n")
+
+    first, not_a_number, no_budget, last = run_batch(str(profiles), output_path=str(tmp_path / "results.jsonl"),
+                                                     processes=1, store=store)
+    assert first["success"] and last["success"]
+    assert not not_a_number["success"] and not_a_number["answers_hash"] is None
+    assert not no_budget["success"] and no_budget["message"].startswith("TypeError")
@@ -0,0 +1,73 @@
+import itertools
+import time
+
+import numpy as np
+import pytest
+
+from cardinality import cardinality_min_variance
+from qp_solver import min_variance_qp
+from statistics import calculate_returns, calculate_statistics
+from synthetic_market import generate_prices
+
+
+@pytest.fixture(scope="module")
+def problem(returns):
+    stats = calculate_statistics(returns)
+    return stats["annualized_returns"].to_numpy(), stats["covariance_matrix"].to_numpy() * 252
+
+
+@pytest.mark.parametrize("target", [None, "median"])
+def test_holdings_and_bounds(problem, target):
+    mu, cov = problem
+    target_return = float(np.median(mu)) if target else None
+    result = cardinality_min_variance(mu, cov, 10, min_allocation=0.02, max_allocation=0.2,
+                                      target_return=target_return, time_limit=0.5)
+    assert result.success
+    held = result.x > 0
+    assert result.holdings == held.sum() == 10
+    assert result.x.sum() == pytest.approx(1.0, abs=1e-9)
+    assert np.all(result.x[held] >= 0.02 - 1e-9) and np.all(result.x <= 0.2 + 1e-9)
+    if target_return is not None:
+        assert result.x @ mu >= target_return - 1e-9
+
+
+@pytest.mark.parametrize("time_limit", [0.0, 0.3])
+def test_time_limit_is_respected(problem, time_limit):
+    mu, cov = problem
+    start = time.perf_counter()
+    result = cardinality_min_variance(mu, cov, 8, min_allocation=0.05, max_allocation=0.3, time_limit=time_limit)
+    elapsed = time.perf_counter() - start
+    assert result.success
+    # 📌 Le budget est vérifié entre deux QP K×K : dépassement d'au plus quelques solutions
+    assert elapsed <= time_limit + 0.25
+    if time_limit == 0:
+        assert result.swaps == 0
+
+
+def _subset_variance(cov, subset, lb, ub):
+    block = cov[np.ix_(subset, subset)]
+    result = min_variance_qp(block, np.full(len(subset), lb), np.full(len(subset), ub))
+    return result.x @ block @ result.x if result.success else np.inf
+
+
+def test_local_search_reaches_the_best_subset_of_a_small_universe(problem):
+    mu, cov = problem[0][:10], problem[1][:10, :10]
+    filtered = cardinality_min_variance(mu, cov, 3, min_allocation=0.1, max_allocation=0.6, time_limit=0.0)
+    searched = cardinality_min_variance(mu, cov, 3, min_allocation=0.1, max_allocation=0.6, time_limit=5.0,
+                                        candidates=10)
+    assert searched.x @ cov @ searched.x <= filtered.x @ cov @ filtered.x + 1e-15
+    # 📌 Référence exhaustive : les 120 sous-ensembles de 3 actifs
+    best = min(_subset_variance(cov, list(subset), 0.1, 0.6) for subset in itertools.combinations(range(10), 3))
+    assert searched.x @ cov @ searched.x == pytest.approx(best, rel=1e-8)
+
+
+def test_rejected_swaps_are_retried_after_an_accepted_swap():
+    # 📌 Un échange rejeté pour le premier portefeuille améliore le suivant (la recherche s'arrêtait
+    # après 1 échange quand les paires déjà essayées restaient écartées)
+    returns = calculate_returns(generate_prices(60, 300, n_factors=8, seed=2))
+    stats = calculate_statistics(returns)
+    mu, cov = stats["annualized_returns"].to_numpy(), stats["covariance_matrix"].to_numpy() * 252
+    result = cardinality_min_variance(mu, cov, 6, min_allocation=0.02, max_allocation=0.5, time_limit=5.0,
+                                      candidates=2)
+    assert result.swaps >= 2
+    assert result.x @ cov @ result.x == pytest.approx(0.02157286939096127, rel=1e-6)
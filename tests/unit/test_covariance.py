@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from covariance import nearest_psd, pairwise_covariance
+from instrumentation import recording
+from statistics import calculate_returns, calculate_statistics
+from synthetic_market import generate_prices
+
+
+def _ragged(missing):
+    return calculate_returns(generate_prices(30, 504, missing=missing, missing_fraction=0.3, seed=11), dropna=False)
+
+
+@pytest.mark.parametrize("missing", ["delisting", "gaps"])
+def test_pairwise_matches_pandas(missing):
+    returns = _ragged(missing)
+    expected = returns.cov(min_periods=1).to_numpy()
+    np.testing.assert_allclose(pairwise_covariance(returns, min_periods=1).to_numpy(), expected,
+                               rtol=1e-10, atol=1e-14)
+
+
+def test_pairwise_repair_keeps_variances(ragged_returns):
+    # 📌 Paires calculées sur des fenêtres différentes : la matrice de pandas n'est pas semi-définie positive
+    expected = ragged_returns.cov(min_periods=1).to_numpy()
+    assert np.linalg.eigvalsh(expected)[0] < 0
+    with recording() as record:
+        cov = pairwise_covariance(ragged_returns, min_periods=1).to_numpy()
+    assert [f["name"] for f in record.fallbacks] == ["psd_repair"]
+    assert np.linalg.eigvalsh(cov)[0] >= -1e-12 * np.abs(cov).max()
+    np.testing.assert_allclose(np.diag(cov), np.diag(expected), rtol=1e-10)
+    assert np.abs(cov - expected).max() <= 0.05 * np.abs(expected).max()
+
+
+def test_nearest_psd():
+    std = np.array([0.1, 0.2, 0.3])
+    correlation = np.array([[1.0, 0.9, -0.9], [0.9, 1.0, 0.9], [-0.9, 0.9, 1.0]])
+    cov = correlation * np.outer(std, std)
+    assert np.linalg.eigvalsh(cov)[0] < 0
+    repaired, corrected = nearest_psd(cov)
+    assert corrected
+    assert np.linalg.eigvalsh(repaired)[0] >= -1e-12
+    np.testing.assert_allclose(np.diag(repaired), std ** 2)
+    np.testing.assert_allclose(repaired, repaired.T)
+
+    unchanged, corrected = nearest_psd(repaired)
+    assert not corrected
+    np.testing.assert_array_equal(unchanged, repaired)
+
+
+def test_pairwise_statistics_on_a_complete_panel_use_the_sample_kernel(returns, ragged_returns):
+    # 📌 Historique plus court que `min_periods` : le noyau par paires annulerait les corrélations
+    short = returns.iloc[:15]
+    with recording() as record:
+        pairwise = calculate_statistics(short, covariance="pairwise")
+    assert not record.fallbacks
+    np.testing.assert_array_equal(pairwise["covariance_matrix"].to_numpy(),
+                                  calculate_statistics(short)["covariance_matrix"].to_numpy())
+    np.testing.assert_allclose(pairwise["covariance_matrix"].to_numpy(), short.cov().to_numpy(), rtol=1e-10)
+
+    ragged = calculate_statistics(ragged_returns, covariance="pairwise")
+    np.testing.assert_allclose(ragged["covariance_matrix"].to_numpy(),
+                               pairwise_covariance(ragged_returns).to_numpy())
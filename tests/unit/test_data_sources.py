@@ -0,0 +1,101 @@
+import threading
+
+import pandas as pd
+import pytest
+
+from data_sources import ConcurrentFetcher, InMemorySource, naive_dates
+from price_store import PriceStore
+
+
+class FlakySource(InMemorySource):
+    """ Source en mémoire dont les premières requêtes groupées renvoient un résultat vide (erreur passagère). """
+
+    def __init__(self, prices, empty_batches=1):
+        super().__init__(prices)
+        self.empty_batches = empty_batches
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def fetch(self, tickers, start=None, interval="1d", incremental=False):
+        with self._lock:
+            self.calls.append((tuple(tickers), incremental))
+            empty = len(tickers) > 1 and self.empty_batches > 0
+            self.empty_batches -= empty
+        return pd.DataFrame() if empty else super().fetch(tickers, start=start, interval=interval)
+
+
+@pytest.fixture
+def small_prices(prices):
+    return prices.iloc[-300:, :6]
+
+
+def test_first_download_retries_an_empty_chunk(small_prices):
+    # 📌 Période bornée ("1y") : date de début connue, mais premier téléchargement (non incrémental)
+    source = FlakySource(small_prices)
+    fetcher = ConcurrentFetcher(source, chunk_size=3, retries=1, backoff=0.0)
+    data, failures = fetcher.fetch_with_failures(list(small_prices.columns), start=small_prices.index[50])
+    assert failures == {}
+    assert sorted(data.columns) == sorted(small_prices.columns)
+
+
+def test_incremental_empty_response_is_not_a_failure(small_prices):
+    source = FlakySource(small_prices)
+    fetcher = ConcurrentFetcher(source, chunk_size=6, retries=1, backoff=0.0)
+    data, failures = fetcher.fetch_with_failures(list(small_prices.columns), start=small_prices.index[-1],
+                                                 incremental=True)
+    assert data.empty and failures == {}
+    assert len(source.calls) == 1  # 📌 pas de nouvelle tentative ticker par ticker
+
+
+def test_missing_tickers_are_reported_per_call(small_prices):
+    fetcher = ConcurrentFetcher(InMemorySource(small_prices), chunk_size=2, retries=1, backoff=0.0)
+    tickers = list(small_prices.columns)
+    results = {}
+
+    def run(name, extra):
+        results[name] = fetcher.fetch_with_failures(tickers + [extra])
+
+    threads = [threading.Thread(target=run, args=(name, f"MISSING_{name}")) for name in ("a", "b")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # 📌 Deux appels simultanés sur la même instance : chacun ne voit que ses propres échecs
+    assert set(results["a"][1]) == {"MISSING_a"}
+    assert set(results["b"][1]) == {"MISSING_b"}
+    assert sorted(results["a"][0].columns) == sorted(tickers)
+
+
+def test_price_store_marks_only_updates_as_incremental(small_prices, tmp_path):
+    source = FlakySource(small_prices)
+    store = PriceStore(root=str(tmp_path), provider=ConcurrentFetcher(source, retries=1, backoff=0.0))
+    prices = store.get_prices(list(small_prices.columns), period="max")
+    assert sorted(prices.columns) == sorted(small_prices.columns)
+    assert not any(incremental for _, incremental in source.calls)
+
+
+class LocalizedSource(FlakySource):
+    """ Comme `YahooSource` : index localisé pour un ticker seul (`yf.Ticker.history`), naïf pour un paquet. """
+
+    def fetch(self, tickers, start=None, interval="1d", incremental=False):
+        data = super().fetch(tickers, start=start, interval=interval, incremental=incremental)
+        if len(tickers) == 1:
+            data = data.tz_localize("America/New_York")
+        return data
+
+
+def test_localized_and_naive_indexes_are_combined(small_prices):
+    # 📌 5 tickers par paquets de 2 : le dernier paquet (un ticker) et la nouvelle tentative sont localisés
+    tickers = list(small_prices.columns[:5])
+    fetcher = ConcurrentFetcher(LocalizedSource(small_prices), chunk_size=2, retries=1, backoff=0.0)
+    data, failures = fetcher.fetch_with_failures(tickers)
+    assert failures == {}
+    assert data.index.tz is None
+    pd.testing.assert_frame_equal(data[tickers], small_prices[tickers], check_freq=False, check_names=False)
+
+
+def test_naive_dates():
+    index = pd.date_range("2024-01-02", periods=3, freq="D", tz="America/New_York")
+    frame = naive_dates(pd.DataFrame({"AAA": [1.0, 2.0, 3.0]}, index=index))
+    assert frame.index.tz is None
+    assert list(frame.index) == list(pd.date_range("2024-01-02", periods=3, freq="D"))
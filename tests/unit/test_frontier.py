@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from covariance import factor_covariance
+from frontier import _trace_chunk, efficient_frontier, max_return_weights
+from qp_solver import min_variance_qp
+from statistics import calculate_statistics
+
+BOUNDS = (0.0, 0.15)
+
+
+@pytest.fixture(scope="module")
+def problem(returns):
+    stats = calculate_statistics(returns.iloc[:, :20])
+    return stats["annualized_returns"], stats["covariance_matrix"] * 252
+
+
+@pytest.fixture(scope="module")
+def frontier(problem):
+    return efficient_frontier(*problem, *BOUNDS, num_points=15)
+
+
+def test_frontier_is_monotone(frontier):
+    assert frontier["success"].all()
+    assert np.all(np.diff(frontier["returns"]) >= -1e-10)
+    assert np.all(np.diff(frontier["volatilities"]) >= -1e-10)
+    assert np.allclose(frontier["weights"].sum(axis=1), 1.0)
+    assert frontier["weights"].min() >= BOUNDS[0] - 1e-9 and frontier["weights"].max() <= BOUNDS[1] + 1e-9
+
+
+def test_frontier_endpoints(problem, frontier):
+    mu, cov = problem
+    n = len(mu)
+    min_var = min_variance_qp(cov.to_numpy(), np.full(n, BOUNDS[0]), np.full(n, BOUNDS[1]))
+    assert frontier["volatilities"][0] == pytest.approx(np.sqrt(min_var.x @ cov.to_numpy() @ min_var.x), rel=1e-6)
+    top = max_return_weights(mu.to_numpy(), np.full(n, BOUNDS[0]), np.full(n, BOUNDS[1]))
+    assert frontier["returns"][-1] == pytest.approx(mu.to_numpy() @ top, rel=1e-9)
+
+
+@pytest.mark.parametrize("start", ["cold", "min_variance_state"])
+def test_warm_start_matches_cold_start(problem, frontier, start):
+    mu, cov = problem
+    n = len(mu)
+    lb, ub = np.full(n, BOUNDS[0]), np.full(n, BOUNDS[1])
+    state = min_variance_qp(cov.to_numpy(), lb, ub).state if start == "min_variance_state" else None
+    # 📌 Chaque point résolu seul, sans solution voisine
+    single = np.vstack([_trace_chunk(cov.to_numpy(), mu.to_numpy(), lb, ub, [target], state=state)[0]
+                        for target in frontier["returns"]])
+    assert np.allclose(single, frontier["weights"], atol=1e-7)
+
+
+@pytest.mark.parametrize("factor_model", [False, True])
+def test_process_pool_matches_serial_tracing(problem, returns, factor_model):
+    mu, cov = problem
+    if factor_model:
+        cov = factor_covariance(returns.iloc[:, :20], n_factors=3) / (1 / 252)
+    serial = efficient_frontier(mu, cov, *BOUNDS, num_points=9)
+    pooled = efficient_frontier(mu, cov, *BOUNDS, num_points=9, processes=2)
+    assert np.array_equal(pooled["success"], serial["success"])
+    assert np.allclose(pooled["weights"], serial["weights"], atol=1e-7)
+    assert np.allclose(pooled["volatilities"], serial["volatilities"], atol=1e-9)
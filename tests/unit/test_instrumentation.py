@@ -0,0 +1,65 @@
+import json
+import threading
+import time
+
+import pytest
+
+import instrumentation
+from instrumentation import active_record, record_fallback, record_solver, recording, span
+from qp_solver import QPResult
+
+
+def test_nested_spans_are_aggregated_by_path():
+    with recording(profile="p1") as record:
+        with span("optimize"):
+            for _ in range(3):
+                with span("solver"):
+                    time.sleep(0.002)
+                    record_fallback("qp_phase1", attempt=1)
+        with span("frontier"):
+            pass
+
+    assert list(record.spans) == ["optimize/solver", "optimize", "frontier"]
+    solver, optimize = record.spans["optimize/solver"], record.spans["optimize"]
+    assert solver["count"] == 3 and optimize["count"] == 1
+    assert solver["max_seconds"] <= solver["total_seconds"] <= optimize["total_seconds"]
+    assert solver["total_seconds"] >= 0.006
+    assert record.fallbacks[0] == {"name": "qp_phase1", "stage": "optimize/solver", "attempt": 1}
+    assert json.loads(record.to_json())["metadata"] == {"profile": "p1"}
+
+
+def test_span_stack_is_restored_after_an_exception():
+    with recording() as record:
+        with pytest.raises(RuntimeError):
+            with span("optimize"), span("solver"):
+                raise RuntimeError
+        with span("frontier"):
+            pass
+    assert record._stack == []
+    assert list(record.spans) == ["optimize/solver", "optimize", "frontier"]
+
+
+def test_inactive_instrumentation_is_a_no_op():
+    assert active_record() is None
+    # 📌 Même objet à chaque appel : aucune allocation sans enregistrement actif
+    assert span("optimize") is span("solver") is instrumentation._NULL_SPAN
+    with span("optimize") as inactive:
+        record_solver("QP", QPResult(success=True, message="ok", nit=3))
+        record_fallback("qp_phase1")
+    assert inactive is instrumentation._NULL_SPAN
+
+
+def test_recording_is_scoped_to_the_block_and_thread():
+    seen = []
+    with recording() as record:
+        thread = threading.Thread(target=lambda: seen.append(active_record()))
+        thread.start()
+        thread.join()
+        record_solver("QP", QPResult(success=True, message="ok", nit=3), constraint_violation=0.0, method="test")
+        with recording() as inner:
+            assert active_record() is inner
+        assert active_record() is record
+    assert active_record() is None
+    assert seen == [None]
+    assert record.solvers == [{"solver": "QP", "success": True, "message": "ok", "nit": 3, "nfev": None,
+                               "njev": None, "constraint_violation": 0.0, "method": "test"}]
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from covariance import factor_covariance
+from monte_carlo import sample_weights, simulate_portfolios
+from statistics import calculate_statistics
+
+RISK_FREE_RATE = 0.02
+
+
+@pytest.fixture(scope="module")
+def problem(returns):
+    stats = calculate_statistics(returns.iloc[:, :10])
+    return stats["annualized_returns"], stats["covariance_matrix"] * 252
+
+
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+@pytest.mark.parametrize("bounds", [(0.0, 1.0), (0.02, 0.3), (0.05, 0.12)])
+def test_sampled_weights_are_feasible(bounds, dtype):
+    lb, ub = np.full(10, bounds[0]), np.full(10, bounds[1])
+    weights = sample_weights(np.random.default_rng(0), 20_000, lb, ub, dtype)
+    tol = 1e-5 if dtype == np.float32 else 1e-12
+    assert weights.dtype == dtype
+    assert np.allclose(weights.sum(axis=1), 1.0, atol=tol)
+    assert weights.min() >= bounds[0] - tol and weights.max() <= bounds[1] + tol
+
+
+def test_same_seed_reproduces_the_simulation(problem):
+    first = simulate_portfolios(*problem, n_samples=20_000, max_allocation=0.3, chunk_size=3000, seed=3)
+    again = simulate_portfolios(*problem, n_samples=20_000, max_allocation=0.3, chunk_size=3000, seed=3)
+    other = simulate_portfolios(*problem, n_samples=20_000, max_allocation=0.3, chunk_size=3000, seed=4)
+    assert first["summary"] == again["summary"]
+    pd.testing.assert_frame_equal(first["top"], again["top"])
+    assert first["summary"] != other["summary"]
+
+
+def _brute_force(mu, cov, n_samples, lb, ub, seed):
+    """ Tous les tirages d'un coup (la suite aléatoire ne dépend pas de la taille des blocs). """
+    weights = sample_weights(np.random.default_rng(seed), n_samples, lb, ub)
+    returns = weights @ mu
+    volatilities = np.sqrt(np.einsum("ij,jk,ik->i", weights, cov, weights))
+    return weights, returns, volatilities, (returns - RISK_FREE_RATE) / volatilities
+
+
+@pytest.mark.parametrize("factor_model", [False, True])
+def test_summary_and_top_match_brute_force(problem, returns, factor_model):
+    mu, cov = problem
+    if factor_model:
+        cov = factor_covariance(returns.iloc[:, :10], n_factors=3) / (1 / 252)
+    n = len(mu)
+    simulation = simulate_portfolios(mu, cov, n_samples=5000, min_allocation=0.02, max_allocation=0.3,
+                                     risk_free_rate=RISK_FREE_RATE, chunk_size=1200, top_k=7, seed=5)
+    weights, *metrics = _brute_force(mu.to_numpy(), np.asarray(cov), 5000, np.full(n, 0.02), np.full(n, 0.3), 5)
+
+    for name, values in zip(("return", "volatility", "sharpe"), metrics):
+        summary = simulation["summary"][name]
+        assert summary["mean"] == pytest.approx(values.mean(), rel=1e-10)
+        assert summary["std"] == pytest.approx(values.std(), rel=1e-6)
+        assert summary["min"] == pytest.approx(values.min(), rel=1e-10)
+        assert summary["max"] == pytest.approx(values.max(), rel=1e-10)
+
+    best = np.argsort(-metrics[2])[:7]
+    top = simulation["top"]
+    assert np.allclose(top[list(mu.index)].to_numpy(), weights[best], atol=1e-12)
+    assert np.allclose(top["expected_return"], metrics[0][best], rtol=1e-10)
+    assert np.allclose(top["expected_volatility"], metrics[1][best], rtol=1e-10)
+    assert np.allclose(top["sharpe_ratio"], metrics[2][best], rtol=1e-10)
+
+
+def test_float32_matches_float64(problem):
+    mu, cov = problem
+    kwargs = dict(n_samples=200_000, max_allocation=0.3, risk_free_rate=RISK_FREE_RATE, chunk_size=50_000, seed=1)
+    single = simulate_portfolios(mu, cov, dtype=np.float32, **kwargs)
+    double = simulate_portfolios(mu, cov, dtype=np.float64, **kwargs)
+    # 📌 Tirages différents selon la précision : comparaison des distributions
+    for name in ("return", "volatility", "sharpe"):
+        assert single["summary"][name]["mean"] == pytest.approx(double["summary"][name]["mean"], rel=1e-2)
+        assert single["summary"][name]["std"] == pytest.approx(double["summary"][name]["std"], rel=3e-2)
+
+    # 📌 Indicateurs float32 des meilleurs portefeuilles, réévalués en float64
+    top = single["top"]
+    weights = top[list(mu.index)].to_numpy()
+    volatilities = np.sqrt(np.einsum("ij,jk,ik->i", weights, cov.to_numpy(), weights))
+    assert np.allclose(top["expected_return"], weights @ mu.to_numpy(), rtol=1e-5)
+    assert np.allclose(top["expected_volatility"], volatilities, rtol=1e-5)
+    assert np.allclose(top["sharpe_ratio"], (weights @ mu.to_numpy() - RISK_FREE_RATE) / volatilities, rtol=1e-4)
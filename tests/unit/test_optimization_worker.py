@@ -0,0 +1,73 @@
+import pytest
+
+import optimization_worker
+from data_sources import InMemorySource
+from optimization_worker import OptimizationWorker, answers_key
+from price_store import PriceStore
+
+ANSWERS = {"budget": 10000, "min_allocation": 0, "max_allocation": 30, "risk_free_rate": 1.0,
+           "optimization_method": "Minimisation de la volatilité"}
+
+
+@pytest.fixture
+def worker(prices, tmp_path):
+    worker = OptimizationWorker(store=PriceStore(root=str(tmp_path), provider=InMemorySource(prices.iloc[:, :12])))
+    yield worker
+    worker.shutdown()
+
+
+@pytest.fixture
+def answers(prices):
+    return dict(ANSWERS, tickers=list(prices.columns[:12]))
+
+
+@pytest.mark.parametrize("key, value", [("max_candidates", 5), ("frontier_points", 10)])
+def test_answers_key_covers_screening_and_frontier(answers, key, value):
+    assert answers_key(dict(answers, **{key: value})) != answers_key(answers)
+
+
+def test_changed_candidates_are_not_served_from_cache(worker, answers):
+    first = worker.run(answers)
+    assert first["reoptimization"]["mode"] == "cold"
+    screened = worker.run(dict(answers, max_candidates=5))
+    # 📌 Nouvelle clé : résolu à chaud depuis l'ensemble actif précédent, même solution
+    assert screened["reoptimization"]["mode"] == "warm"
+    assert "max_candidates" in screened["reoptimization"]["changed"]
+    assert screened["weights"] == pytest.approx(first["weights"], abs=1e-8)
+    frontier = worker.run(dict(answers, frontier_points=10))
+    assert len(frontier["frontier"]["returns"]) <= 10
+
+
+def test_cardinality_warm_start_uses_previous_holdings(worker, answers, monkeypatch):
+    worker.run(answers)
+    calls = []
+
+    def spy(*args, **kwargs):
+        calls.append(kwargs)
+        return optimize(*args, **kwargs)
+
+    optimize = optimization_worker.optimize
+    monkeypatch.setattr(optimization_worker, "optimize", spy)
+    answers = dict(answers, optimization_method="Minimisation de la volatilité à K actifs", max_assets=5,
+                   min_allocation=5, max_allocation=40, search_time=0.0)
+    result = worker.run(answers)
+    # 📌 « warm » seulement si la recherche par échanges reçoit bien les lignes précédentes
+    assert result["reoptimization"]["mode"] == "warm"
+    assert calls[0]["initial_weights"] is not None
+    assert sum(weight > 0 for weight in result["weights"].values()) <= 5
+
+
+def test_backtests_are_cached(worker, answers, prices, monkeypatch):
+    calls = []
+    compute = optimization_worker.backtest
+    monkeypatch.setattr(optimization_worker, "backtest", lambda *args, **kwargs: calls.append(args) or
+                        compute(*args, **kwargs))
+    panel = prices[answers["tickers"]]
+    monthly = worker.backtest(answers, panel, rebalance_frequency="Mensuel")
+    assert worker.backtest(dict(answers, budget=500), panel, rebalance_frequency="Mensuel") is monthly
+    assert len(calls) == 1
+    # 📌 Nouvelle fréquence ou nouvelle barre de prix : nouveau calcul
+    weekly = worker.backtest(answers, panel, rebalance_frequency="Hebdomadaire")
+    worker.backtest(answers, panel.iloc[:-1], rebalance_frequency="Mensuel")
+    assert len(calls) == 3
+    assert weekly["equity_curve"].index[-1] == monthly["equity_curve"].index[-1]
@@ -0,0 +1,37 @@
+import os
+
+import numpy as np
+import pytest
+
+from data_sources import InMemorySource
+from out_of_core import open_returns, streaming_statistics, write_returns
+from price_store import PriceStore
+from statistics import calculate_returns
+
+
+@pytest.fixture(scope="module")
+def written(prices, tmp_path_factory):
+    root = str(tmp_path_factory.mktemp("out_of_core"))
+    panel = prices.iloc[:, :10].copy()
+    panel.iloc[:30, 3] = np.nan  # 📌 introduction tardive : les dates communes commencent après
+    store = PriceStore(root=root, provider=InMemorySource(panel))
+    path = os.path.join(root, "returns.npy")
+    tickers = write_returns(list(panel.columns), path, store=store, period="max", dtype=np.float64,
+                            tickers_per_chunk=4)
+    return path, tickers, calculate_returns(panel.dropna())
+
+
+def test_written_returns_match_the_in_memory_pipeline(written):
+    path, tickers, reference = written
+    values, stored_tickers = open_returns(path)
+    assert stored_tickers == tickers == list(reference.columns)
+    np.testing.assert_allclose(np.asarray(values), reference.to_numpy(), rtol=1e-12)
+
+
+@pytest.mark.parametrize("block_rows", [1, 7, 64, 10 ** 6])
+def test_block_merge_matches_pandas(written, block_rows):
+    path, _, reference = written
+    stats = streaming_statistics(path, block_rows=block_rows)
+    np.testing.assert_allclose(stats["mean_returns"].to_numpy(), reference.mean().to_numpy(), rtol=1e-10, atol=1e-15)
+    np.testing.assert_allclose(stats["covariance_matrix"].to_numpy(), reference.cov().to_numpy(), rtol=1e-9,
+                               atol=1e-15)
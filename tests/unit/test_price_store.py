@@ -0,0 +1,91 @@
+import datetime as dt
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_sources import InMemorySource
+from price_store import PriceStore, period_start
+from synthetic_market import generate_prices
+
+
+class CountingSource(InMemorySource):
+    """ Source en mémoire qui enregistre chaque appel (tickers, date de début, mise à jour incrémentale). """
+
+    def __init__(self, prices):
+        super().__init__(prices)
+        self.calls = []
+
+    def fetch(self, tickers, start=None, interval="1d", incremental=False):
+        self.calls.append((tuple(tickers), start, incremental))
+        return super().fetch(tickers, start=start, interval=interval)
+
+
+@pytest.fixture(scope="module")
+def market():
+    """ Prix jusqu'au dernier jour ouvré : les périodes relatives à aujourd'hui les couvrent. """
+    return generate_prices(3, 1500, seed=2, end=pd.Timestamp(dt.date.today()) - pd.offsets.BDay(1))
+
+
+def _assert_same_prices(left, right):
+    """ Mêmes dates et mêmes prix (résolution et nom de l'index non comparés). """
+    pd.testing.assert_frame_equal(left, right, check_freq=False, check_index_type=False, check_names=False)
+
+
+def _checked_yesterday(store, ticker):
+    """ Simule un historique vérifié la veille (les prix stockés ne sont plus considérés à jour). """
+    path = store._path(ticker, "1d")
+    with np.load(path) as f:
+        data = dict(f)
+    data["checked"] = np.int64((pd.Timestamp(dt.date.today()) - pd.Timedelta(days=1)).value)
+    np.savez(path, **data)
+
+
+def test_second_request_of_the_day_is_served_from_disk(market, tmp_path):
+    source = CountingSource(market)
+    store = PriceStore(root=str(tmp_path), provider=source)
+    first = store.get_prices(list(market.columns), period="1y")
+    assert len(source.calls) == 1
+    second = store.get_prices(list(market.columns), period="1y")
+    assert len(source.calls) == 1
+    _assert_same_prices(second, first)
+    _assert_same_prices(first, market[market.index >= period_start("1y")])
+
+
+def test_update_requests_only_new_bars(market, tmp_path):
+    source = CountingSource(market.iloc[:-10])
+    store = PriceStore(root=str(tmp_path), provider=source)
+    store.get_prices(list(market.columns), period="1y")
+    for ticker in market.columns:
+        _checked_yesterday(store, ticker)
+
+    source.prices = market
+    prices = store.get_prices(list(market.columns), period="1y")
+    assert source.calls[1] == (tuple(market.columns), market.index[-11] + pd.Timedelta(days=1), True)
+    assert len(source.calls) == 2
+    _assert_same_prices(prices, market[market.index >= period_start("1y")])
+
+
+def test_failed_first_fetch_persists_nothing(market, tmp_path):
+    source = CountingSource(market)
+    store = PriceStore(root=str(tmp_path), provider=source)
+    prices = store.get_prices(["MISSING", market.columns[0]], period="1y")
+    assert list(prices.columns) == [market.columns[0]]
+    assert store.load("MISSING") is None
+    assert not os.path.exists(store._path("MISSING", "1d"))
+    # 📌 Rien n'est stocké : le ticker est redemandé, seul
+    store.get_prices(["MISSING", market.columns[0]], period="1y")
+    assert source.calls[-1] == (("MISSING",), period_start("1y"), False)
+
+
+def test_longer_period_triggers_a_refetch(market, tmp_path):
+    source = CountingSource(market)
+    store = PriceStore(root=str(tmp_path), provider=source)
+    store.get_prices(list(market.columns), period="1y")
+    prices = store.get_prices(list(market.columns), period="5y")
+    assert source.calls[-1] == (tuple(market.columns), period_start("5y"), False)
+    assert prices.index[0] == market.index[market.index >= period_start("5y")][0]
+    # 📌 L'historique stocké couvre désormais 5 ans : une période plus courte n'appelle plus le fournisseur
+    store.get_prices(list(market.columns), period="2y")
+    assert len(source.calls) == 2
@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+import scipy.optimize as sco
+
+from qp_solver import AT_LOWER, AT_UPPER, min_variance_qp, project_capped_simplex, solve_qp
+from statistics import calculate_statistics
+
+
+@pytest.fixture(scope="module")
+def problem(returns):
+    stats = calculate_statistics(returns)
+    mu = stats["annualized_returns"].to_numpy()
+    cov = np.asarray(stats["covariance_matrix"]) * 252  # 📌 échelle annuelle : SLSQP mieux conditionné
+    n = len(mu)
+    return mu, cov, np.zeros(n), np.full(n, 0.15)
+
+
+def _slsqp(mu, cov, lb, ub, target_return=None):
+    """ Solution de référence : SLSQP sur la variance (multipliée par 100 : `ftol` est absolue). """
+    cov = cov * 1e2
+    constraints = [{"type": "eq", "fun": lambda w: w.sum() - 1, "jac": lambda w: np.ones_like(w)}]
+    if target_return is not None:
+        constraints.append({"type": "eq", "fun": lambda w: w @ mu - target_return, "jac": lambda w: mu})
+    result = sco.minimize(lambda w: 0.5 * w @ cov @ w, np.full(len(mu), 1 / len(mu)), jac=lambda w: cov @ w,
+                          method="SLSQP", bounds=np.column_stack([lb, ub]), constraints=constraints,
+                          options={"ftol": 1e-14, "maxiter": 1000})
+    assert result.success, result.message
+    return result.x
+
+
+@pytest.mark.parametrize("quantile", [None, 0.8])
+def test_min_variance_matches_slsqp(problem, quantile):
+    mu, cov, lb, ub = problem
+    target = float(np.quantile(mu, quantile)) if quantile is not None else None
+    result = min_variance_qp(cov, lb, ub, mean_returns=mu, target_return=target)
+    assert result.success
+    reference = _slsqp(mu, cov, lb, ub, target)
+    np.testing.assert_allclose(result.x, reference, atol=1e-8)
+    assert result.x.sum() == pytest.approx(1.0, abs=1e-12)
+    if target is not None:
+        assert result.x @ mu == pytest.approx(target, abs=1e-12)
+
+
+def test_kkt_conditions(problem):
+    mu, cov, lb, ub = problem
+    result = min_variance_qp(cov, lb, ub, mean_returns=mu, target_return=float(np.median(mu)))
+    # 📌 Stationnarité : coûts réduits nuls pour les actifs libres, >= 0 à la borne basse, <= 0 à la borne haute
+    reduced = cov @ result.x + result.multipliers[0] + result.multipliers[1] * mu
+    scale = np.abs(reduced).max() + np.abs(cov @ result.x).max()
+    free = (result.state != AT_LOWER) & (result.state != AT_UPPER)
+    assert np.all(np.abs(reduced[free]) <= 1e-9 * scale)
+    assert np.all(reduced[result.state == AT_LOWER] >= -1e-9 * scale)
+    assert np.all(reduced[result.state == AT_UPPER] <= 1e-9 * scale)
+
+
+def test_warm_start_reaches_the_same_solution(problem):
+    mu, cov, lb, ub = problem
+    cold = min_variance_qp(cov, lb, ub)
+    tighter = np.full(len(mu), 0.12)
+    reference = min_variance_qp(cov, lb, tighter)
+    warm = min_variance_qp(cov, lb, tighter, w0=cold.x, state=cold.state)
+    assert warm.success
+    np.testing.assert_allclose(warm.x, reference.x, atol=1e-10)
+
+
+def test_phase1_from_an_infeasible_start(problem):
+    # 📌 Point de départ incompatible avec le rendement cible : devinette primal-dual puis phase 1 si besoin
+    mu, cov, lb, ub = problem
+    target = float(np.quantile(mu, 0.9))
+    start = np.full(len(mu), 1 / len(mu))
+    result = min_variance_qp(cov, lb, ub, mean_returns=mu, target_return=target, w0=start,
+                             state=np.zeros(len(mu), dtype=np.int8))
+    assert result.success
+    np.testing.assert_allclose(result.x, _slsqp(mu, cov, lb, ub, target), atol=1e-8)
+
+
+def test_infeasible_bounds_are_reported(problem):
+    mu, cov, lb, _ = problem
+    result = solve_qp(cov, np.ones((1, len(mu))), [1.0], lb, np.full(len(mu), 0.5 / len(mu)))
+    assert not result.success
+    assert result.x is None
+
+
+def test_project_capped_simplex():
+    lb, ub = np.zeros(5), np.full(5, 0.3)
+    point = project_capped_simplex(np.array([0.9, 0.5, 0.1, -0.2, 0.0]), lb, ub)
+    assert point.sum() == pytest.approx(1.0)
+    assert np.all(point >= lb) and np.all(point <= ub)
+    assert project_capped_simplex(np.zeros(5), lb, np.full(5, 0.1)) is None
@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from portfolio_optimizer import PortfolioConstraints, optimize
+from resampling import resampled_weights
+from statistics import calculate_statistics
+
+
+@pytest.fixture(scope="module")
+def stats(returns):
+    return calculate_statistics(returns.iloc[:, :10])
+
+
+def test_pool_and_serial_runs_agree(stats):
+    # 📌 Graines par paquet de tirages : le nombre de processus ne change pas le résultat
+    serial = resampled_weights(stats, 0.0, 0.3, 0.01, n_resamples=60, kind="bootstrap", processes=1, seed=5)
+    pooled = resampled_weights(stats, 0.0, 0.3, 0.01, n_resamples=60, kind="bootstrap", processes=2, seed=5)
+    assert serial.success and serial.resamples == 60
+    np.testing.assert_allclose(pooled.x, serial.x, rtol=1e-12)
+    np.testing.assert_allclose(pooled.dispersion, serial.dispersion, rtol=1e-12)
+    assert serial.x.sum() == pytest.approx(1.0, abs=1e-9)
+    assert np.all(serial.x <= 0.3 + 1e-9)
+
+
+def test_processes_preference(stats):
+    preferences = {"min_allocation": 0, "max_allocation": 30, "risk_free_rate": 1, "n_resamples": 50}
+    assert PortfolioConstraints.from_preferences(preferences).processes is None
+    constraints = PortfolioConstraints.from_preferences({**preferences, "processes": 1})
+    assert constraints.processes == 1
+    result = optimize(stats, constraints, "Maximisation du ratio de Sharpe ré-échantillonnée", verbose=False)
+    reference = resampled_weights(stats, 0.0, 0.3, 0.01, n_resamples=50, processes=1, seed=0)
+    np.testing.assert_allclose(result.weights, reference.x, rtol=1e-12)
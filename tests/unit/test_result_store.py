@@ -0,0 +1,111 @@
+import datetime as dt
+import json
+import pickle
+import types
+
+import numpy as np
+import pytest
+
+import result_store
+from covariance import factor_covariance
+from frontier import efficient_frontier
+from portfolio_optimizer import PortfolioConstraints, optimize
+from result_store import ResultStore, load_preferences, save_preferences
+from statistics import calculate_statistics
+
+ANSWERS = {"budget": 10000, "min_allocation": 0, "max_allocation": 30, "risk_free_rate": 1.0,
+           "optimization_method": "Minimisation de la volatilité"}
+
+
+@pytest.fixture(scope="module")
+def stats(returns):
+    return calculate_statistics(returns.iloc[:, :12])
+
+
+@pytest.fixture(scope="module")
+def result(stats):
+    constraints = PortfolioConstraints.from_preferences(ANSWERS)
+    return optimize(stats, constraints, ANSWERS["optimization_method"], verbose=False)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """ Dates d'exécution imposées, une par appel à `save`. """
+    times = []
+    monkeypatch.setattr(result_store, "dt", types.SimpleNamespace(datetime=types.SimpleNamespace(
+        now=lambda: times.pop(0))))
+    return times
+
+
+def test_saved_run_is_read_back_memory_mapped(stats, result, tmp_path):
+    store = ResultStore(root=str(tmp_path))
+    frontier = efficient_frontier(stats["annualized_returns"], stats["covariance_matrix"], 0.0, 0.3, num_points=5)
+    run_id = store.save(result, ANSWERS, stats=stats, frontier=frontier, answers_hash="abc")
+
+    run = store.load(run_id)
+    assert isinstance(run["arrays"]["weights"], np.memmap)
+    assert np.array_equal(run["arrays"]["weights"], result.weights)
+    assert np.allclose(run["arrays"]["amounts"], result.weights * ANSWERS["budget"])
+    assert np.array_equal(run["arrays"]["frontier_weights"], frontier["weights"])
+    assert np.array_equal(store.covariance(run).to_numpy(), np.asarray(stats["covariance_matrix"]))
+    assert run["tickers"] == list(result.tickers) and run["answers"] == ANSWERS
+    assert store.to_results(run)["weights"] == pytest.approx(result.to_dict(ANSWERS["budget"])["weights"])
+    assert not isinstance(store.load(run_id, mmap=False)["arrays"]["weights"], np.memmap)
+
+
+def test_factor_covariance_is_saved_compact(stats, result, returns, tmp_path):
+    store = ResultStore(root=str(tmp_path))
+    cov = factor_covariance(returns.iloc[:, :12], n_factors=3)
+    run = store.load(store.save(result, ANSWERS, stats=dict(stats, covariance_matrix=cov)))
+    assert "covariance" not in run["arrays"]
+    assert np.allclose(np.asarray(store.covariance(run)), cov.to_dense())
+
+
+def test_history_filters_by_hash_and_date(result, tmp_path, clock):
+    store = ResultStore(root=str(tmp_path))
+    clock += [dt.datetime(2024, 1, day, 9) for day in (1, 2, 3, 4)]
+    runs = [store.save(result, ANSWERS, answers_hash=answers_hash) for answers_hash in ("a", "b", "a", "a")]
+
+    assert list(store.history().index) == runs
+    assert list(store.history(answers_hash="a").index) == [runs[0], runs[2], runs[3]]
+    assert list(store.history(answers_hash="a", since="2024-01-02", until="2024-01-03 12:00").index) == [runs[2]]
+    assert store.history(answers_hash="missing").empty
+    assert store.latest("a") == runs[3] and store.latest("missing") is None
+
+
+def test_history_reads_lines_appended_by_another_store(result, tmp_path, clock):
+    clock += [dt.datetime(2024, 1, day, 9) for day in (1, 2)]
+    store, other = ResultStore(root=str(tmp_path)), ResultStore(root=str(tmp_path))
+    first = store.save(result, ANSWERS, answers_hash="a")
+    assert list(other.history(answers_hash="a").index) == [first]
+
+    # 📌 Ligne tronquée par une interruption puis nouvelle exécution : seule la ligne illisible est ignorée
+    with open(store.history_path, "a", encoding="utf-8") as f:
+        f.write('{"run_id": "interrompu"\n')
+    second = store.save(result, ANSWERS, answers_hash="a")
+    assert list(other.history(answers_hash="a").index) == [first, second]
+    assert other.latest("a") == second
+
+
+def test_preferences_round_trip(tmp_path):
+    path = str(tmp_path / "answers.json")
+    save_preferences(ANSWERS, path)
+    assert load_preferences(path) == ANSWERS
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"schema_version": 99, "answers": ANSWERS}, f)
+    with pytest.raises(ValueError):
+        load_preferences(path)
+
+
+def test_legacy_pickle_is_read_only_without_json(tmp_path, monkeypatch):
+    path, legacy = str(tmp_path / "answers.json"), str(tmp_path / "answers.pkl")
+    monkeypatch.setattr(result_store, "PREFERENCES_PATH", path)
+    monkeypatch.setattr(result_store, "LEGACY_PREFERENCES_PATH", legacy)
+    assert load_preferences(path) is None
+    with open(legacy, "wb") as f:
+        pickle.dump(dict(ANSWERS, budget=500), f)
+    assert load_preferences(path)["budget"] == 500
+    # 📌 Autre chemin que celui par défaut : l'ancien fichier n'est pas utilisé
+    assert load_preferences(str(tmp_path / "other.json")) is None
+    save_preferences(ANSWERS, path)
+    assert load_preferences(path) == ANSWERS
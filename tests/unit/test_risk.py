@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from instrumentation import recording
+from risk import historical_cvar, historical_var, max_drawdown, min_cvar_weights, portfolio_returns, risk_report
+
+
+@pytest.fixture(scope="module")
+def panel(returns):
+    return returns.iloc[:, :8].to_numpy()
+
+
+def _cvar(port_returns, level):
+    """ CVaR de référence : moyenne des pertes des ⌈(1 - level)·T⌉ pires jours, par tri complet. """
+    tail = int(np.ceil((1 - level) * len(port_returns)))
+    return -np.sort(port_returns)[:tail].mean()
+
+
+def test_risk_measures_match_direct_definitions(panel):
+    weights = np.vstack([np.full(8, 1 / 8), np.eye(8)[2]])
+    port_returns = portfolio_returns(panel, weights)
+    np.testing.assert_allclose(port_returns[:, 0], panel.mean(axis=1))
+    np.testing.assert_allclose(historical_cvar(port_returns, 0.95), [_cvar(port_returns[:, p], 0.95) for p in (0, 1)])
+    np.testing.assert_allclose(historical_var(port_returns, 0.9), -np.quantile(port_returns, 0.1, axis=0))
+    wealth = np.concatenate([[1.0], np.cumprod(1 + port_returns[:, 1])])
+    assert max_drawdown(port_returns)[1] == pytest.approx(np.max(1 - wealth / np.maximum.accumulate(wealth)))
+    assert list(risk_report(panel, weights, names=["egal", "seul"]).index) == ["egal", "seul"]
+
+
+def test_min_cvar_lp_beats_other_portfolios(panel):
+    # 📌 (1 - level)·T entier : la CVaR de l'LP et la moyenne des pires jours coïncident exactement
+    level, panel = 0.75, panel[:752]
+    lb, ub = np.zeros(8), np.full(8, 0.4)
+    result = min_cvar_weights(panel, level, lb, ub)
+    assert result.success
+    assert result.x.sum() == pytest.approx(1.0, abs=1e-9)
+    assert np.all(result.x >= -1e-9) and np.all(result.x <= 0.4 + 1e-9)
+    optimum = _cvar(panel @ result.x, level)
+    # 📌 Valeur de l'LP = CVaR historique du portefeuille optimal (formulation de Rockafellar-Uryasev exacte)
+    assert result.cvar == pytest.approx(optimum, rel=1e-7)
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        weights = rng.dirichlet(np.ones(8))
+        if weights.max() <= 0.4:
+            assert _cvar(panel @ weights, level) >= optimum - 1e-12
+
+
+def test_min_cvar_with_target_return(panel):
+    mu = panel.mean(axis=0) * 252
+    target = float(np.quantile(mu, 0.75))
+    result = min_cvar_weights(panel, 0.95, np.zeros(8), np.full(8, 0.5), mean_returns=mu, target_return=target)
+    assert result.success
+    assert result.x @ mu >= target - 1e-9
+
+
+def test_min_cvar_restricts_ragged_panels_to_common_dates(ragged_returns):
+    complete = ragged_returns.dropna()
+    lb, ub = np.zeros(30), np.full(30, 0.2)
+    with recording() as record:
+        result = min_cvar_weights(ragged_returns, 0.95, lb, ub)
+    assert result.success and result.scenarios == len(complete) < len(ragged_returns)
+    assert [f["name"] for f in record.fallbacks] == ["cvar_common_window"]
+    np.testing.assert_allclose(result.x, min_cvar_weights(complete, 0.95, lb, ub).x, atol=1e-9)
+
+
+def test_min_cvar_reports_disjoint_histories(returns):
+    # 📌 A cesse de coter avant l'introduction de B : aucune date commune
+    ragged = returns.iloc[:100, :3].copy()
+    ragged.iloc[60:, 0] = np.nan
+    ragged.iloc[:70, 1] = np.nan
+    result = min_cvar_weights(ragged, 0.95, np.zeros(3), np.ones(3))
+    assert not result.success and result.x is None
+    assert str(ragged.columns[1]) in result.message and str(ragged.columns[0]) in result.message
+
+    ragged.iloc[:50, 1] = returns.iloc[:50, 1]  # 📌 50 dates communes : trop peu au niveau 99 %
+    result = min_cvar_weights(ragged, 0.99, np.zeros(3), np.ones(3))
+    assert not result.success and result.scenarios == 50
@@ -0,0 +1,101 @@
+import functools
+
+import numpy as np
+import pytest
+
+import portfolio_optimizer
+from instrumentation import recording
+from portfolio_optimizer import PortfolioConstraints, optimize
+from risk_parity import erc_weights, hrp_weights, risk_contributions
+from statistics import calculate_statistics
+
+
+@pytest.fixture(scope="module")
+def cov(returns):
+    return calculate_statistics(returns)["covariance_matrix"].to_numpy()
+
+
+def _hrp_reference(cov, order):
+    """ Bissection récursive de López de Prado, écrite directement (sans bornes). """
+    weights = np.ones(len(cov))
+
+    def variance(items):
+        block = cov[np.ix_(items, items)]
+        ivp = 1 / np.diag(block) / np.sum(1 / np.diag(block))
+        return ivp @ block @ ivp
+
+    def split(items):
+        if len(items) == 1:
+            return
+        left, right = items[:len(items) // 2], items[len(items) // 2:]
+        alpha = 1 - variance(left) / (variance(left) + variance(right))
+        weights[left] *= alpha
+        weights[right] *= 1 - alpha
+        split(left)
+        split(right)
+
+    split(list(order))
+    return weights
+
+
+def test_hrp_matches_the_recursive_bisection(cov):
+    result = hrp_weights(cov)
+    assert result.success
+    assert sorted(result.order) == list(range(len(cov)))
+    np.testing.assert_allclose(result.x, _hrp_reference(cov, result.order), rtol=1e-12)
+
+
+def test_hrp_of_uncorrelated_assets_is_inverse_variance():
+    variances = np.random.default_rng(3).uniform(0.5, 4.0, 9) * 1e-4
+    result = hrp_weights(np.diag(variances))
+    np.testing.assert_allclose(result.x, (1 / variances) / np.sum(1 / variances), rtol=1e-12)
+
+
+@pytest.mark.parametrize("method", [hrp_weights, erc_weights])
+def test_bounds_are_respected(cov, method):
+    result = method(cov, min_allocation=0.02, max_allocation=0.04)
+    assert result.success
+    assert result.x.sum() == pytest.approx(1.0, abs=1e-10)
+    assert np.all(result.x >= 0.02 - 1e-12) and np.all(result.x <= 0.04 + 1e-12)
+    assert not method(cov, min_allocation=0.03).success  # 📌 40 × 3 % > 100 %
+
+
+def test_erc_contributions_are_equal(cov):
+    result = erc_weights(cov)
+    assert result.success
+    assert result.x.sum() == pytest.approx(1.0, abs=1e-10)
+    contributions = risk_contributions(result.x, cov)
+    np.testing.assert_allclose(contributions, contributions.mean(), rtol=1e-7)
+
+    budgets = np.linspace(1, 3, len(cov))
+    contributions = risk_contributions(erc_weights(cov, budgets=budgets).x, cov)
+    np.testing.assert_allclose(contributions / contributions.sum(), budgets / budgets.sum(), rtol=1e-7)
+
+
+def test_erc_with_active_bounds(cov):
+    # 📌 Actifs libres : contributions égales ; à la borne haute (basse) : contribution plus faible (forte)
+    lb, ub = 0.015, 0.03
+    w = erc_weights(cov, min_allocation=lb, max_allocation=ub).x
+    contributions = risk_contributions(w, cov)
+    at_lower, at_upper = w <= lb + 1e-9, w >= ub - 1e-9
+    free = ~(at_lower | at_upper)
+    assert at_upper.any() and free.sum() > 1
+    level = contributions[free].mean()
+    np.testing.assert_allclose(contributions[free], level, rtol=1e-6)
+    assert np.all(contributions[at_upper] <= level * (1 + 1e-6))
+    assert np.all(contributions[at_lower] >= level * (1 - 1e-6))
+
+
+def test_erc_projection_is_reported_as_a_failure(cov, returns, monkeypatch):
+    with recording() as record:
+        result = erc_weights(cov, min_allocation=0.015, max_allocation=0.03, max_iter=1)
+    assert not result.success
+    assert [f["name"] for f in record.fallbacks] == ["erc_projection"]
+    assert np.all(result.x >= 0.015 - 1e-12) and np.all(result.x <= 0.03 + 1e-12)
+
+    # 📌 `optimize` transmet l'échec (et son message) au lieu de présenter la projection comme une solution
+    monkeypatch.setattr(portfolio_optimizer, "erc_weights", functools.partial(erc_weights, max_iter=1))
+    constraints = PortfolioConstraints(min_allocation=0.015, max_allocation=0.03)
+    optimized = optimize(calculate_statistics(returns), constraints, "Contribution égale au risque (ERC)",
+                         verbose=False)
+    assert not optimized.success and optimized.message == result.message
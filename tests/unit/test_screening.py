@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from qp_solver import min_variance_qp
+from screening import screen_universe, screened_min_variance
+from statistics import calculate_returns, calculate_statistics
+from synthetic_market import generate_prices
+
+
+@pytest.fixture(scope="module")
+def universe():
+    return calculate_returns(generate_prices(300, 504, n_factors=5, seed=3))
+
+
+@pytest.fixture(scope="module", params=["sample", "factor"])
+def stats(request, universe):
+    return calculate_statistics(universe, covariance=request.param, n_factors=5)
+
+
+@pytest.mark.parametrize("quantile", [None, 0.7])
+def test_screened_solve_matches_full_solve(stats, quantile):
+    mu = stats["annualized_returns"].to_numpy()
+    cov = stats["covariance_matrix"]
+    n = len(mu)
+    lb, ub = np.zeros(n), np.full(n, 0.05)
+    target = float(np.quantile(mu, quantile)) if quantile is not None else None
+    candidates = screen_universe(stats, 30, risk_free_rate=0.01, max_allocation=0.05)
+    assert 20 <= len(candidates) <= 30
+
+    screened = screened_min_variance(cov, lb, ub, candidates, mean_returns=mu, target_return=target)
+    full = min_variance_qp(np.asarray(cov) if quantile is None else cov, lb, ub, mean_returns=mu,
+                           target_return=target)
+    assert screened.success and full.success
+    assert screened.candidates < n
+    np.testing.assert_allclose(screened.x, full.x, atol=1e-10)
+
+    # 📌 Démarrage à chaud depuis l'ensemble actif final : aucun tour de vérification supplémentaire
+    warm = screened_min_variance(cov, lb, ub, candidates, mean_returns=mu, target_return=target,
+                                 state=screened.state)
+    assert warm.rounds == 1
+    np.testing.assert_allclose(warm.x, full.x, atol=1e-10)
+
+
+def test_screening_without_volatilities(stats):
+    # 📌 Statistiques réduites (exécution par lots) : volatilités tirées de la diagonale de la covariance
+    reduced = {key: stats[key] for key in ("annualized_returns", "covariance_matrix", "returns")}
+    np.testing.assert_array_equal(screen_universe(reduced, 30), screen_universe(stats, 30))
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from streaming_stats import IncrementalStatistics, RollingStatistics
+
+
+def _direct(returns):
+    """ Moments de référence calculés directement par pandas. """
+    return returns.mean().to_numpy(), returns.cov().to_numpy()
+
+
+def test_growing_window_matches_pandas(prices, returns):
+    stats = IncrementalStatistics(prices.columns)
+    for row in returns.to_numpy():
+        stats.add_returns(row)
+    mean, cov = _direct(returns)
+    result = stats.to_statistics()
+    np.testing.assert_allclose(result["mean_returns"].to_numpy(), mean, rtol=1e-10, atol=1e-14)
+    np.testing.assert_allclose(result["covariance_matrix"].to_numpy(), cov, rtol=1e-9, atol=1e-15)
+
+
+def test_sliding_window_removes_old_bars(prices, returns):
+    # 📌 refresh_every supérieur à l'historique : seules les mises à jour de Welford inversées sont testées
+    window = 120
+    stats = IncrementalStatistics(prices.columns, window=window, refresh_every=10 ** 6)
+    for row in returns.to_numpy():
+        stats.add_returns(row)
+    mean, cov = _direct(returns.iloc[-window:])
+    result = stats.to_statistics()
+    np.testing.assert_allclose(result["mean_returns"].to_numpy(), mean, rtol=1e-9, atol=1e-13)
+    np.testing.assert_allclose(result["covariance_matrix"].to_numpy(), cov, rtol=1e-7, atol=1e-13)
+
+
+def test_update_continues_from_prices(prices):
+    window = 250
+    split = len(prices) - 40
+    stats = IncrementalStatistics.from_prices(prices.iloc[:split], window=window)
+    assert stats.update(prices) == 40
+    reference = IncrementalStatistics.from_prices(prices, window=window).to_statistics()
+    result = stats.to_statistics()
+    np.testing.assert_allclose(result["covariance_matrix"].to_numpy(), reference["covariance_matrix"].to_numpy(),
+                               rtol=1e-9, atol=1e-15)
+    assert stats.last_date == prices.index[-1]
+
+
+def test_save_and_load_round_trip(prices, tmp_path):
+    stats = IncrementalStatistics.from_prices(prices.iloc[:-5], window=60)
+    path = tmp_path / "state.npz"
+    stats.save(path)
+    restored = IncrementalStatistics.load(path)
+    stats.update(prices)
+    restored.update(prices)
+    np.testing.assert_array_equal(restored.to_statistics()["covariance_matrix"].to_numpy(),
+                                  stats.to_statistics()["covariance_matrix"].to_numpy())
+
+
+def test_rolling_windows_match_direct_moments(returns):
+    window = 60
+    rolling = RollingStatistics(returns, window, refresh_every=10 ** 6)
+    assert len(rolling) == len(returns) - window + 1
+    for end, stats in rolling:
+        if end % 97 and end != len(returns):
+            continue  # 📌 quelques fenêtres suffisent : les sommes glissantes traversent tout l'historique
+        mean, cov = _direct(returns.iloc[end - window:end])
+        np.testing.assert_allclose(stats["mean_returns"].to_numpy(), mean, rtol=1e-9, atol=1e-14)
+        np.testing.assert_allclose(stats["covariance_matrix"].to_numpy(), cov, rtol=1e-8, atol=1e-14)
+
+
+def test_rolling_means_and_sparse_ends(returns):
+    window = 40
+    rolling = RollingStatistics(returns, window)
+    np.testing.assert_allclose(rolling.means().to_numpy(), returns.rolling(window).mean().iloc[window - 1:].to_numpy(),
+                               rtol=1e-9, atol=1e-14)
+    # 📌 Fins espacées (rebalancements) : pas plus grands ou plus petits que la fenêtre
+    ends = [window, window + 5, window + 90, window + 91, len(returns)]
+    for end, stats in rolling.iter_statistics(ends):
+        direct = rolling.window_statistics(end)["covariance_matrix"].to_numpy()
+        np.testing.assert_allclose(stats["covariance_matrix"].to_numpy(), direct, rtol=1e-9, atol=1e-15)
+        assert len(stats["returns"]) == window
+
+
+def test_rolling_rejects_invalid_windows(returns):
+    with pytest.raises(ValueError):
+        RollingStatistics(returns, len(returns) + 1)
+    with pytest.raises(IndexError):
+        RollingStatistics(returns, 10).window_statistics(5)